@@ -0,0 +1,373 @@
+"""
+Module: aio.py
+
+Purpose:
+    Asyncio-native counting API.
+
+    Encoding work is sent to a shared, bounded thread pool (tiktoken releases
+    the GIL while encoding, so threads run in parallel). A per-event-loop
+    semaphore caps the jobs queued on that pool: once `max_pending` jobs are
+    in flight, further callers wait, which applies backpressure instead of
+    growing an unbounded queue. Texts shorter than `inline_threshold`
+    characters are counted directly on the loop when their encoder is already
+    loaded, avoiding the thread hop. Async streams (objects whose `read` is a
+    coroutine, e.g. aiofiles handles) are read on the loop block by block.
+
+Example:
+    >>> tokens, encoding = await count_text(prompt, model_alias="gpt4o")
+    >>> results, encoding = await count_many(prompts, model_alias="gpt4o")
+"""
+
+import asyncio
+import codecs
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import inspect
+import io
+import os
+from pathlib import Path
+import threading
+from typing import Any, Callable, Deque, List, Mapping, Optional, Sequence, Tuple, Union
+import weakref
+
+from tiktoken import Encoding
+
+from ai_token_counter import counter
+from ai_token_counter.file_utils import ChunkSplitter
+from ai_token_counter.tokenizer_factory import (
+    get_tiktoken_encoder,
+    peek_tiktoken_encoder,
+    resolve_encoding_name,
+)
+from ai_token_counter.tokenizers.openai import (
+    check_special_tokens,
+    count_with_encoder,
+    get_pretokenizer_pattern,
+)
+
+# Texts shorter than this many characters are counted on the event loop
+DEFAULT_INLINE_THRESHOLD = 16 << 10
+
+# Worker threads of the shared executor
+DEFAULT_MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+# Jobs allowed in flight on the executor per event loop
+DEFAULT_MAX_PENDING = 64
+
+# Characters read per step from async streams
+ASYNC_READ_SIZE = 1 << 20
+
+_SETTINGS = {
+    "inline_threshold": DEFAULT_INLINE_THRESHOLD,
+    "max_workers": DEFAULT_MAX_WORKERS,
+    "max_pending": DEFAULT_MAX_PENDING,
+}
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+# Один семафор на цикл событий: asyncio-примитивы нельзя делить между циклами
+_SEMAPHORES: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def configure(
+    *,
+    inline_threshold: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    max_pending: Optional[int] = None,
+) -> None:
+    """
+    Change the inline threshold and the executor limits.
+
+    A new `max_workers` replaces the executor (the old one finishes its jobs);
+    a new `max_pending` applies to event loops that start counting afterwards.
+
+    Raises:
+        ValueError: If a limit is below 1 (inline_threshold below 0).
+    """
+    if inline_threshold is not None:
+        if inline_threshold < 0:
+            raise ValueError("`inline_threshold` must not be negative.")
+        _SETTINGS["inline_threshold"] = inline_threshold
+    if max_pending is not None:
+        if max_pending < 1:
+            raise ValueError("`max_pending` must be at least 1.")
+        _SETTINGS["max_pending"] = max_pending
+        _SEMAPHORES.clear()
+    if max_workers is not None:
+        if max_workers < 1:
+            raise ValueError("`max_workers` must be at least 1.")
+        _SETTINGS["max_workers"] = max_workers
+        shutdown(wait=False)
+
+
+def shutdown(wait: bool = True) -> None:
+    """
+    Shut the shared executor down; the next job starts a new one.
+    """
+    global _EXECUTOR  # pylint: disable=global-statement
+    with _EXECUTOR_LOCK:
+        executor, _EXECUTOR = _EXECUTOR, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR  # pylint: disable=global-statement
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=_SETTINGS["max_workers"],
+                thread_name_prefix="ai-token-counter",
+            )
+        return _EXECUTOR
+
+
+async def _run(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run `func` on the shared executor, waiting for a slot first.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _SEMAPHORES.get(loop)
+    if semaphore is None:
+        semaphore = _SEMAPHORES[loop] = asyncio.Semaphore(_SETTINGS["max_pending"])
+    async with semaphore:
+        return await loop.run_in_executor(
+            _executor(), functools.partial(func, *args, **kwargs)
+        )
+
+
+def _resolve(
+    model_alias: Optional[str],
+    encoding_name: Optional[str],
+    config: Optional[Mapping[str, str]],
+) -> str:
+    if model_alias is None and encoding_name is None:
+        raise ValueError("One of `model_alias` or `encoding_name` must be specified.")
+    return resolve_encoding_name(
+        model_alias=model_alias, encoding_name=encoding_name, user_config=config
+    )
+
+
+async def _encoder(encoding: str) -> Encoding:
+    """
+    Return the encoder, loading it on the executor if it is not loaded yet.
+    """
+    encoder = peek_tiktoken_encoder(encoding)
+    if encoder is None:
+        encoder = await _run(get_tiktoken_encoder, encoding)
+    return encoder
+
+
+async def count_text(
+    text: str,
+    *,
+    model_alias: Optional[str] = None,
+    encoding_name: Optional[str] = None,
+    config: Optional[Mapping[str, str]] = None,
+) -> Tuple[int, str]:
+    """
+    Count tokens in an in-memory text without blocking the event loop.
+
+    Returns:
+        Tuple[int, str]: Token count and encoding name.
+
+    Raises:
+        ValueError: If no encoding is given or it is unknown, or the text
+            contains a special token.
+        TypeError: If `text` is not a str.
+    """
+    if not isinstance(text, str):
+        raise TypeError(f"Unsupported text type: {type(text)}")
+    encoding = _resolve(model_alias, encoding_name, config)
+    if len(text) < _SETTINGS["inline_threshold"]:
+        encoder = peek_tiktoken_encoder(encoding)
+        if encoder is not None:
+            return count_with_encoder(encoder, text), encoding
+    encoder = await _encoder(encoding)
+    return await _run(count_with_encoder, encoder, text), encoding
+
+
+async def count_tokens(
+    source: Any,
+    *,
+    model_alias: Optional[str] = None,
+    encoding_name: Optional[str] = None,
+    config: Optional[Mapping[str, str]] = None,
+) -> Tuple[int, str]:
+    """
+    Async counterpart of `counter.count_tokens`.
+
+    Args:
+        source: A path, '-' for stdin or a text stream (counted on the
+            executor with `counter.count_tokens`), or an async stream whose
+            `read(size)` coroutine returns str or UTF-8 bytes (read on the loop).
+        model_alias, encoding_name, config: As for `counter.count_tokens`.
+
+    Returns:
+        Tuple[int, str]: Token count and encoding name.
+
+    Raises:
+        Same as `counter.count_tokens`.
+    """
+    if _is_async_stream(source):
+        encoding = _resolve(model_alias, encoding_name, config)
+        return await _count_async_stream(source, await _encoder(encoding)), encoding
+    return await _run(
+        counter.count_tokens,
+        source,
+        model_alias=model_alias,
+        encoding_name=encoding_name,
+        config=config,
+    )
+
+
+async def count_many(
+    items: Sequence[Union[str, Path, Any]],
+    *,
+    model_alias: Optional[str] = None,
+    encoding_name: Optional[str] = None,
+    config: Optional[Mapping[str, str]] = None,
+    sources: bool = False,
+) -> Tuple[List[Union[int, Exception]], str]:
+    """
+    Count many texts (or sources) concurrently with one encoding lookup.
+
+    Purpose:
+        Small texts are counted on the loop until `inline_threshold`
+        characters have been spent there; remaining small texts go to the
+        executor in batches of about that size, large ones one by one. All
+        executor jobs share the backpressure semaphore.
+
+    Args:
+        items (Sequence[str | Path | Any]): Texts, or sources when `sources`
+            is True (see `count_tokens`).
+        model_alias, encoding_name, config: Encoding selection.
+        sources (bool): Treat items as sources instead of literal texts.
+
+    Returns:
+        Tuple[List[int | Exception], str]: Per-item results in input order
+        (a failed item holds its exception, as in `counter.count_tokens_batch`)
+        and the encoding name.
+
+    Raises:
+        ValueError: If no encoding is given or it is unknown.
+    """
+    encoding = _resolve(model_alias, encoding_name, config)
+    encoder = await _encoder(encoding)
+    results: List[Any] = list(items)
+    jobs = []
+    if sources:
+        for index, item in enumerate(results):
+            jobs.append((index, count_tokens(item, encoding_name=encoding)))
+    else:
+        jobs = _plan_texts(encoder, results)
+    outcomes = await asyncio.gather(*(job for _, job in jobs), return_exceptions=True)
+    for (index, _), outcome in zip(jobs, outcomes):
+        if isinstance(outcome, BaseException) and not isinstance(
+            outcome, counter.BATCH_ITEM_ERRORS
+        ):
+            raise outcome
+        if isinstance(index, list):
+            for position, value in zip(index, outcome):
+                results[position] = value
+        else:
+            results[index] = outcome[0] if isinstance(outcome, tuple) else outcome
+    return results, encoding
+
+
+def _plan_texts(encoder: Encoding, results: List[Any]) -> list:
+    """
+    Count what fits inline into `results` and return (index, awaitable) jobs
+    for the rest; batch jobs carry a list of indices.
+    """
+    threshold = _SETTINGS["inline_threshold"]
+    budget = threshold
+    jobs: list = []
+    batch: List[int] = []
+    batch_chars = 0
+    for index, text in enumerate(results):
+        if not isinstance(text, str):
+            results[index] = TypeError(f"Unsupported text type: {type(text)}")
+        elif len(text) >= threshold:
+            jobs.append((index, _run(count_with_encoder, encoder, text)))
+        elif len(text) <= budget:
+            budget -= len(text)
+            results[index] = _count_or_error(encoder, text)
+        else:
+            batch.append(index)
+            batch_chars += len(text)
+            if batch_chars >= threshold:
+                jobs.append((batch, _run(_count_texts, encoder, results, batch)))
+                batch, batch_chars = [], 0
+    if batch:
+        jobs.append((batch, _run(_count_texts, encoder, results, batch)))
+    return jobs
+
+
+def _count_texts(encoder: Encoding, texts: List[Any], indices: List[int]) -> list:
+    """
+    Count a batch of small texts on a worker thread.
+    """
+    return [_count_or_error(encoder, texts[index]) for index in indices]
+
+
+def _count_or_error(encoder: Encoding, text: str) -> Union[int, Exception]:
+    try:
+        return count_with_encoder(encoder, text)
+    except counter.BATCH_ITEM_ERRORS as err:
+        return err
+
+
+def _is_async_stream(source: Any) -> bool:
+    return inspect.iscoroutinefunction(getattr(source, "read", None))
+
+
+async def _count_async_stream(stream: Any, encoder: Encoding) -> int:
+    """
+    Read an async stream on the loop and count its chunks on the executor.
+
+    Chunks are cut at safe points (see `ChunkSplitter`); special tokens that
+    straddle two chunks are rejected like in `count_chunks`. At most
+    `max_workers` chunks of one stream are in flight, so memory stays bounded
+    when reading outpaces counting. Bytes are decoded as UTF-8 with newlines
+    translated, like `read_source` reads a file.
+    """
+    splitter = ChunkSplitter(ASYNC_READ_SIZE, get_pretokenizer_pattern(encoder))
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder("utf-8")(), translate=True
+    )
+    overlap = max((len(token) for token in encoder.special_tokens_set), default=1) - 1
+    in_flight: Deque[asyncio.Future] = deque()
+    total = 0
+    tail = ""
+    try:
+        while True:
+            data = await stream.read(ASYNC_READ_SIZE)
+            # Конец потока — пустое чтение, а не пустой результат декодирования:
+            # часть многобайтового символа декодируется в ""
+            block = (
+                decoder.decode(data, final=not data)
+                if isinstance(data, bytes)
+                else data
+            )
+            chunk = splitter.feed(block)
+            if not data:
+                chunk += splitter.flush()
+            if chunk:
+                if overlap and tail:
+                    check_special_tokens(encoder, tail + chunk[:overlap])
+                if overlap:
+                    tail = (tail + chunk[-overlap:])[-overlap:]
+                if len(in_flight) >= _SETTINGS["max_workers"]:
+                    total += await in_flight.popleft()
+                in_flight.append(
+                    asyncio.ensure_future(_run(count_with_encoder, encoder, chunk))
+                )
+            if not data:
+                break
+        while in_flight:
+            total += await in_flight.popleft()
+        return total
+    finally:
+        for future in in_flight:
+            future.cancel()
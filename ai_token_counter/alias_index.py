@@ -0,0 +1,107 @@
+"""
+Module: alias_index.py
+
+Purpose:
+    Compiled, immutable index of model aliases to encoding names.
+
+    The index lowercases aliases once at build time and answers lookups with
+    a dictionary hit for exact aliases or a trie walk for versioned names:
+    the longest known alias that is followed by a version separator
+    ("-", ":" or "@") and then only a version or date suffix wins, so
+    "gpt-4o-2024-08-06" resolves through "gpt-4o" and "gpt-4-0613" through
+    "gpt-4", while "gpt-4o", "gpt-4.1" or "gpt-4-vision" never fall back to
+    "gpt-4": a different model may use a different encoding.
+
+Example:
+    >>> index = AliasIndex({"gpt-4": "cl100k_base", "gpt-4o": "o200k_base"})
+    >>> index.lookup("GPT-4o-2024-08-06")
+    'o200k_base'
+"""
+
+import re
+from types import MappingProxyType
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+
+# Characters that may separate a known alias from a version suffix
+VERSION_SEPARATORS = frozenset("-:@")
+
+# Suffix after the separator: numbers and dates ("0613", "2024-08-06",
+# "16k", "v2", "3.1") or a release tag, joined by separators
+_VERSION_SUFFIX = re.compile(
+    r"(?:v?\d[\da-z.]*|latest|preview)(?:[-:@](?:v?\d[\da-z.]*|latest|preview))*"
+)
+
+# Trie node key holding the encoding of the alias ending at that node
+_TERMINAL = ""
+
+
+class AliasIndex:
+    """
+    Immutable alias -> encoding index with versioned-alias matching.
+
+    Args:
+        *configs (Mapping[str, str]): Alias mappings; later ones override
+            earlier ones. Aliases are case-insensitive.
+    """
+
+    __slots__ = ("_exact", "_trie")
+
+    def __init__(self, *configs: Optional[Mapping[str, str]]) -> None:
+        exact: Dict[str, str] = {}
+        for config in configs:
+            if config:
+                for alias, encoding in config.items():
+                    exact[alias.lower()] = encoding
+        trie: dict = {}
+        for alias, encoding in exact.items():
+            node = trie
+            for char in alias:
+                node = node.setdefault(char, {})
+            node[_TERMINAL] = encoding
+        self._exact = MappingProxyType(exact)
+        self._trie = trie
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._exact)
+
+    @property
+    def aliases(self) -> Mapping[str, str]:
+        """Read-only view of the exact (lowercased) aliases."""
+        return self._exact
+
+    def lookup(self, alias: str) -> Optional[str]:
+        """
+        Return the encoding for `alias`, or None if nothing matches.
+
+        Exact (case-insensitive) aliases win; otherwise the longest known
+        alias that is a prefix of `alias` and is followed by a version
+        separator and a version or date suffix is used.
+        """
+        key = alias.lower()
+        encoding = self._exact.get(key)
+        if encoding is not None:
+            return encoding
+        return self.match_prefix(key)[1]
+
+    def match_prefix(self, key: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Return (matched alias, encoding) of the longest versioned prefix match.
+
+        `key` must already be lowercase; (None, None) when nothing matches.
+        """
+        node = self._trie
+        best: Tuple[Optional[str], Optional[str]] = (None, None)
+        for position, char in enumerate(key):
+            if (
+                char in VERSION_SEPARATORS
+                and _TERMINAL in node
+                and _VERSION_SUFFIX.fullmatch(key, position + 1)
+            ):
+                best = (key[:position], node[_TERMINAL])
+            node = node.get(char)
+            if node is None:
+                break
+        return best
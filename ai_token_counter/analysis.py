@@ -0,0 +1,305 @@
+"""
+Module: analysis.py
+
+Purpose:
+    Token frequency analysis of a corpus: which tokens occur how often,
+    tokens per byte and per-file distributions.
+
+    Sources are streamed in chunks cut at safe split points (see
+    `file_utils.iter_source_chunks`); every chunk is encoded straight into a
+    NumPy `uint32` array and folded into a vocabulary-sized histogram with
+    `np.bincount`. Memory therefore depends on the vocabulary size (two
+    int64 histograms, the corpus one and that of the current file) plus one
+    chunk, not on the corpus size. Byte totals come from the histogram and a
+    table of token byte lengths, without re-encoding the text.
+
+Optional dependency:
+    NumPy (`pip install ai-token-counter[analysis]`); it is imported on first
+    use and its absence is reported as an ImportError.
+
+Example:
+    >>> result = analyze_sources(["prompts/"], model_alias="gpt4o", top=10)
+    >>> [(stat.text, stat.count) for stat in result.top]
+"""
+
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Sequence, Union
+
+from tiktoken import Encoding
+
+from ai_token_counter.file_utils import DEFAULT_CHUNK_SIZE, iter_source_chunks
+from ai_token_counter.tokenizer_factory import (
+    get_tiktoken_encoder,
+    resolve_encoding_name,
+)
+from ai_token_counter.tokenizers.openai import (
+    check_special_tokens,
+    get_pretokenizer_pattern,
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Default number of most frequent tokens reported
+DEFAULT_TOP = 20
+
+# Most frequent tokens reported for every file
+FILE_TOP = 5
+
+
+def _numpy():
+    """
+    Import NumPy on first use.
+
+    Raises:
+        ImportError: If NumPy is not installed.
+    """
+    try:
+        import numpy  # pylint: disable=import-outside-toplevel
+    except ImportError as e:
+        raise ImportError(
+            "Token analysis needs NumPy: pip install 'ai-token-counter[analysis]'"
+        ) from e
+    return numpy
+
+
+@dataclass(frozen=True)
+class TokenStat:
+    """
+    Frequency of one token.
+
+    Attributes:
+        token (int): Token id.
+        text (str): Decoded token bytes (invalid UTF-8 replaced by U+FFFD).
+        count (int): Occurrences.
+        share (float): Fraction of all tokens.
+    """
+
+    token: int
+    text: str
+    count: int
+    share: float
+
+
+@dataclass
+class FileStats:
+    """
+    Statistics of one source.
+
+    Attributes:
+        source (str): Path as given ('-' for stdin).
+        tokens (int): Token count.
+        bytes (int): UTF-8 bytes of the text (newlines translated).
+        tokens_per_byte (float): `tokens / bytes` (0 for an empty file).
+        distinct (int): Distinct tokens used.
+        top (List[TokenStat]): The file's `FILE_TOP` most frequent tokens.
+    """
+
+    source: str
+    tokens: int
+    bytes: int
+    tokens_per_byte: float
+    distinct: int
+    top: List[TokenStat] = field(default_factory=list)
+
+
+@dataclass
+class CorpusAnalysis:  # pylint: disable=too-many-instance-attributes
+    """
+    Result of `analyze_sources`.
+
+    Attributes:
+        encoding (str): Encoding name.
+        tokens (int), bytes (int): Corpus totals.
+        tokens_per_byte (float): `tokens / bytes`.
+        distinct (int): Distinct tokens used.
+        top (List[TokenStat]): Most frequent tokens, most frequent first.
+        files (List[FileStats]): Per-source statistics, in input order.
+        histogram (np.ndarray): Occurrences of every token id (int64,
+            vocabulary-sized); not included in `to_dict`.
+    """
+
+    encoding: str
+    tokens: int
+    bytes: int
+    tokens_per_byte: float
+    distinct: int
+    top: List[TokenStat]
+    files: List[FileStats]
+    histogram: "np.ndarray" = field(repr=False)
+
+    def distribution(self) -> Dict[str, Dict[str, float]]:
+        """
+        Return percentiles (min, p50, p90, p99, max) across files of the
+        token count and of tokens per byte.
+        """
+        np = _numpy()
+        result = {}
+        for name in ("tokens", "tokens_per_byte"):
+            values = np.array([getattr(stats, name) for stats in self.files] or [0])
+            points = np.percentile(values, [0, 50, 90, 99, 100])
+            result[name] = dict(
+                zip(("min", "p50", "p90", "p99", "max"), map(float, points))
+            )
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the analysis (without the histogram) as a JSON-ready dictionary."""
+        data = asdict(self)
+        del data["histogram"]
+        data["distribution"] = self.distribution()
+        return data
+
+
+@lru_cache(maxsize=None)
+def _token_lengths(encoder: Encoding) -> "np.ndarray":
+    """
+    Return the byte length of every token id (0 for unused ids), as int64.
+    """
+    np = _numpy()
+    lengths = np.zeros(encoder.n_vocab, dtype=np.int64)
+    for token in range(encoder.n_vocab):
+        try:
+            lengths[token] = len(encoder.decode_single_token_bytes(token))
+        except KeyError:
+            continue
+    return lengths
+
+
+def _encode_array(encoder: Encoding, text: str) -> "np.ndarray":
+    """
+    Encode text to a uint32 array (special tokens already rejected).
+    """
+    encode_to_numpy = getattr(encoder, "encode_to_numpy", None)
+    if encode_to_numpy is not None:
+        return encode_to_numpy(text, disallowed_special=())
+    # tiktoken < 0.5 не умеет кодировать сразу в массив
+    np = _numpy()
+    return np.asarray(encoder.encode_ordinary(text), dtype=np.uint32)
+
+
+def top_tokens(
+    encoder: Encoding, histogram: "np.ndarray", count: int
+) -> List[TokenStat]:
+    """
+    Return the `count` most frequent tokens of a histogram, most frequent
+    first (ties by token id).
+    """
+    np = _numpy()
+    total = int(histogram.sum())
+    used = int(np.count_nonzero(histogram))
+    count = min(count, used)
+    if count <= 0:
+        return []
+    candidates = np.argpartition(histogram, -count)[-count:]
+    ordered = sorted(candidates.tolist(), key=lambda token: (-histogram[token], token))
+    return [
+        TokenStat(
+            token=token,
+            text=encoder.decode_single_token_bytes(token).decode("utf-8", "replace"),
+            count=int(histogram[token]),
+            share=int(histogram[token]) / total,
+        )
+        for token in ordered
+    ]
+
+
+def analyze_sources(
+    sources: Sequence[Union[str, Path]],
+    model_alias: Optional[str] = None,
+    encoding_name: Optional[str] = None,
+    *,
+    config: Optional[Mapping[str, str]] = None,
+    top: int = DEFAULT_TOP,
+    block_size: int = DEFAULT_CHUNK_SIZE,
+) -> CorpusAnalysis:
+    """
+    Build the token histogram of a set of sources.
+
+    Args:
+        sources (Sequence[str | Path]): Paths or '-' for stdin (see
+            `file_utils.expand_sources`).
+        model_alias, encoding_name, config: Encoding selection.
+        top (int): Number of most frequent tokens reported.
+        block_size (int): Characters encoded per step.
+
+    Returns:
+        CorpusAnalysis: Totals, top tokens, per-file statistics and the
+        histogram.
+
+    Raises:
+        ImportError: If NumPy is not installed.
+        ValueError: If no encoding is given or it is unknown, `top` is
+            negative, or a text contains a special token.
+        FileNotFoundError, IOError, UnicodeDecodeError: As raised by
+            `iter_source_chunks`.
+    """
+    np = _numpy()
+    if model_alias is None and encoding_name is None:
+        raise ValueError("One of `model_alias` or `encoding_name` must be specified.")
+    if top < 0:
+        raise ValueError("`top` must not be negative.")
+    encoding = resolve_encoding_name(
+        model_alias=model_alias, encoding_name=encoding_name, user_config=config
+    )
+    encoder = get_tiktoken_encoder(encoding)
+    lengths = _token_lengths(encoder)
+
+    histogram = np.zeros(encoder.n_vocab, dtype=np.int64)
+    files = []
+    for source in sources:
+        counts = _source_histogram(encoder, source, block_size)
+        files.append(_file_stats(encoder, str(source), counts, lengths))
+        histogram += counts
+
+    totals = _file_stats(encoder, "", histogram, lengths, top)
+    return CorpusAnalysis(
+        encoding=encoding,
+        tokens=totals.tokens,
+        bytes=totals.bytes,
+        tokens_per_byte=totals.tokens_per_byte,
+        distinct=totals.distinct,
+        top=totals.top,
+        files=files,
+        histogram=histogram,
+    )
+
+
+def _source_histogram(
+    encoder: Encoding, source: Union[str, Path], block_size: int
+) -> "np.ndarray":
+    """
+    Return the token histogram of one source, encoded chunk by chunk.
+    """
+    np = _numpy()
+    pattern = get_pretokenizer_pattern(encoder)
+    counts = np.zeros(encoder.n_vocab, dtype=np.int64)
+    for chunk in iter_source_chunks(source, block_size, boundary_pattern=pattern):
+        check_special_tokens(encoder, chunk)
+        counts += np.bincount(_encode_array(encoder, chunk), minlength=encoder.n_vocab)
+    return counts
+
+
+def _file_stats(
+    encoder: Encoding,
+    source: str,
+    counts: "np.ndarray",
+    lengths: "np.ndarray",
+    top: int = FILE_TOP,
+) -> FileStats:
+    """
+    Summarise the histogram of one source (or, with `top`, of the corpus).
+    """
+    np = _numpy()
+    tokens = int(counts.sum())
+    size = int(counts @ lengths)
+    return FileStats(
+        source=source,
+        tokens=tokens,
+        bytes=size,
+        tokens_per_byte=tokens / size if size else 0.0,
+        distinct=int(np.count_nonzero(counts)),
+        top=top_tokens(encoder, counts, top),
+    )
@@ -0,0 +1,221 @@
+"""
+Module: cache.py
+
+Purpose:
+    Persistent, content-addressed cache of token counts.
+
+    Counts are stored in SQLite (WAL mode, safe for several processes) keyed
+    by (content hash, resolved encoding name), with least-recently-used
+    eviction once `max_entries` is exceeded. A second table remembers the
+    content hash of files by (path, size, mtime), so an unchanged file is
+    answered without even being hashed again; it is evicted the same way.
+
+    The bound is an entry count per table, not a size in bytes: a count row
+    takes about 100 bytes, a file row that plus its path, so the default
+    keeps the database within a few tens of megabytes.
+
+Usage:
+    >>> with TokenCountCache() as cache:
+    ...     count_tokens("big.txt", model_alias="gpt4", cache=cache)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+# Default number of rows kept in each table before LRU eviction starts
+DEFAULT_MAX_ENTRIES = 100_000
+
+# Eviction is checked at most once per this many insertions (and at least
+# every max_entries // 16, so a table never overshoots by more than ~6%)
+_EVICTION_INTERVAL = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS counts (
+    digest TEXT NOT NULL,
+    encoding TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (digest, encoding)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS counts_last_used ON counts (last_used);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_last_used ON files (last_used);
+"""
+
+
+def default_cache_path() -> Path:
+    """
+    Return the default cache location ($XDG_CACHE_HOME or ~/.cache).
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(Path.home(), ".cache")
+    return Path(base) / "ai-token-counter" / "counts.sqlite3"
+
+
+def hash_text(chunks: Union[str, Iterable[str]]) -> str:
+    """
+    Hash text (or consecutive chunks of one text) for use as a cache key.
+
+    Returns:
+        str: Hex BLAKE2b digest of the UTF-8 encoded text; chunking does not
+        change the result.
+    """
+    digest = hashlib.blake2b(digest_size=32)
+    for chunk in [chunks] if isinstance(chunks, str) else chunks:
+        digest.update(chunk.encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+class TokenCountCache:
+    """
+    SQLite-backed LRU cache of token counts.
+
+    Args:
+        path (str | Path | None): Database file; None uses `default_cache_path()`.
+        max_entries (int): Maximum number of rows in each table (cached
+            counts, remembered files); not a size in bytes.
+
+    Raises:
+        IOError: If the database cannot be opened, or a later read or write
+            fails (locked past the timeout, disk full, corrupted).
+
+    Side effects:
+        Creates the database file and its parent directory.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("`max_entries` must be at least 1.")
+        self.path = Path(path) if path is not None else default_cache_path()
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self._eviction_interval = max(1, min(_EVICTION_INTERVAL, max_entries // 16))
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(
+                str(self.path),
+                timeout=30,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+        except sqlite3.Error as e:
+            raise IOError(f"Cannot open token count cache '{self.path}': {e}") from e
+
+    def __enter__(self) -> "TokenCountCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
+
+    @contextmanager
+    def _locked(self) -> Iterator[sqlite3.Connection]:
+        """
+        Hold the lock around a database access, reporting SQLite errors as IOError.
+        """
+        with self._lock:
+            try:
+                yield self._db
+            except sqlite3.Error as e:
+                raise IOError(f"Token count cache '{self.path}' failed: {e}") from e
+
+    def get(self, digest: str, encoding: str) -> Optional[int]:
+        """
+        Return the cached count for (digest, encoding), or None on a miss.
+        """
+        with self._locked():
+            row = self._db.execute(
+                "SELECT tokens FROM counts WHERE digest = ? AND encoding = ?",
+                (digest, encoding),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE counts SET last_used = ? WHERE digest = ? AND encoding = ?",
+                (time.time(), digest, encoding),
+            )
+            return row[0]
+
+    def put(self, digest: str, encoding: str, tokens: int) -> None:
+        """
+        Store a count, evicting least recently used entries when over capacity.
+        """
+        with self._locked():
+            self._db.execute(
+                "INSERT OR REPLACE INTO counts VALUES (?, ?, ?, ?)",
+                (digest, encoding, tokens, time.time()),
+            )
+            self._after_insert()
+
+    def lookup_file(self, path: str, size: int, mtime_ns: int) -> Optional[str]:
+        """
+        Return the remembered digest of an unchanged file, or None.
+        """
+        with self._locked():
+            row = self._db.execute(
+                "SELECT digest FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, size, mtime_ns),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE files SET last_used = ? WHERE path = ?", (time.time(), path)
+            )
+            return row[0]
+
+    def remember_file(self, path: str, size: int, mtime_ns: int, digest: str) -> None:
+        """
+        Remember the content digest of a file at a given size and mtime.
+        """
+        with self._locked():
+            self._db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                (path, size, mtime_ns, digest, time.time()),
+            )
+            self._after_insert()
+
+    def __len__(self) -> int:
+        with self._locked():
+            return self._db.execute("SELECT COUNT(*) FROM counts").fetchone()[0]
+
+    def _after_insert(self) -> None:
+        """
+        Periodically trim both tables to `max_entries` (caller holds the lock).
+        """
+        self._inserts += 1
+        if self._inserts % self._eviction_interval and self._inserts > 1:
+            return
+        for table, key in (("counts", "digest, encoding"), ("files", "path")):
+            excess = (
+                self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                - self.max_entries
+            )
+            if excess > 0:
+                self._db.execute(
+                    f"DELETE FROM {table} WHERE ({key}) IN "
+                    f"(SELECT {key} FROM {table} ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
@@ -0,0 +1,214 @@
+"""
+Module: chat.py
+
+Purpose:
+    Count tokens of OpenAI-style chat message lists, including the fixed
+    per-message, per-name and reply-priming overhead of the chat format.
+
+    The overhead table lives in `tokenizer_config.CHAT_OVERHEAD_CONFIG`.
+    `count_chat_tokens_batch` encodes the message texts of many conversations
+    in a single `encode_ordinary_batch` call and maps the counts back.
+
+Example:
+    >>> count_chat_tokens(
+    ...     [{"role": "user", "content": "Hello world"}], model_alias="gpt-4o"
+    ... )
+    (9, 'o200k_base')
+"""
+
+from typing import Any, List, Mapping, Optional, Sequence, Tuple, Union
+
+from tiktoken import Encoding
+
+from ai_token_counter.tokenizer_config import (
+    CHAT_OVERHEAD_CONFIG,
+    DEFAULT_CHAT_OVERHEAD,
+)
+from ai_token_counter.tokenizer_factory import (
+    get_tiktoken_encoder,
+    resolve_encoding_name,
+)
+from ai_token_counter.tokenizers.openai import check_special_tokens
+
+# Default number of worker threads used by `count_chat_tokens_batch`
+DEFAULT_NUM_THREADS = 8
+
+Message = Mapping[str, Any]
+
+
+def get_chat_overhead(model_alias: Optional[str]) -> Mapping[str, int]:
+    """
+    Return the chat overhead entry for a model alias.
+
+    Args:
+        model_alias (Optional[str]): Case-insensitive model alias; None or an
+            alias missing from `CHAT_OVERHEAD_CONFIG` gives the default.
+
+    Returns:
+        Mapping[str, int]: tokens_per_message, tokens_per_name and reply_priming.
+    """
+    if model_alias is None:
+        return DEFAULT_CHAT_OVERHEAD
+    return CHAT_OVERHEAD_CONFIG.get(model_alias.lower(), DEFAULT_CHAT_OVERHEAD)
+
+
+def count_chat_tokens(
+    messages: Sequence[Message],
+    *,
+    model_alias: Optional[str] = None,
+    encoding_name: Optional[str] = None,
+    config: Optional[Mapping[str, str]] = None,
+) -> Tuple[int, str]:
+    """
+    Count the prompt tokens of one chat conversation.
+
+    Purpose:
+        Sum the tokens of every string field of every message (role, content,
+        name, ...) plus the chat-format overhead for `model_alias`.
+
+    Args:
+        messages (Sequence[Mapping]): Messages such as {"role": ..., "content": ...};
+            content may also be a list of {"type": "text", "text": ...} parts.
+        model_alias (Optional[str]): Case-insensitive alias for the AI model.
+        encoding_name (Optional[str]): Explicit encoding (default overhead applies).
+        config (Optional[Mapping[str, str]]): Override mapping for model aliases.
+
+    Returns:
+        Tuple[int, str]: (token_count, actual_encoding_name)
+
+    Raises:
+        ValueError: If no encoding can be resolved, a content part is not text
+            or a text contains a special token.
+        TypeError: If a message or one of its values has an unsupported type.
+    """
+    results, encoding = count_chat_tokens_batch(
+        [messages],
+        model_alias=model_alias,
+        encoding_name=encoding_name,
+        config=config,
+        num_threads=1,
+    )
+    if isinstance(results[0], Exception):
+        raise results[0]
+    return results[0], encoding
+
+
+def count_chat_tokens_batch(
+    conversations: Sequence[Sequence[Message]],
+    *,
+    model_alias: Optional[str] = None,
+    encoding_name: Optional[str] = None,
+    config: Optional[Mapping[str, str]] = None,
+    num_threads: int = DEFAULT_NUM_THREADS,
+) -> Tuple[List[Union[int, Exception]], str]:
+    """
+    Count the prompt tokens of many conversations with one batch encode.
+
+    Purpose:
+        Collect the texts of all messages of all conversations, encode them in
+        a single `Encoding.encode_ordinary_batch` call and fold the lengths
+        back into per-conversation totals including the chat overhead.
+
+    Args:
+        conversations (Sequence[Sequence[Mapping]]): Message lists.
+        model_alias (Optional[str]): Case-insensitive alias for the AI model.
+        encoding_name (Optional[str]): Explicit encoding (default overhead applies).
+        config (Optional[Mapping[str, str]]): Override mapping for model aliases.
+        num_threads (int): Worker threads for the batch encoder.
+
+    Returns:
+        Tuple[List[int | Exception], str]: Per-conversation counts in input
+        order and the encoding name; a malformed conversation holds its
+        exception (ValueError or TypeError) instead of a count.
+
+    Raises:
+        ValueError: If neither `model_alias` nor `encoding_name` is provided,
+            or the encoding cannot be resolved or loaded.
+    """
+    if model_alias is None and encoding_name is None:
+        raise ValueError("One of `model_alias` or `encoding_name` must be specified.")
+
+    encoding = resolve_encoding_name(
+        model_alias=model_alias, encoding_name=encoding_name, user_config=config
+    )
+    encoder = get_tiktoken_encoder(encoding)
+    overhead = get_chat_overhead(model_alias)
+
+    results, texts, owners = _collect_texts(encoder, conversations, overhead)
+
+    # Один вызов пакетного кодировщика на все тексты всех диалогов
+    if texts:
+        encoded = encoder.encode_ordinary_batch(texts, num_threads=num_threads)
+        for index, token_ids in zip(owners, encoded):
+            results[index] += len(token_ids)
+    return results, encoding
+
+
+def _collect_texts(
+    encoder: Encoding,
+    conversations: Sequence[Sequence[Message]],
+    overhead: Mapping[str, int],
+) -> Tuple[List[Union[int, Exception]], List[str], List[int]]:
+    """
+    Flatten conversations into texts to encode.
+
+    Returns:
+        Per-conversation fixed overhead (or exception), the texts, and the
+        index of the conversation owning each text.
+    """
+    results: List[Union[int, Exception]] = []
+    texts: List[str] = []
+    owners: List[int] = []
+    for index, messages in enumerate(conversations):
+        try:
+            conversation_texts, fixed = _conversation_texts(encoder, messages, overhead)
+        except (ValueError, TypeError) as err:
+            results.append(err)
+            continue
+        results.append(fixed)
+        texts.extend(conversation_texts)
+        owners.extend([index] * len(conversation_texts))
+    return results, texts, owners
+
+
+def _conversation_texts(
+    encoder: Encoding, messages: Sequence[Message], overhead: Mapping[str, int]
+) -> Tuple[List[str], int]:
+    """
+    Return the texts to encode for a conversation and its fixed overhead.
+    """
+    if isinstance(messages, (str, bytes)) or not isinstance(messages, Sequence):
+        raise TypeError(f"Unsupported conversation type: {type(messages)}")
+    texts: List[str] = []
+    fixed = overhead["reply_priming"]
+    for message in messages:
+        if not isinstance(message, Mapping):
+            raise TypeError(f"Unsupported message type: {type(message)}")
+        fixed += overhead["tokens_per_message"]
+        for key, value in message.items():
+            texts.extend(_value_texts(value))
+            if key == "name":
+                fixed += overhead["tokens_per_name"]
+    for text in texts:
+        check_special_tokens(encoder, text)
+    return texts, fixed
+
+
+def _value_texts(value: Any) -> List[str]:
+    """
+    Return the countable texts of one message value.
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        texts = []
+        for part in value:
+            if not isinstance(part, Mapping):
+                raise TypeError(f"Unsupported content part type: {type(part)}")
+            if part.get("type") != "text":
+                raise ValueError(f"Unsupported content part: {part.get('type')!r}")
+            texts.append(part.get("text", ""))
+        return texts
+    raise TypeError(f"Unsupported message value type: {type(value)}")
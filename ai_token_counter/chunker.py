@@ -0,0 +1,235 @@
+"""
+Module: chunker.py
+
+Purpose:
+    Split a text source into chunks of at most N tokens with M tokens of
+    overlap, for retrieval (RAG) ingestion.
+
+    The source is streamed through `file_utils.iter_source_chunks`, so memory
+    stays bounded by one read block plus one output chunk. Every
+    pre-tokenizer piece is encoded once and chunks are assembled from whole
+    pieces. `tokens` is always the count of the chunk text encoded on its
+    own, which is not simply the sum of its pieces in two cases, so those
+    chunks are encoded again: a chunk ending in whitespace pieces (alone,
+    "!", "   ", " " becomes "!", "    ": the pre-tokenizer splits a run of
+    whitespace by what follows it), and a chunk holding parts of a piece
+    longer than N tokens (e.g. a base64 blob), which is split between
+    tokens at UTF-8 character boundaries. Only such split parts may
+    re-encode to more tokens than they were assigned and push a chunk past
+    `max_tokens`; so can a single rare character that takes several byte
+    tokens when `max_tokens` is below 4, since a character is never split.
+
+Offsets:
+    `start` and `end` are character offsets into the text as `read_source`
+    returns it (newlines translated), so `text == full_text[start:end]`.
+
+Example:
+    >>> for chunk in iter_token_chunks("big.md", 512, 64, model_alias="gpt4o"):
+    ...     store(chunk.text, chunk.tokens, chunk.start)
+"""
+
+from collections import deque
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+from tiktoken import Encoding
+
+from ai_token_counter.file_utils import DEFAULT_CHUNK_SIZE, iter_source_chunks
+from ai_token_counter.tokenizer_factory import (
+    get_tiktoken_encoder,
+    resolve_encoding_name,
+)
+from ai_token_counter.tokenizers.openai import (
+    check_special_tokens,
+    count_with_encoder,
+    encode_piece,
+    get_pretokenizer_pattern,
+)
+
+
+@dataclass(frozen=True)
+class TokenChunk:
+    """
+    One output chunk.
+
+    Attributes:
+        index (int): Position of the chunk in the output, from 0.
+        text (str): Chunk text.
+        tokens (int): Token count of the text encoded on its own.
+        start (int): Character offset of the chunk in the source text.
+        end (int): Character offset just past the chunk.
+    """
+
+    index: int
+    text: str
+    tokens: int
+    start: int
+    end: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the chunk as a JSON-serialisable dictionary."""
+        return asdict(self)
+
+
+# (text, tokens, start offset, whole piece?) of a piece or of a split part of one
+_Unit = Tuple[str, int, int, bool]
+
+
+def iter_token_chunks(
+    source: Union[str, Path, TextIO],
+    max_tokens: int,
+    overlap: int = 0,
+    *,
+    model_alias: Optional[str] = None,
+    encoding_name: Optional[str] = None,
+    config: Optional[Mapping[str, str]] = None,
+    block_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[TokenChunk]:
+    """
+    Stream token-limited chunks of a source.
+
+    Purpose:
+        Encode the source piece by piece and yield consecutive chunks of at
+        most `max_tokens` tokens; each chunk after the first repeats up to
+        `overlap` tokens (whole pieces) from the end of the previous one.
+
+    Args:
+        source (str | Path | TextIO): Path, '-' for stdin, or a text stream.
+        max_tokens (int): Maximum tokens per chunk (at least 1).
+        overlap (int): Tokens repeated between neighbouring chunks
+            (0 <= overlap < max_tokens).
+        model_alias (Optional[str]): Case-insensitive alias for the AI model.
+        encoding_name (Optional[str]): Explicit name of the tiktoken encoding.
+        config (Optional[Mapping[str, str]]): Override mapping for model aliases.
+        block_size (int): Characters read per step.
+
+    Yields:
+        TokenChunk: Chunks in source order.
+
+    Raises:
+        ValueError: If no encoding is given or it is unknown, the limits are
+            invalid, or the text contains a special token.
+        FileNotFoundError, IOError, UnicodeDecodeError, TypeError: As raised
+            by `iter_source_chunks`.
+    """
+    if model_alias is None and encoding_name is None:
+        raise ValueError("One of `model_alias` or `encoding_name` must be specified.")
+    if max_tokens < 1:
+        raise ValueError("`max_tokens` must be at least 1.")
+    if not 0 <= overlap < max_tokens:
+        raise ValueError("`overlap` must be at least 0 and below `max_tokens`.")
+    encoding = resolve_encoding_name(
+        model_alias=model_alias, encoding_name=encoding_name, user_config=config
+    )
+    encoder = get_tiktoken_encoder(encoding)
+
+    window: Deque[_Unit] = deque()
+    window_tokens = 0
+    fresh = 0
+    index = 0
+    for unit in _iter_units(encoder, source, max_tokens, block_size):
+        if fresh and window_tokens + unit[1] > max_tokens:
+            yield _make_chunk(encoder, index, window, window_tokens)
+            index += 1
+            # Хвост предыдущего фрагмента повторяется в следующем
+            while window and window_tokens > overlap:
+                window_tokens -= window.popleft()[1]
+            fresh = 0
+        while window and window_tokens + unit[1] > max_tokens:
+            window_tokens -= window.popleft()[1]
+        window.append(unit)
+        window_tokens += unit[1]
+        fresh += 1
+    if fresh:
+        yield _make_chunk(encoder, index, window, window_tokens)
+
+
+def _iter_units(
+    encoder: Encoding,
+    source: Union[str, Path, TextIO],
+    max_tokens: int,
+    block_size: int,
+) -> Iterator[_Unit]:
+    """
+    Yield (text, tokens, start, whole) for every piece of the source, splitting
+    pieces longer than `max_tokens` tokens.
+    """
+    pattern = get_pretokenizer_pattern(encoder)
+    position = 0
+    for block in iter_source_chunks(source, block_size, boundary_pattern=pattern):
+        check_special_tokens(encoder, block)
+        for match in pattern.finditer(block):
+            piece = match.group()
+            token_ids = encode_piece(encoder, piece)
+            start = position + match.start()
+            if len(token_ids) <= max_tokens:
+                yield (piece, len(token_ids), start, True)
+            else:
+                yield from _split_piece(encoder, token_ids, start)
+        position += len(block)
+
+
+def _split_piece(
+    encoder: Encoding, token_ids: List[int], start: int
+) -> Iterator[_Unit]:
+    """
+    Split an oversized piece between tokens, only at UTF-8 character boundaries.
+    """
+    data = b""
+    count = 0
+    for token in token_ids:
+        data += encoder.decode_single_token_bytes(token)
+        count += 1
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            continue
+        yield (text, count, start, False)
+        start += len(text)
+        data = b""
+        count = 0
+    if data:
+        text = data.decode("utf-8", "replace")
+        yield (text, count, start, False)
+
+
+def _make_chunk(
+    encoder: Encoding, index: int, window: Deque[_Unit], tokens: int
+) -> TokenChunk:
+    """
+    Join the units of `window` into a chunk, counting its text on its own.
+    """
+    first, last = window[0], window[-1]
+    text = "".join(unit[0] for unit in window)
+    if not all(unit[3] for unit in window):
+        # Части разрезанного куска кодируются вместе иначе, чем по отдельности
+        tokens = count_with_encoder(encoder, text, count_only=False)
+    elif last[0].isspace():
+        # Хвостовые пробельные куски без продолжения сливаются в один
+        run = []
+        for unit in reversed(window):
+            if not unit[0].isspace():
+                break
+            run.append(unit)
+        tokens -= sum(unit[1] for unit in run)
+        tail = "".join(unit[0] for unit in reversed(run))
+        tokens += count_with_encoder(encoder, tail, count_only=False)
+    return TokenChunk(
+        index=index,
+        text=text,
+        tokens=tokens,
+        start=first[2],
+        end=last[2] + len(last[0]),
+    )
@@ -7,20 +7,37 @@ Purpose:
 """
 
 import argparse
+from typing import Optional, Sequence
 
 # import sys
 # from argparse import Namespace
 
 
-def parse_arguments() -> argparse.Namespace:
+def parse_arguments(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     """
     Parse CLI arguments for the ai-token-counter tool.
 
+    Args:
+        argv (Optional[Sequence[str]]): Arguments to parse; defaults to sys.argv[1:].
+
     Returns:
         Namespace with attributes:
-            file: path to input file or '-' for stdin
+            file: list of input files, directories, glob patterns or '-' for stdin
             model: model alias to resolve encoding
             encoding: explicit tiktoken encoding name (overrides model)
+            jobs: number of worker processes for multi-file or JSONL counting
+            jsonl: treat inputs as JSONL and count record fields
+            field: JSON pointer or dotted paths of fields to count (JSONL mode)
+            per_record: print one JSON result per record (JSONL mode)
+            cache: path of the persistent count cache, "" for the default
+                location, or None when caching is off
+            daemon: socket of the counting daemon to use, "" for the default
+                socket, or None to count in-process
+            stats: "human" or "json" to print timing statistics to stderr,
+                or None
+            follow: keep counting data appended to the files
+            checkpoint: follow-mode checkpoint file, or None
+            interval: seconds between follow-mode polls
     """
     parser = argparse.ArgumentParser(
         prog="ai-token-counter",
@@ -30,7 +47,12 @@ def parse_arguments() -> argparse.Namespace:
         "-f",
         "--file",
         required=True,
-        help="Path to input text file or '-' to read from stdin.",
+        nargs="+",
+        action="extend",
+        help=(
+            "Path to input text file or '-' to read from stdin. Accepts several "
+            "paths, directories (walked recursively) and glob patterns."
+        ),
     )
     parser.add_argument(
         "-m",
@@ -43,15 +65,509 @@ def parse_arguments() -> argparse.Namespace:
         required=False,
         help="Explicit tiktoken encoding name (overrides model alias mapping).",
     )
-    parsed_args = parser.parse_args()
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help=(
+            "Number of worker processes used when counting several files or "
+            "JSONL record batches (default: 1)."
+        ),
+    )
+    parser.add_argument(
+        "--jsonl",
+        action="store_true",
+        help="Treat inputs as JSONL and count string fields record by record.",
+    )
+    parser.add_argument(
+        "--field",
+        action="append",
+        default=[],
+        help=(
+            "Field to count in JSONL mode, as a JSON pointer (/messages/0/content) "
+            "or dotted path (messages.*.content). Repeatable; default: all strings."
+        ),
+    )
+    parser.add_argument(
+        "--per-record",
+        action="store_true",
+        help="In JSONL mode print one JSON line per record instead of totals.",
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PATH",
+        help=(
+            "Reuse token counts of previously seen content from an on-disk cache "
+            "(default location: $XDG_CACHE_HOME/ai-token-counter/counts.sqlite3)."
+        ),
+    )
+    parser.add_argument(
+        "--daemon",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="SOCKET",
+        help=(
+            "Count on a running `ai-token-counter serve` daemon when one answers "
+            "on SOCKET (default socket if omitted); otherwise count in-process."
+        ),
+    )
+    parser.add_argument(
+        "--stats",
+        nargs="?",
+        const="human",
+        default=None,
+        choices=("human", "json"),
+        help=(
+            "Print per-stage timings, throughput, encoder-cache hits and peak "
+            "memory to stderr, as text (default) or JSON."
+        ),
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help=(
+            "Keep running and count data appended to the files, printing the "
+            "updated count on every change (like tail -f)."
+        ),
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        metavar="PATH",
+        help="With --follow, resume from and keep saving offsets in this JSON file.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        metavar="SECONDS",
+        help="With --follow, seconds between checks for new data (default: 1).",
+    )
+    parsed_args = parser.parse_args(argv)
 
     # Validate that at least one of model or encoding is provided
     if not parsed_args.model and not parsed_args.encoding:
         parser.error("either --model or --encoding must be specified.")
+    if parsed_args.jobs < 1:
+        parser.error("--jobs must be at least 1.")
+    if (parsed_args.field or parsed_args.per_record) and not parsed_args.jsonl:
+        parser.error("--field and --per-record require --jsonl.")
+    if parsed_args.cache is not None and parsed_args.jsonl:
+        parser.error("--cache cannot be combined with --jsonl.")
+    if parsed_args.daemon is not None and (
+        parsed_args.jsonl or parsed_args.cache is not None
+    ):
+        parser.error("--daemon cannot be combined with --jsonl or --cache.")
+    if parsed_args.stats is not None and parsed_args.jsonl:
+        parser.error("--stats cannot be combined with --jsonl.")
+    if parsed_args.follow:
+        if (
+            parsed_args.jsonl
+            or parsed_args.cache is not None
+            or parsed_args.daemon is not None
+            or parsed_args.stats is not None
+        ):
+            parser.error(
+                "--follow cannot be combined with --jsonl, --cache, --daemon or --stats."
+            )
+        if "-" in parsed_args.file:
+            parser.error("--follow needs files, not stdin.")
+        if parsed_args.interval <= 0:
+            parser.error("--interval must be positive.")
+    elif parsed_args.checkpoint is not None:
+        parser.error("--checkpoint requires --follow.")
+
+    return parsed_args
+
+
+def parse_serve_arguments(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    Parse arguments of the `ai-token-counter serve` subcommand.
+
+    Returns:
+        Namespace with attributes:
+            socket: Unix socket path ("" for the default), or None with --no-socket
+            http: localhost HTTP port, or None
+            preload: encodings to load before serving
+    """
+    parser = argparse.ArgumentParser(
+        prog="ai-token-counter serve",
+        description="Run a counting daemon that keeps tokenizer encodings loaded.",
+    )
+    parser.add_argument(
+        "--socket",
+        default="",
+        metavar="PATH",
+        help="Unix socket to listen on (default: $XDG_RUNTIME_DIR/ai-token-counter.sock).",
+    )
+    parser.add_argument(
+        "--no-socket",
+        dest="socket",
+        action="store_const",
+        const=None,
+        help="Do not listen on a Unix socket (HTTP only).",
+    )
+    parser.add_argument(
+        "--http",
+        type=int,
+        default=None,
+        metavar="PORT",
+        help="Also answer POST /count on 127.0.0.1:PORT.",
+    )
+    parser.add_argument(
+        "--preload",
+        nargs="+",
+        default=["cl100k_base", "o200k_base"],
+        metavar="ENCODING",
+        help="Encodings to load at start-up (default: cl100k_base o200k_base).",
+    )
+    parsed_args = parser.parse_args(argv)
+    if parsed_args.socket is None and parsed_args.http is None:
+        parser.error("--no-socket requires --http.")
+    return parsed_args
+
+
+def parse_chunk_arguments(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    Parse arguments of the `ai-token-counter chunk` subcommand.
+
+    Returns:
+        Namespace with attributes:
+            file: input files, directories, glob patterns or '-' for stdin
+            model, encoding: encoding selection, as for the main command
+            max_tokens: maximum tokens per chunk
+            overlap: tokens shared by neighbouring chunks
+            output: JSONL output path, or None for stdout
+    """
+    parser = argparse.ArgumentParser(
+        prog="ai-token-counter chunk",
+        description="Split inputs into token-limited chunks and write them as JSONL.",
+    )
+    parser.add_argument(
+        "-f",
+        "--file",
+        required=True,
+        nargs="+",
+        action="extend",
+        help="Input files, directories, glob patterns or '-' for stdin.",
+    )
+    parser.add_argument("-m", "--model", help="AI model alias (e.g., gpt-4o).")
+    parser.add_argument("--encoding", help="Explicit tiktoken encoding name.")
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        required=True,
+        metavar="N",
+        help="Maximum tokens per chunk.",
+    )
+    parser.add_argument(
+        "--overlap",
+        type=int,
+        default=0,
+        metavar="M",
+        help="Tokens repeated from the end of each chunk in the next (default: 0).",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        metavar="PATH",
+        help="Write JSONL to PATH instead of stdout.",
+    )
+    parsed_args = parser.parse_args(argv)
+    if not parsed_args.model and not parsed_args.encoding:
+        parser.error("either --model or --encoding must be specified.")
+    if parsed_args.max_tokens < 1:
+        parser.error("--max-tokens must be at least 1.")
+    if not 0 <= parsed_args.overlap < parsed_args.max_tokens:
+        parser.error("--overlap must be at least 0 and below --max-tokens.")
+    return parsed_args
+
+
+def parse_corpus_arguments(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    Parse arguments of the `ai-token-counter corpus` subcommand.
+
+    Returns:
+        Namespace with attributes:
+            file: corpus files, directories or glob patterns
+            model, encoding: encoding selection, as for the main command
+            precision, confidence: target relative half-width and level of
+                the confidence interval
+            range_size: bytes per sampled range
+            max_bytes: optional budget of counted bytes
+            seed: optional random seed
+            jobs: reader/counter threads
+            json: print the full estimate as JSON
+    """
+    parser = argparse.ArgumentParser(
+        prog="ai-token-counter corpus",
+        description=(
+            "Estimate the tokens of a large corpus from stratified random "
+            "samples, with a confidence interval."
+        ),
+    )
+    parser.add_argument(
+        "-f",
+        "--file",
+        required=True,
+        nargs="+",
+        action="extend",
+        help="Corpus files, directories or glob patterns.",
+    )
+    parser.add_argument("-m", "--model", help="AI model alias (e.g., gpt-4o).")
+    parser.add_argument("--encoding", help="Explicit tiktoken encoding name.")
+    parser.add_argument(
+        "--precision",
+        type=float,
+        default=0.01,
+        help="Target half-width of the interval, relative (default: 0.01).",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="Confidence level of the interval (default: 0.95).",
+    )
+    parser.add_argument(
+        "--range-size",
+        type=int,
+        default=64 << 10,
+        metavar="BYTES",
+        help="Bytes per sampled range (default: 65536).",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        default=None,
+        metavar="BYTES",
+        help="Stop sampling after counting this many bytes.",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed.")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Threads reading and counting samples (default: min(8, CPUs)).",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print the full estimate as JSON."
+    )
+    parsed_args = parser.parse_args(argv)
+    if not parsed_args.model and not parsed_args.encoding:
+        parser.error("either --model or --encoding must be specified.")
+    if parsed_args.precision <= 0:
+        parser.error("--precision must be positive.")
+    if not 0 < parsed_args.confidence < 1:
+        parser.error("--confidence must be between 0 and 1.")
+    if parsed_args.jobs is not None and parsed_args.jobs < 1:
+        parser.error("--jobs must be at least 1.")
+    return parsed_args
+
+
+def parse_analyze_arguments(
+    argv: Optional[Sequence[str]] = None,
+) -> argparse.Namespace:
+    """
+    Parse arguments of the `ai-token-counter analyze` subcommand.
 
+    Returns:
+        Namespace with attributes:
+            file: files, directories, glob patterns or '-'
+            model, encoding: encoding selection, as for the main command
+            top: number of most frequent tokens reported
+            per_file: also report every file
+            json: print the full analysis as JSON
+    """
+    parser = argparse.ArgumentParser(
+        prog="ai-token-counter analyze",
+        description=(
+            "Report token frequencies, tokens per byte and per-file "
+            "distributions of a corpus (requires NumPy)."
+        ),
+    )
+    parser.add_argument(
+        "-f",
+        "--file",
+        required=True,
+        nargs="+",
+        action="extend",
+        help="Files, directories, glob patterns or '-' for stdin.",
+    )
+    parser.add_argument("-m", "--model", help="AI model alias (e.g., gpt-4o).")
+    parser.add_argument("--encoding", help="Explicit tiktoken encoding name.")
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        help="Number of most frequent tokens reported (default: 20).",
+    )
+    parser.add_argument(
+        "--per-file", action="store_true", help="Also report every file."
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print the full analysis as JSON."
+    )
+    parsed_args = parser.parse_args(argv)
+    if not parsed_args.model and not parsed_args.encoding:
+        parser.error("either --model or --encoding must be specified.")
+    if parsed_args.top < 0:
+        parser.error("--top must not be negative.")
+    return parsed_args
+
+
+def parse_export_arguments(
+    argv: Optional[Sequence[str]] = None,
+) -> argparse.Namespace:
+    """
+    Parse arguments of the `ai-token-counter export` subcommand.
+
+    Returns:
+        Namespace with attributes:
+            file: documents: files, directories, glob patterns or '-'
+            model, encoding: encoding selection, as for the main command
+            output: prefix of the shard and index files
+            shard_tokens: tokens per shard
+            eot: append the end-of-text token to every document
+            jobs: worker processes
+    """
+    parser = argparse.ArgumentParser(
+        prog="ai-token-counter export",
+        description=(
+            "Write token ids as fixed-size uint16/uint32 shards plus a JSON "
+            "index of document offsets."
+        ),
+    )
+    parser.add_argument(
+        "-f",
+        "--file",
+        required=True,
+        nargs="+",
+        action="extend",
+        help="Documents: files, directories, glob patterns or '-' for stdin.",
+    )
+    parser.add_argument("-m", "--model", help="AI model alias (e.g., gpt-4o).")
+    parser.add_argument("--encoding", help="Explicit tiktoken encoding name.")
+    parser.add_argument(
+        "-o",
+        "--output",
+        required=True,
+        metavar="PREFIX",
+        help="Output prefix: PREFIX-00000.bin, ... and PREFIX.index.json.",
+    )
+    parser.add_argument(
+        "--shard-tokens",
+        type=int,
+        default=100_000_000,
+        metavar="N",
+        help="Tokens per shard (default: 100000000).",
+    )
+    parser.add_argument(
+        "--eot",
+        action="store_true",
+        help="Append the end-of-text token to every document.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes encoding files in parallel (default: 1).",
+    )
+    parsed_args = parser.parse_args(argv)
+    if not parsed_args.model and not parsed_args.encoding:
+        parser.error("either --model or --encoding must be specified.")
+    if parsed_args.shard_tokens < 1:
+        parser.error("--shard-tokens must be at least 1.")
+    if parsed_args.jobs < 1:
+        parser.error("--jobs must be at least 1.")
     return parsed_args
 
 
+def parse_calibrate_arguments(
+    argv: Optional[Sequence[str]] = None,
+) -> argparse.Namespace:
+    """
+    Parse arguments of the `ai-token-counter calibrate` subcommand.
+
+    Returns:
+        Namespace with attributes:
+            file: corpus files, directories or glob patterns
+            encodings: encodings whose estimator models are refitted
+            dir: model directory, or None for the default
+    """
+    parser = argparse.ArgumentParser(
+        prog="ai-token-counter calibrate",
+        description="Refit the token estimator models against a local corpus.",
+    )
+    parser.add_argument(
+        "-f",
+        "--file",
+        required=True,
+        nargs="+",
+        action="extend",
+        help="Corpus files, directories or glob patterns.",
+    )
+    parser.add_argument(
+        "--encoding",
+        dest="encodings",
+        required=True,
+        nargs="+",
+        action="extend",
+        metavar="ENCODING",
+        help="Encodings to calibrate (e.g. cl100k_base o200k_base).",
+    )
+    parser.add_argument(
+        "--dir",
+        default=None,
+        help=(
+            "Model directory (default: $AI_TOKEN_COUNTER_ESTIMATOR_DIR or "
+            "$XDG_DATA_HOME/ai-token-counter/estimator)."
+        ),
+    )
+    return parser.parse_args(argv)
+
+
+def parse_vocab_arguments(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    Parse arguments of the `ai-token-counter vocab` subcommand.
+
+    Returns:
+        Namespace with attributes:
+            action: "export" or "list"
+            dir: vocabulary store directory, or None for the default
+            encodings: encodings to export ("export" only)
+    """
+    parser = argparse.ArgumentParser(
+        prog="ai-token-counter vocab",
+        description="Manage the offline vocabulary store used to load encodings.",
+    )
+    actions = parser.add_subparsers(dest="action", required=True)
+    export = actions.add_parser(
+        "export", help="Pack tiktoken encodings into the vocabulary store."
+    )
+    export.add_argument(
+        "encodings", nargs="+", metavar="ENCODING", help="e.g. cl100k_base o200k_base"
+    )
+    listing = actions.add_parser("list", help="List encodings in the vocabulary store.")
+    for sub in (export, listing):
+        sub.add_argument(
+            "--dir",
+            default=None,
+            help=(
+                "Store directory (default: $AI_TOKEN_COUNTER_VOCAB_DIR or "
+                "$XDG_DATA_HOME/ai-token-counter/vocab)."
+            ),
+        )
+    return parser.parse_args(argv)
+
+
 # if __name__ == "__main__":
 #     # Entry point when module is run directly
 #     args = parse_arguments()
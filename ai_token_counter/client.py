@@ -0,0 +1,226 @@
+"""
+Module: client.py
+
+Purpose:
+    Thin client for the counting daemon (`ai-token-counter serve`).
+
+    `count_tokens` asks the daemon listening on the Unix socket and falls
+    back to counting in-process when no daemon answers, so callers get the
+    same result either way. This module imports neither tiktoken nor the
+    counter until a fallback actually happens.
+"""
+
+import io
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
+
+# Seconds to wait for the daemon to accept a connection
+CONNECT_TIMEOUT = 0.5
+
+# Upper bound for one request line or HTTP body (enforced by the daemon)
+MAX_REQUEST_BYTES = 256 << 20
+
+# Exception types re-raised for daemon error responses
+_ERROR_TYPES = {
+    "ValueError": ValueError,
+    "TypeError": TypeError,
+    "FileNotFoundError": FileNotFoundError,
+    "UnicodeDecodeError": UnicodeError,
+    "UnicodeError": UnicodeError,
+}
+
+
+def default_socket_path() -> str:
+    """
+    Return the default daemon socket path.
+
+    $AI_TOKEN_COUNTER_SOCKET if set, else ai-token-counter.sock in
+    $XDG_RUNTIME_DIR, else a per-user file in /tmp.
+    """
+    explicit = os.environ.get("AI_TOKEN_COUNTER_SOCKET")
+    if explicit:
+        return explicit
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "ai-token-counter.sock")
+    return f"/tmp/ai-token-counter-{os.getuid()}.sock"
+
+
+class DaemonUnavailable(ConnectionError):
+    """Raised when no daemon answers on the socket."""
+
+
+class DaemonClient:
+    """
+    Connection to a counting daemon; several requests share one socket.
+
+    Args:
+        socket_path (Optional[str]): Daemon socket; None uses the default path.
+
+    Raises:
+        DaemonUnavailable: If no daemon accepts the connection.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None) -> None:
+        if socket_path is None:
+            socket_path = default_socket_path()
+        if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+            raise DaemonUnavailable(f"No daemon socket at {socket_path}")
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            self._sock.connect(socket_path)
+        except OSError as e:
+            self._sock.close()
+            raise DaemonUnavailable(f"No daemon listening on {socket_path}: {e}") from e
+        # Подсчёт большого текста может идти долго: ждать ответа без таймаута
+        self._sock.settimeout(None)
+        self._reader = self._sock.makefile("rb")
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._reader.close()
+        self._sock.close()
+
+    def request(self, request: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Send one request and return the decoded response.
+
+        Raises:
+            DaemonUnavailable: If the daemon closed the connection.
+        """
+        return self._send(_encode_request(request))
+
+    def _send(self, data: bytes) -> Dict[str, Any]:
+        """
+        Send one encoded request line and return the decoded response.
+        """
+        try:
+            self._sock.sendall(data)
+            line = self._reader.readline()
+        except OSError as e:
+            raise DaemonUnavailable(f"Daemon connection failed: {e}") from e
+        if not line:
+            raise DaemonUnavailable("Daemon closed the connection.")
+        return json.loads(line)
+
+    def count(
+        self,
+        source: Union[str, Path, sys.stdin.__class__],
+        model_alias: Optional[str] = None,
+        encoding_name: Optional[str] = None,
+    ) -> Tuple[int, str]:
+        """
+        Count a source on the daemon.
+
+        Paths are sent as absolute paths and read by the daemon; stdin ('-')
+        and file-like objects are read here and sent as text, or counted
+        here when the request would exceed `MAX_REQUEST_BYTES`.
+
+        Returns:
+            Tuple[int, str]: (token_count, actual_encoding_name)
+
+        Raises:
+            ValueError, TypeError, FileNotFoundError, UnicodeError, IOError:
+                As reported by the daemon for this request.
+            DaemonUnavailable: If the daemon cannot be reached.
+        """
+        request: Dict[str, Any] = {"op": "count"}
+        if model_alias is not None:
+            request["model"] = model_alias
+        if encoding_name is not None:
+            request["encoding"] = encoding_name
+        if _is_path(source):
+            request["path"] = os.path.abspath(source)
+        else:
+            request["text"] = _read_text(source)
+        data = _encode_request(request)
+        if len(data) > MAX_REQUEST_BYTES:
+            # Демон отклонит такой запрос: посчитать текст в этом процессе
+            from ai_token_counter import (  # pylint: disable=import-outside-toplevel
+                counter,
+            )
+
+            return counter.count_tokens(
+                io.StringIO(request["text"]),
+                model_alias=model_alias,
+                encoding_name=encoding_name,
+            )
+        response = self._send(data)
+        if "error" in response:
+            raise _ERROR_TYPES.get(response.get("type"), IOError)(response["error"])
+        return response["tokens"], response["encoding"]
+
+
+def count_tokens(
+    source: Union[str, Path, sys.stdin.__class__],
+    model_alias: Optional[str] = None,
+    encoding_name: Optional[str] = None,
+    socket_path: Optional[str] = None,
+) -> Tuple[int, str]:
+    """
+    Count tokens on the daemon if one is running, otherwise in-process.
+
+    Args:
+        source (str | Path | TextIO): Path to file, '-' for stdin, or file-like object.
+        model_alias (Optional[str]): Case-insensitive alias for the AI model.
+        encoding_name (Optional[str]): Explicit name of the tiktoken encoding.
+        socket_path (Optional[str]): Daemon socket; None uses the default path.
+
+    Returns:
+        Tuple[int, str]: (token_count, actual_encoding_name)
+
+    Raises:
+        Same as `counter.count_tokens`.
+    """
+    if model_alias is None and encoding_name is None:
+        raise ValueError("One of `model_alias` or `encoding_name` must be specified.")
+    if not _is_path(source):
+        # Прочитать stdin заранее, чтобы при отказе демона посчитать тот же текст
+        source = io.StringIO(_read_text(source))
+    try:
+        with DaemonClient(socket_path) as client:
+            return client.count(source, model_alias, encoding_name)
+    except DaemonUnavailable:
+        if isinstance(source, io.StringIO):
+            source.seek(0)
+    # Демона нет: посчитать в этом процессе
+    from ai_token_counter import counter  # pylint: disable=import-outside-toplevel
+
+    return counter.count_tokens(
+        source, model_alias=model_alias, encoding_name=encoding_name
+    )
+
+
+def _encode_request(request: Mapping[str, Any]) -> bytes:
+    """
+    Encode a request as one JSON line.
+    """
+    return json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _is_path(source: Any) -> bool:
+    """
+    Tell whether the daemon can read `source` itself (a path other than '-').
+    """
+    return isinstance(source, (str, Path)) and str(source) != "-"
+
+
+def _read_text(source: Any) -> str:
+    """
+    Read stdin or a file-like object without importing tiktoken.
+    """
+    # pylint: disable=import-outside-toplevel
+    from ai_token_counter.file_utils import read_source
+
+    return read_source(source)
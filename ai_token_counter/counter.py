@@ -5,15 +5,56 @@ Main logic for counting tokens in text sources.
 This module provides the public API function `count_tokens`, which reads
 text from a file path, stdin, or file-like object, resolves the appropriate
 tokenizer encoding, and returns the token count along with the encoding name.
+`count_tokens_batch` does the same for many inputs at once, resolving the
+encoding a single time, and `count_tokens_files` spreads files across a
+process pool. Both `count_tokens` and `count_tokens_files` accept an optional
+persistent `TokenCountCache` (see `cache.py`).
 """
 
-from typing import Optional, Tuple, Union, Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import os
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    Mapping,
+)
 from pathlib import Path
 import sys
+import tempfile
 
-from ai_token_counter.file_utils import read_source
-from ai_token_counter.tokenizer_factory import resolve_encoding_name
-from ai_token_counter.tokenizers.openai import count_tokens_tiktoken
+from ai_token_counter import stats
+from ai_token_counter.cache import TokenCountCache, hash_text
+from ai_token_counter.file_utils import (
+    STREAMING_THRESHOLD,
+    is_large_source,
+    iter_source_chunks,
+    read_source,
+)
+from ai_token_counter.tokenizer_factory import (
+    get_tiktoken_encoder,
+    preload,
+    resolve_encoding_name,
+)
+from ai_token_counter.tokenizers.openai import (
+    COUNT_ONLY_THRESHOLD,
+    check_special_tokens,
+    count_chunks,
+    count_pieces,
+    count_with_encoder,
+    get_pretokenizer_pattern,
+)
+
+# Default number of worker threads used by `count_tokens_batch`
+DEFAULT_NUM_THREADS = 8
+
+# Per-item failures reported by `count_tokens_batch` instead of being raised
+BATCH_ITEM_ERRORS = (ValueError, OSError, UnicodeError, TypeError)
 
 
 def count_tokens(
@@ -21,6 +62,7 @@ def count_tokens(
     model_alias: Optional[str] = None,
     encoding_name: Optional[str] = None,
     config: Optional[Mapping[str, str]] = None,
+    cache: Optional[TokenCountCache] = None,
 ) -> Tuple[int, str]:
     """
     Count tokens in the given text source using the specified model alias or encoding.
@@ -28,12 +70,18 @@ def count_tokens(
     Purpose:
         Read text from `source`, determine the encoding (via explicit `encoding_name`
         or `model_alias`), count tokens, and return the count and the encoding used.
+        Stdin and files of `STREAMING_THRESHOLD` bytes or more are streamed in
+        bounded chunks instead of being loaded whole; the count is identical.
+        With a `cache`, content seen before (under any path) is answered by
+        its hash instead of a BPE pass, and unchanged files (same size and
+        mtime) are not even hashed again.
 
     Args:
         source (str | Path | TextIO): Path to file, '-' for stdin, or file-like object.
         model_alias (Optional[str]): Case-insensitive alias for the AI model.
         encoding_name (Optional[str]): Explicit name of the tiktoken encoding.
         config (Optional[Mapping[str, str]]): Override mapping for model aliases.
+        cache (Optional[TokenCountCache]): Persistent count cache to consult and fill.
 
     Returns:
         Tuple[int, str]: (token_count, actual_encoding_name)
@@ -45,20 +93,368 @@ def count_tokens(
         UnicodeDecodeError: If input is not valid UTF-8.
         TypeError: If `source` is of unsupported type.
     Side effects:
-        None
+        Reads and writes the cache database when `cache` is given; reports
+        per-stage `stats.CountStats` to hooks registered with `stats.add_hook`.
     """
     # Проверка обязательных параметров перед чтением входа
     if model_alias is None and encoding_name is None:
         raise ValueError("One of `model_alias` or `encoding_name` must be specified.")
 
-    # Чтение текста из файла, stdin или файла-объекта
-    text = read_source(source)
+    # Замеры этапов: без зарегистрированных хуков — пустой объект-заглушка
+    rec = stats.recorder(source)
+
+    if cache is not None:
+        with rec.stage("resolve"):
+            encoding = resolve_encoding_name(
+                model_alias=model_alias, encoding_name=encoding_name, user_config=config
+            )
+        token_count = _count_cached(source, encoding, cache, rec)
+    # Большие файлы и stdin читаются потоково, фрагментами с безопасными границами
+    elif is_large_source(source):
+        with rec.stage("resolve"):
+            encoding = resolve_encoding_name(
+                model_alias=model_alias, encoding_name=encoding_name, user_config=config
+            )
+        token_count = _count_stream(source, encoding, rec)
+    else:
+        # Чтение текста из файла, stdin или файла-объекта
+        with rec.stage("read"):
+            text = read_source(source)
+        rec.add_text(text)
+
+        # Определение имени кодировки
+        with rec.stage("resolve"):
+            encoding = resolve_encoding_name(
+                model_alias=model_alias, encoding_name=encoding_name, user_config=config
+            )
+        token_count = _count_text(text, encoding, rec)
+
+    rec.finish(token_count, encoding)
+    return token_count, encoding
+
+
+def _count_text(text: str, encoding: str, rec) -> int:
+    """
+    Count text already in memory, timing the encoder load and the encode.
+    """
+    with rec.stage("load"):
+        encoder = get_tiktoken_encoder(encoding)
+    with rec.stage("encode"):
+        return count_with_encoder(encoder, text)
+
+
+def _count_stream(
+    source: Union[str, Path, sys.stdin.__class__], encoding: str, rec
+) -> int:
+    """
+    Count a source chunk by chunk; reading inside the encode loop counts as "read".
+    """
+    with rec.stage("load"):
+        encoder = get_tiktoken_encoder(encoding)
+    chunks = iter_source_chunks(
+        source, boundary_pattern=get_pretokenizer_pattern(encoder)
+    )
+    with rec.stage("encode"):
+        return count_chunks(encoder, rec.timed_iter(chunks, "read", within="encode"))
+
+
+def _count_cached(
+    source: Union[str, Path, sys.stdin.__class__],
+    encoding: str,
+    cache: TokenCountCache,
+    rec=stats.NULL_RECORDER,
+) -> int:
+    """
+    Count a source through the persistent cache.
+
+    Files are looked up by (path, size, mtime) first, then by content hash;
+    only a miss on both pays for the BPE pass. Stdin and file objects cannot
+    be read twice, so they are spooled (to disk past `STREAMING_THRESHOLD`)
+    while being hashed.
+    """
+    if isinstance(source, (str, Path)) and str(source) != "-":
+        path = os.path.abspath(source)
+        try:
+            info = os.stat(path)
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"File not found: {source}") from e
+        with rec.stage("cache"):
+            digest = cache.lookup_file(path, info.st_size, info.st_mtime_ns)
+        if digest is None:
+            with rec.stage("hash"):
+                chunks = rec.timed_iter(
+                    iter_source_chunks(source), "read", within="hash"
+                )
+                digest = hash_text(chunks)
+            with rec.stage("cache"):
+                cache.remember_file(path, info.st_size, info.st_mtime_ns, digest)
+        with rec.stage("cache"):
+            tokens = cache.get(digest, encoding)
+        if tokens is None:
+            if is_large_source(source):
+                tokens = _count_stream(source, encoding, rec)
+            else:
+                with rec.stage("read"):
+                    text = read_source(source)
+                tokens = _count_text(text, encoding, rec)
+            with rec.stage("cache"):
+                cache.put(digest, encoding, tokens)
+        return tokens
+
+    with tempfile.SpooledTemporaryFile(
+        max_size=STREAMING_THRESHOLD,
+        mode="w+",
+        encoding="utf-8",
+        errors="surrogatepass",
+        newline="",
+    ) as spool:
+        with rec.stage("hash"):
+            chunks = rec.timed_iter(iter_source_chunks(source), "read", within="hash")
+            digest = hash_text(_spool_chunks(chunks, spool))
+        with rec.stage("cache"):
+            tokens = cache.get(digest, encoding)
+        if tokens is None:
+            spool.seek(0)
+            with rec.stage("load"):
+                encoder = get_tiktoken_encoder(encoding)
+            chunks = iter_source_chunks(
+                spool, boundary_pattern=get_pretokenizer_pattern(encoder)
+            )
+            with rec.stage("encode"):
+                tokens = count_chunks(encoder, chunks)
+            with rec.stage("cache"):
+                cache.put(digest, encoding, tokens)
+        return tokens
+
+
+def _spool_chunks(chunks: Iterable[str], spool) -> Iterator[str]:
+    """
+    Pass chunks through while copying them to `spool`.
+    """
+    for chunk in chunks:
+        spool.write(chunk)
+        yield chunk
+
+
+def count_tokens_batch(
+    items: Sequence[Union[str, Path, sys.stdin.__class__]],
+    *,
+    model_alias: Optional[str] = None,
+    encoding_name: Optional[str] = None,
+    config: Optional[Mapping[str, str]] = None,
+    num_threads: int = DEFAULT_NUM_THREADS,
+    sources: bool = False,
+) -> Tuple[List[Union[int, Exception]], str]:
+    """
+    Count tokens in many texts (or sources) with a single encoding lookup.
+
+    Purpose:
+        Resolve the encoding and load the encoder once, then count every item.
+        Ordinary-sized texts are encoded with `Encoding.encode_ordinary_batch`,
+        whose thread pool runs tiktoken's GIL-releasing encoder in parallel;
+        very large texts use the count-only path.
+
+    Args:
+        items (Sequence[str | Path | TextIO]): Texts, or sources when `sources` is True.
+        model_alias (Optional[str]): Case-insensitive alias for the AI model.
+        encoding_name (Optional[str]): Explicit name of the tiktoken encoding.
+        config (Optional[Mapping[str, str]]): Override mapping for model aliases.
+        num_threads (int): Number of worker threads for reading and encoding.
+        sources (bool): Treat items as `read_source` inputs (paths, '-', TextIO)
+            instead of literal texts.
+
+    Returns:
+        Tuple[List[int | Exception], str]: Per-item results in input order and
+        the encoding name. An item that failed holds the raised exception
+        (ValueError, OSError, UnicodeError or TypeError) instead of a count.
+
+    Raises:
+        ValueError: If neither `model_alias` nor `encoding_name` is provided,
+            the alias is unknown or the encoding cannot be loaded.
+    Side effects:
+        Reads the sources when `sources` is True.
+    """
+    if model_alias is None and encoding_name is None:
+        raise ValueError("One of `model_alias` or `encoding_name` must be specified.")
+    if num_threads < 1:
+        raise ValueError("`num_threads` must be at least 1.")
 
-    # Определение имени кодировки
     encoding = resolve_encoding_name(
         model_alias=model_alias, encoding_name=encoding_name, user_config=config
     )
+    encoder = get_tiktoken_encoder(encoding)
 
-    # Подсчёт токенов и возврат результата
-    token_count = count_tokens_tiktoken(text=text, encoding_name=encoding)
-    return token_count, encoding
+    results: List[Union[int, Exception, str]] = list(items)
+    if sources:
+        workers = max(1, min(num_threads, len(results)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_read_batch_item, results))
+
+    # Отбор текстов для пакетного кодирования; ошибки остаются на своих местах
+    small = _prepare_batch_texts(encoder, results)
+    if small:
+        encoded = encoder.encode_ordinary_batch(
+            [results[index] for index in small], num_threads=num_threads
+        )
+        for index, token_ids in zip(small, encoded):
+            results[index] = len(token_ids)
+
+    return results, encoding
+
+
+def _prepare_batch_texts(encoder, results: list) -> List[int]:
+    """
+    Validate batch texts in place and return indices left for batch encoding.
+
+    Invalid items are replaced by their exception and very large texts are
+    counted right away with the count-only path.
+    """
+    small: List[int] = []
+    for index, item in enumerate(results):
+        if isinstance(item, Exception):
+            continue
+        try:
+            if not isinstance(item, str):
+                raise TypeError(f"Unsupported text type: {type(item)}")
+            check_special_tokens(encoder, item)
+        except BATCH_ITEM_ERRORS as err:
+            results[index] = err
+            continue
+        if len(item) >= COUNT_ONLY_THRESHOLD:
+            results[index] = count_pieces(encoder, item)
+        else:
+            small.append(index)
+    return small
+
+
+def _read_batch_item(
+    source: Union[str, Path, sys.stdin.__class__],
+) -> Union[str, Exception]:
+    """
+    Read one batch source, returning the exception instead of raising it.
+    """
+    try:
+        return read_source(source)
+    except BATCH_ITEM_ERRORS as err:
+        return err
+
+
+def count_tokens_files(
+    paths: Sequence[str],
+    *,
+    model_alias: Optional[str] = None,
+    encoding_name: Optional[str] = None,
+    config: Optional[Mapping[str, str]] = None,
+    jobs: int = 1,
+    cache: Optional[TokenCountCache] = None,
+) -> Tuple[List[Union[int, Exception]], str]:
+    """
+    Count tokens in many files, optionally across a pool of worker processes.
+
+    Purpose:
+        Resolve the encoding once, then count each file with `count_tokens`.
+        With `jobs` > 1 files are distributed over a process pool whose
+        workers load the encoder once each at start-up.
+
+    Args:
+        paths (Sequence[str]): File paths; '-' is read from stdin in this process.
+        model_alias (Optional[str]): Case-insensitive alias for the AI model.
+        encoding_name (Optional[str]): Explicit name of the tiktoken encoding.
+        config (Optional[Mapping[str, str]]): Override mapping for model aliases.
+        jobs (int): Number of worker processes (1 counts in-process).
+        cache (Optional[TokenCountCache]): Persistent count cache; worker
+            processes open their own connection to the same database.
+
+    Returns:
+        Tuple[List[int | Exception], str]: Per-file results in input order and
+        the encoding name; a failed file holds its exception instead of a count.
+
+    Raises:
+        ValueError: If no encoding can be resolved or loaded, or `jobs` < 1.
+    Side effects:
+        Reads the files; may start worker processes.
+    """
+    if model_alias is None and encoding_name is None:
+        raise ValueError("One of `model_alias` or `encoding_name` must be specified.")
+    if jobs < 1:
+        raise ValueError("`jobs` must be at least 1.")
+
+    encoding = resolve_encoding_name(
+        model_alias=model_alias, encoding_name=encoding_name, user_config=config
+    )
+    # Загрузить кодировщик заранее: ошибки кодировки видны сразу,
+    # а при fork рабочие процессы наследуют уже загруженный словарь
+    get_tiktoken_encoder(encoding)
+
+    pooled = [index for index, path in enumerate(paths) if path != "-"]
+    results: List[Union[int, Exception]] = [0] * len(paths)
+    for index, path in enumerate(paths):
+        if path == "-":
+            results[index] = _count_file(path, encoding, cache)
+
+    if jobs == 1 or len(pooled) <= 1:
+        for index in pooled:
+            results[index] = _count_file(paths[index], encoding, cache)
+        return results, encoding
+
+    counts = _count_in_pool([paths[index] for index in pooled], encoding, jobs, cache)
+    for index, result in zip(pooled, counts):
+        results[index] = result
+    return results, encoding
+
+
+def _count_in_pool(
+    paths: Sequence[str], encoding: str, jobs: int, cache: Optional[TokenCountCache]
+) -> List[Union[int, Exception]]:
+    """
+    Count files on a process pool whose workers preload the encoder.
+    """
+    workers = min(jobs, len(paths))
+    chunksize = max(1, len(paths) // (workers * 4))
+    # Соединение SQLite не передаётся между процессами: только путь и размер
+    cache_spec = (str(cache.path), cache.max_entries) if cache is not None else None
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=preload, initargs=([encoding],)
+    ) as pool:
+        return list(
+            pool.map(
+                _count_file,
+                paths,
+                [encoding] * len(paths),
+                [cache_spec] * len(paths),
+                chunksize=chunksize,
+            )
+        )
+
+
+def _count_file(
+    path: str,
+    encoding: str,
+    cache: Union[TokenCountCache, Tuple[str, int], None] = None,
+) -> Union[int, Exception]:
+    """
+    Count one file, returning the exception instead of raising it.
+
+    Module-level so that it can be sent to worker processes, which receive
+    the cache as (path, max_entries) and keep one connection per process.
+    """
+    try:
+        if isinstance(cache, tuple):
+            cache = _worker_cache(*cache)
+        return count_tokens(source=path, encoding_name=encoding, cache=cache)[0]
+    except BATCH_ITEM_ERRORS as err:
+        return err
+
+
+# Соединения с кэшем в рабочих процессах, по одному на файл базы
+_WORKER_CACHES: Dict[Tuple[str, int], TokenCountCache] = {}
+
+
+def _worker_cache(path: str, max_entries: int) -> TokenCountCache:
+    """
+    Return this process's connection to the cache database at `path`.
+    """
+    key = (path, max_entries)
+    if key not in _WORKER_CACHES:
+        _WORKER_CACHES[key] = TokenCountCache(path, max_entries=max_entries)
+    return _WORKER_CACHES[key]
@@ -0,0 +1,314 @@
+"""
+Module: export.py
+
+Purpose:
+    Write the token ids of a corpus as binary shards for training, in the
+    same pass that counts them.
+
+    Files are encoded on a process pool (workers preload the encoder, as in
+    `counter.count_tokens_files`) and come back as packed arrays in input
+    order; the parent appends them to fixed-size shards through large
+    buffered writes. At most a few documents per worker are in flight, so
+    memory does not grow with the corpus.
+
+Format:
+    `<prefix>-00000.bin`, `<prefix>-00001.bin`, ...: raw little-endian token
+    ids, `uint16` when the vocabulary fits (r50k/p50k) and `uint32`
+    otherwise; every shard holds exactly `shard_tokens` tokens except the
+    last. Documents run on from one shard into the next, so the shards read
+    as one stream, e.g. with
+    `numpy.memmap(path, dtype="<u2" or "<u4", mode="r")`.
+
+    `<prefix>.index.json`: encoding, dtype, shard sizes and, per document,
+    its source and the offset of its first token in that stream (a document
+    starts in shard `offset // shard_tokens`).
+
+Example:
+    >>> index = export_tokens(["corpus/"], "out/train", model_alias="gpt4o")
+    >>> index.tokens, len(index.shards)
+"""
+
+import json
+import os
+import sys
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Union
+
+from ai_token_counter.file_utils import DEFAULT_CHUNK_SIZE, iter_source_chunks
+from ai_token_counter.tokenizer_factory import (
+    get_tiktoken_encoder,
+    preload,
+    resolve_encoding_name,
+)
+from ai_token_counter.tokenizers.openai import (
+    check_special_tokens,
+    get_pretokenizer_pattern,
+)
+
+# Version of the index file layout
+INDEX_FORMAT_VERSION = 1
+
+# Default tokens per shard
+DEFAULT_SHARD_TOKENS = 100_000_000
+
+# Buffer of each shard file
+WRITE_BUFFER_SIZE = 1 << 22
+
+# array typecodes of the shard dtypes (both are 2 and 4 bytes on every
+# platform Python supports)
+_TYPECODES = {"uint16": "H", "uint32": "I"}
+
+
+@dataclass
+class ExportOptions:
+    """
+    Tuning of `export_tokens`.
+
+    Attributes:
+        shard_tokens (int): Tokens per shard.
+        jobs (int): Worker processes (1 encodes in-process).
+        append_eot (bool): Append the encoding's end-of-text token to every
+            document (the usual separator in training data).
+        block_size (int): Characters encoded per step within a file.
+    """
+
+    shard_tokens: int = DEFAULT_SHARD_TOKENS
+    jobs: int = 1
+    append_eot: bool = False
+    block_size: int = DEFAULT_CHUNK_SIZE
+
+    def validate(self) -> None:
+        """
+        Raises:
+            ValueError: If an option is out of range.
+        """
+        if self.shard_tokens < 1:
+            raise ValueError("`shard_tokens` must be at least 1.")
+        if self.jobs < 1:
+            raise ValueError("`jobs` must be at least 1.")
+        if self.block_size < 1:
+            raise ValueError("`block_size` must be at least 1.")
+
+
+@dataclass
+class ExportIndex:
+    """
+    Contents of the index file written by `export_tokens`.
+
+    Attributes:
+        encoding (str): Encoding name.
+        dtype (str): "uint16" or "uint32" (little-endian).
+        shard_tokens (int): Tokens per shard (the last may hold fewer).
+        tokens (int): Total tokens written.
+        shards (List[Dict[str, Any]]): {"path", "tokens"} per shard; paths
+            are relative to the index file.
+        documents (List[Dict[str, Any]]): {"source", "offset", "tokens"} per
+            document, in input order; `offset` counts tokens from the start
+            of the first shard.
+        eot_token (Optional[int]): Separator appended to every document, if any.
+    """
+
+    encoding: str
+    dtype: str
+    shard_tokens: int
+    tokens: int = 0
+    shards: List[Dict[str, Any]] = field(default_factory=list)
+    documents: List[Dict[str, Any]] = field(default_factory=list)
+    eot_token: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the index as a JSON-ready dictionary."""
+        return {"version": INDEX_FORMAT_VERSION, **asdict(self)}
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "ExportIndex":
+        """
+        Read an index file.
+
+        Raises:
+            ValueError: If the file is not an index of this format version.
+        """
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+        if data.pop("version", None) != INDEX_FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported token index version.")
+        return cls(**data)
+
+
+def shard_dtype(n_vocab: int) -> str:
+    """
+    Return the smallest shard dtype that holds every token id of a vocabulary.
+    """
+    return "uint16" if n_vocab <= 1 << 16 else "uint32"
+
+
+def export_tokens(
+    sources: Sequence[str],
+    prefix: Union[str, Path],
+    model_alias: Optional[str] = None,
+    encoding_name: Optional[str] = None,
+    *,
+    config: Optional[Mapping[str, str]] = None,
+    options: ExportOptions = ExportOptions(),
+) -> ExportIndex:
+    """
+    Encode sources into token shards plus an index.
+
+    Args:
+        sources (Sequence[str]): File paths or '-' for stdin (see
+            `file_utils.expand_sources`); each is one document.
+        prefix (str | Path): Output prefix; its directory is created.
+        model_alias, encoding_name, config: Encoding selection.
+        options (ExportOptions): Shard size, workers, separator.
+
+    Returns:
+        ExportIndex: The index that was written to `<prefix>.index.json`.
+
+    Raises:
+        ValueError: If no encoding is given or it is unknown, an option is
+            out of range, or a document contains a special token.
+        FileNotFoundError, IOError, UnicodeDecodeError: As raised by
+            `iter_source_chunks`; shards written so far are left in place
+            and no index is written.
+
+    Side effects:
+        Writes the shards and the index; may start worker processes.
+    """
+    options.validate()
+    if model_alias is None and encoding_name is None:
+        raise ValueError("One of `model_alias` or `encoding_name` must be specified.")
+    encoding = resolve_encoding_name(
+        model_alias=model_alias, encoding_name=encoding_name, user_config=config
+    )
+    prefix = Path(prefix)
+    encoder = get_tiktoken_encoder(encoding)
+    index = ExportIndex(
+        encoding=encoding,
+        dtype=shard_dtype(encoder.n_vocab),
+        shard_tokens=options.shard_tokens,
+        eot_token=encoder.eot_token if options.append_eot else None,
+    )
+    prefix.parent.mkdir(parents=True, exist_ok=True)
+    with _ShardWriter(prefix, index) as writer:
+        for source, data in _encoded_documents(sources, encoding, index, options):
+            writer.add_document(source, data)
+
+    path = prefix.with_name(f"{prefix.name}.index.json")
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(index.to_dict(), handle)
+    os.replace(tmp_path, path)
+    return index
+
+
+def encode_document(
+    source: str,
+    encoding: str,
+    dtype: str,
+    eot_token: Optional[int] = None,
+    block_size: int = DEFAULT_CHUNK_SIZE,
+) -> bytes:
+    """
+    Encode one source into packed little-endian token ids.
+
+    Module-level so that it can be sent to worker processes.
+    """
+    encoder = get_tiktoken_encoder(encoding)
+    pattern = get_pretokenizer_pattern(encoder)
+    ids = array(_TYPECODES[dtype])
+    for chunk in iter_source_chunks(source, block_size, boundary_pattern=pattern):
+        check_special_tokens(encoder, chunk)
+        ids.extend(encoder.encode_ordinary(chunk))
+    if eot_token is not None:
+        ids.append(eot_token)
+    if sys.byteorder == "big":
+        ids.byteswap()
+    return ids.tobytes()
+
+
+def _encoded_documents(
+    sources: Sequence[str], encoding: str, index: ExportIndex, options: ExportOptions
+) -> Iterator[tuple]:
+    """
+    Yield (source, packed ids) in input order, encoding on a process pool
+    with a bounded number of documents in flight.
+    """
+    args = (encoding, index.dtype, index.eot_token, options.block_size)
+    pooled = [source for source in sources if source != "-"]
+    if options.jobs == 1 or len(pooled) <= 1:
+        for source in sources:
+            yield source, encode_document(source, *args)
+        return
+
+    workers = min(options.jobs, len(pooled))
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=preload, initargs=([encoding],)
+    ) as pool:
+        pending: deque = deque()
+        for source in sources:
+            if source == "-":
+                # stdin читается здесь, в родительском процессе
+                pending.append((source, encode_document(source, *args)))
+            else:
+                pending.append((source, pool.submit(encode_document, source, *args)))
+            while len(pending) > 2 * workers:
+                yield _resolved(pending.popleft())
+        while pending:
+            yield _resolved(pending.popleft())
+
+
+def _resolved(item: tuple) -> tuple:
+    source, data = item
+    return source, data if isinstance(data, bytes) else data.result()
+
+
+class _ShardWriter:
+    """
+    Append packed documents to consecutive shard files, filling the index.
+    """
+
+    def __init__(self, prefix: Path, index: ExportIndex) -> None:
+        self.prefix = prefix
+        self.index = index
+        self.itemsize = array(_TYPECODES[index.dtype]).itemsize
+        self.handle = None
+        self.room = 0
+
+    def __enter__(self) -> "_ShardWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.handle is not None:
+            self.handle.close()
+
+    def add_document(self, source: str, data: bytes) -> None:
+        """
+        Record a document in the index and write its ids across shards.
+        """
+        tokens = len(data) // self.itemsize
+        self.index.documents.append(
+            {"source": source, "offset": self.index.tokens, "tokens": tokens}
+        )
+        self.index.tokens += tokens
+        view = memoryview(data)
+        while view:
+            if not self.room:
+                self._next_shard()
+            size = min(len(view), self.room * self.itemsize)
+            self.handle.write(view[:size])
+            self.room -= size // self.itemsize
+            self.index.shards[-1]["tokens"] += size // self.itemsize
+            view = view[size:]
+
+    def _next_shard(self) -> None:
+        if self.handle is not None:
+            self.handle.close()
+        name = f"{self.prefix.name}-{len(self.index.shards):05d}.bin"
+        # pylint: disable-next=consider-using-with
+        self.handle = open(self.prefix.with_name(name), "wb", WRITE_BUFFER_SIZE)
+        self.index.shards.append({"path": name, "tokens": 0})
+        self.room = self.index.shard_tokens
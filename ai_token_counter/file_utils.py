@@ -3,14 +3,88 @@ Module: file_utils.py
 
 Purpose:
     Provides the `read_source` function to load text from a file path,
-    standard input (`'-'`), or any file-like object.
+    standard input (`'-'`), or any file-like object, and `iter_source_chunks`
+    / `iter_source_lines` to stream the same inputs as bounded-size chunks
+    or lines.
+
+    Files compressed with gzip, bzip2, xz or zstd (detected by their magic
+    bytes, not their name) are decompressed on the fly; zstd needs Python
+    3.14's `compression.zstd` or the optional `zstandard` package.
 
 Provides a unified interface for CLI and API consumers to load input text.
 """
 
+import bz2
+import codecs
+from functools import lru_cache
+import glob
+import gzip
+import io
+import itertools
+import lzma
+import mmap
+import os
+import queue
+import re
+import stat
 import sys
+import threading
+import unicodedata
 from pathlib import Path
-from typing import Union, TextIO
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Union,
+    TextIO,
+)
+
+if TYPE_CHECKING:
+    import regex
+
+# Target size (in characters) of chunks produced by `iter_source_chunks`
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# Files at least this many bytes long are streamed instead of read whole
+STREAMING_THRESHOLD = 8 << 20
+
+# Leading bytes of the compressed formats read transparently. All but bzip2
+# are invalid UTF-8; "BZh" alone is ordinary text, so bzip2 also needs the
+# block size digit and the magic of the first block (or of an empty stream).
+COMPRESSION_MAGIC = (
+    (re.compile(rb"\x1f\x8b"), "gzip"),
+    (re.compile(rb"BZh[1-9](?:1AY&SY|\x17rE8P\x90)"), "bz2"),
+    (re.compile(rb"\xfd7zXZ\x00"), "xz"),
+    (re.compile(rb"\x28\xb5\x2f\xfd"), "zstd"),
+)
+
+# Bytes inspected to recognise a compressed file
+MAGIC_SIZE = 10
+
+# Decoded blocks buffered between the decompressing thread and the consumer
+DECOMPRESS_QUEUE_DEPTH = 4
+
+
+@lru_cache(maxsize=None)
+def safe_split_pattern(reverse: bool = False) -> "regex.Pattern[str]":
+    """
+    Return the pattern of safe split points, compiling it on first use.
+
+    Safe split point: a letter immediately followed by whitespace. No tiktoken
+    pre-tokenizer piece contains this pair, so every encoding has a piece
+    boundary between them and encoding the halves separately is exact; a
+    cut goes after the letter (at `match.end()`).
+
+    Args:
+        reverse (bool): Match backwards, so `search` finds the last point.
+    """
+    # regex импортируется лениво: --help и клиент демона обходятся без него
+    import regex  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+    return regex.compile(("(?r)" if reverse else "") + r"\p{L}(?=\s)")
 
 
 def read_source(source: Union[str, Path, TextIO]) -> str:
@@ -18,8 +92,8 @@ def read_source(source: Union[str, Path, TextIO]) -> str:
     Read text from a file path, standard input indicator, or file-like object.
 
     Args:
-        source (str | Path | TextIO): Path to file, '-' to read from stdin,
-        or an open TextIO object.
+        source (str | Path | TextIO | MappedSource): Path to file, '-' to read
+        from stdin, an open TextIO object or a memory-mapped file.
 
     Returns:
         str: The full text content as a string.
@@ -34,12 +108,19 @@ def read_source(source: Union[str, Path, TextIO]) -> str:
     Assumptions:
         Input files are encoded in UTF-8. TextIO objects provide text mode.
     """
+    # Handle memory-mapped file
+    if isinstance(source, MappedSource):
+        return "".join(source.iter_text())
+
     # Handle file path or stdin indicator
     if isinstance(source, (str, Path)):
         src = str(source)
         if src == "-":
             # Read from standard input
             return sys.stdin.read()
+        # Сжатые файлы распаковываются потоково
+        if detect_compression(src) is not None:
+            return "".join(_iter_file_blocks(src, DEFAULT_CHUNK_SIZE))
         # Read from file system
         path = Path(src)
         try:
@@ -66,3 +147,620 @@ def read_source(source: Union[str, Path, TextIO]) -> str:
 
     # Unsupported source type
     raise TypeError(f"Unsupported source type: {type(source)}")
+
+
+def expand_sources(patterns: Sequence[str]) -> List[str]:
+    """
+    Expand CLI inputs into a flat list of file paths.
+
+    Purpose:
+        Let one invocation cover a whole corpus: directories are walked
+        recursively, glob patterns (including '**') are expanded, plain paths
+        and '-' (stdin) are kept as given.
+
+    Args:
+        patterns (Sequence[str]): Paths, directories, glob patterns or '-'.
+
+    Returns:
+        List[str]: File paths in input order (directory and glob results
+        sorted), without duplicates.
+
+    Raises:
+        FileNotFoundError: If a glob pattern matches no files.
+    Side effects:
+        Reads directory listings.
+    """
+    expanded: List[str] = []
+    for pattern in patterns:
+        if pattern != "-" and glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+            files = [path for match in matches for path in _walk_files(match)]
+            if not files:
+                raise FileNotFoundError(f"No files match pattern: {pattern}")
+            expanded.extend(files)
+        elif pattern != "-" and os.path.isdir(pattern):
+            expanded.extend(_walk_files(pattern))
+        else:
+            expanded.append(pattern)
+    # Удалить повторы, сохранив порядок
+    return list(dict.fromkeys(expanded))
+
+
+def _walk_files(path: str) -> List[str]:
+    """
+    Return `path` itself for a file, or every file below it for a directory.
+    """
+    if not os.path.isdir(path):
+        return [path]
+    files: List[str] = []
+    for root, dirs, names in os.walk(path):
+        dirs.sort()
+        files.extend(os.path.join(root, name) for name in sorted(names))
+    return files
+
+
+class ChunkSplitter:
+    """
+    Incrementally cut a text stream at safe points.
+
+    Purpose:
+        Accumulate fed text and release prefixes that end at a safe split
+        point, so each released chunk can be tokenized on its own with the
+        same result as tokenizing the whole stream.
+
+    Args:
+        chunk_size (int): Minimum number of characters buffered before a cut
+            is attempted.
+        boundary_pattern (Optional[regex.Pattern]): Pre-tokenizer regex used
+            as a fallback when a buffer has no letter/whitespace split point
+            (e.g. minified data or unspaced CJK text). A cut is then made at
+            the start of the last pre-tokenizer piece that follows a
+            non-whitespace piece.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        boundary_pattern: Optional["regex.Pattern[str]"] = None,
+    ) -> None:
+        if chunk_size < 1:
+            raise ValueError("`chunk_size` must be at least 1.")
+        self.chunk_size = chunk_size
+        self.boundary_pattern = boundary_pattern
+        self._pending: list[str] = []
+        self._pending_len = 0
+        # Length of the buffer prefix already known to hold no safe split point
+        self._searched = 0
+
+    @property
+    def pending(self) -> str:
+        """Text received but not released yet."""
+        return "".join(self._pending)
+
+    def feed(self, text: str) -> str:
+        """
+        Add `text` to the buffer and return the releasable prefix (maybe empty).
+        """
+        if text:
+            self._pending.append(text)
+            self._pending_len += len(text)
+        if self._pending_len < self.chunk_size:
+            return ""
+        buffer = "".join(self._pending)
+        cut = self._find_cut(buffer)
+        if cut <= 0:
+            self._pending = [buffer]
+            self._searched = len(buffer)
+            return ""
+        rest = buffer[cut:]
+        self._pending = [rest] if rest else []
+        self._pending_len = len(rest)
+        self._searched = 0
+        return buffer[:cut]
+
+    def flush(self) -> str:
+        """
+        Return and clear everything still buffered (call at end of stream).
+        """
+        buffer = "".join(self._pending)
+        self._pending = []
+        self._pending_len = 0
+        self._searched = 0
+        return buffer
+
+    def _find_cut(self, buffer: str) -> int:
+        """
+        Locate the last safe split point in `buffer` (0 when there is none).
+        """
+        # Only the new tail (plus one character of overlap) needs searching
+        match = safe_split_pattern(reverse=True).search(
+            buffer, max(0, self._searched - 1)
+        )
+        if match is not None:
+            return match.end()
+        if self.boundary_pattern is None:
+            return 0
+        # Start of the last pre-tokenizer piece: every earlier piece is final.
+        # Two kinds of boundary still depend on later text and are skipped:
+        # after a whitespace piece, because `\s+(?!\S)` splits a run by what
+        # follows it ("\r  " + "2" gives "\r", " ", " ", "2" but "\r  " alone
+        # gives "\r", "  "); and before a letter, mark or apostrophe, because
+        # o200k joins such a piece to the preceding letters ("中" + "Aß",
+        # "a" + "'s") once more of it has arrived.
+        last_start = 0
+        previous = None
+        for piece in self.boundary_pattern.finditer(buffer):
+            text = piece.group()
+            if previous is not None and not previous.isspace() and not _joins(text):
+                last_start = piece.start()
+            previous = text
+        return last_start
+
+
+def _joins(piece: str) -> bool:
+    """
+    Tell whether a pre-tokenizer piece may merge with a preceding letter piece.
+    """
+    first = piece[0]
+    return first == "'" or unicodedata.category(first)[0] in "LM"
+
+
+def is_large_source(
+    source: Union[str, Path, TextIO], threshold: int = STREAMING_THRESHOLD
+) -> bool:
+    """
+    Tell whether `source` should be streamed rather than read whole.
+
+    Returns:
+        bool: True for stdin ('-'), `MappedSource` objects, compressed files
+        and existing files of at least `threshold` bytes; False otherwise
+        (including missing files, which are left to `read_source` to report).
+    """
+    if isinstance(source, MappedSource):
+        return True
+    if not isinstance(source, (str, Path)):
+        return False
+    src = str(source)
+    if src == "-":
+        return True
+    try:
+        return (
+            Path(src).stat().st_size >= threshold or detect_compression(src) is not None
+        )
+    except OSError:
+        return False
+
+
+def detect_compression(path: Union[str, Path]) -> Optional[str]:
+    """
+    Identify a compressed file by its magic bytes.
+
+    Returns:
+        Optional[str]: "gzip", "bz2", "xz" or "zstd", or None for other
+        files and for paths that cannot be opened.
+    """
+    try:
+        with open(path, "rb") as handle:
+            return _compression_of(handle.peek(MAGIC_SIZE)[:MAGIC_SIZE])
+    except OSError:
+        return None
+
+
+def _compression_of(head: bytes) -> Optional[str]:
+    """
+    Return the compressed format whose magic bytes start `head`, if any.
+    """
+    for magic, kind in COMPRESSION_MAGIC:
+        if magic.match(head):
+            return kind
+    return None
+
+
+def iter_source_chunks(
+    source: Union[str, Path, TextIO],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    boundary_pattern: Optional["regex.Pattern[str]"] = None,
+) -> Iterator[str]:
+    """
+    Stream text from a source as bounded chunks cut at safe points.
+
+    Args:
+        source (str | Path | TextIO): Path to file, '-' to read from stdin,
+        or an open TextIO object.
+        chunk_size (int): Target chunk size in characters.
+        boundary_pattern (Optional[regex.Pattern]): Pre-tokenizer regex used
+            when a chunk has no letter/whitespace split point.
+
+    Yields:
+        str: Consecutive chunks; joined together they equal `read_source(source)`.
+        Chunks are about `chunk_size` characters, longer only when no safe
+        split point exists inside them.
+
+    Raises:
+        FileNotFoundError: If the file path does not exist.
+        IOError: On other I/O failures reading file or TextIO.
+        UnicodeDecodeError: If the file content cannot be decoded as UTF-8;
+            the message carries the absolute byte offset.
+        TypeError: If the source type is not supported.
+    Side effects:
+        May consume sys.stdin if source is '-'.
+    """
+    splitter = ChunkSplitter(chunk_size, boundary_pattern)
+    for block in _iter_text_blocks(source, chunk_size):
+        chunk = splitter.feed(block)
+        if chunk:
+            yield chunk
+    tail = splitter.flush()
+    if tail:
+        yield tail
+
+
+def iter_source_lines(
+    source: Union[str, Path, TextIO], block_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Stream a source line by line (without the trailing newline).
+
+    Only the newline character separates lines, so characters such as U+2028
+    that may appear raw inside JSON strings never split a record. Memory is bounded by
+    `block_size` plus the longest line.
+
+    Raises:
+        Same as `iter_source_chunks`.
+    """
+    pending: List[str] = []
+    for block in _iter_text_blocks(source, block_size):
+        if "\n" not in block:
+            pending.append(block)
+            continue
+        lines = block.split("\n")
+        pending.append(lines[0])
+        yield "".join(pending)
+        yield from lines[1:-1]
+        pending = [lines[-1]]
+    tail = "".join(pending)
+    if tail:
+        yield tail
+
+
+def _iter_text_blocks(
+    source: Union[str, Path, TextIO], block_size: int
+) -> Iterator[str]:
+    """
+    Yield raw decoded blocks of roughly `block_size` characters from a source.
+    """
+    if isinstance(source, MappedSource):
+        yield from source.iter_text()
+        return
+
+    if isinstance(source, (str, Path)):
+        src = str(source)
+        if src == "-":
+            yield from _iter_text_stream(sys.stdin, block_size)
+            return
+        yield from _iter_file_blocks(src, block_size)
+        return
+
+    if hasattr(source, "read"):
+        yield from _iter_text_stream(source, block_size)
+        return
+
+    raise TypeError(f"Unsupported source type: {type(source)}")
+
+
+def _iter_text_stream(stream: TextIO, block_size: int) -> Iterator[str]:
+    """
+    Yield blocks read from a text stream, wrapping read errors in IOError.
+    """
+    while True:
+        try:
+            block = stream.read(block_size)
+        except Exception as e:
+            raise IOError(f"Error reading from TextIO object: {e}") from e
+        if not block:
+            return
+        yield block
+
+
+def _iter_file_blocks(src: str, block_size: int) -> Iterator[str]:
+    """
+    Yield UTF-8 decoded blocks of a file, reporting decode errors by byte offset.
+
+    Compressed files are decompressed and decoded on a separate thread (see
+    `_iter_threaded`); regular non-empty files are read through a
+    memory-mapped window; other files (pipes, devices) fall back to buffered
+    reads.
+    """
+    try:
+        with open(src, "rb") as handle:
+            kind = _compression_of(handle.peek(MAGIC_SIZE)[:MAGIC_SIZE])
+            if kind is not None:
+                blocks = _iter_decompressed(handle, kind, block_size, src)
+                yield from _iter_threaded(_decode_blocks(blocks, src))
+                return
+            if _is_mappable(handle):
+                with MappedSource(src, window_size=block_size) as mapped:
+                    yield from mapped.iter_text()
+                return
+            yield from _decode_blocks(iter(lambda: handle.read(block_size), b""), src)
+    except FileNotFoundError as e:
+        raise FileNotFoundError(f"File not found: {src}") from e
+    except IOError as e:
+        raise IOError(f"Error reading file '{src}': {e}") from e
+
+
+def _iter_decompressed(handle, kind: str, block_size: int, src: str) -> Iterator[bytes]:
+    """
+    Yield decompressed blocks of at most `block_size` bytes from an open file.
+
+    Raises:
+        IOError: If the data is corrupt or truncated, or zstd support is missing.
+    """
+    try:
+        with _open_decompressor(handle, kind) as stream:
+            while True:
+                data = stream.read(block_size)
+                if not data:
+                    return
+                yield data
+    except OSError:
+        raise
+    # zlib.error, lzma.LZMAError, EOFError (усечённый поток), ошибки zstd
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        raise IOError(f"Corrupt {kind} data in file '{src}': {e}") from e
+
+
+def _open_decompressor(handle, kind: str):
+    """
+    Wrap an open binary file in a reader of its decompressed content.
+    """
+    if kind == "gzip":
+        return gzip.GzipFile(fileobj=handle, mode="rb")
+    if kind == "bz2":
+        return bz2.BZ2File(handle, mode="rb")
+    if kind == "xz":
+        return lzma.LZMAFile(handle, mode="rb")
+    try:
+        from compression import zstd  # pylint: disable=import-outside-toplevel
+
+        return zstd.ZstdFile(handle, mode="rb")
+    except ImportError:
+        pass
+    try:
+        import zstandard  # pylint: disable=import-outside-toplevel
+    except ImportError as e:
+        raise IOError(
+            "zstd input needs Python 3.14 or the zstandard package: "
+            "pip install 'ai-token-counter[zstd]'"
+        ) from e
+    return zstandard.ZstdDecompressor().stream_reader(handle, read_across_frames=True)
+
+
+def _iter_threaded(blocks: Iterator[str]) -> Iterator[str]:
+    """
+    Run a block iterator on a producer thread, yielding its blocks in order.
+
+    At most `DECOMPRESS_QUEUE_DEPTH` blocks wait in the queue, so
+    decompression (which releases the GIL) overlaps with the consumer's
+    tokenization without reading ahead without bound. Exceptions raised by
+    the producer are re-raised here; closing the generator early stops it.
+    """
+    channel: "queue.Queue" = queue.Queue(maxsize=DECOMPRESS_QUEUE_DEPTH)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                channel.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for block in blocks:
+                if not put(block):
+                    return
+        except BaseException as e:  # pylint: disable=broad-exception-caught
+            put(e)
+            return
+        put(done)
+
+    producer = threading.Thread(target=produce, name="decompress", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = channel.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+def _is_mappable(handle) -> bool:
+    """
+    Tell whether an open binary file is a non-empty regular file.
+    """
+    info = os.fstat(handle.fileno())
+    return stat.S_ISREG(info.st_mode) and info.st_size > 0
+
+
+def utf8_error_at(
+    err: UnicodeDecodeError, src: str, position: int
+) -> UnicodeDecodeError:
+    """
+    Return a copy of a UTF-8 decode error naming the file and absolute byte offset.
+    """
+    return UnicodeDecodeError(
+        err.encoding,
+        err.object,
+        err.start,
+        err.end,
+        f"Invalid UTF-8 in file '{src}' at byte offset {position}",
+    )
+
+
+def _decode_blocks(blocks: Iterable[bytes], src: str) -> Iterator[str]:
+    """
+    Incrementally decode UTF-8 byte blocks, reporting errors by absolute byte offset.
+
+    Newlines are translated like `Path.read_text` does, so the streamed text
+    is identical to what `read_source` returns.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    decoder = io.IncrementalNewlineDecoder(utf8, translate=True)
+    offset = 0
+    for data in itertools.chain(blocks, [b""]):
+        final = not data
+        # Байты, оставшиеся в декодере от предыдущего блока
+        carried = len(utf8.getstate()[0])
+        try:
+            text = decoder.decode(data, final=final)
+        except UnicodeDecodeError as e:
+            raise utf8_error_at(e, src, offset - carried + e.start) from e
+        offset += len(data)
+        if text:
+            yield text
+
+
+class MappedSource:
+    """
+    Memory-mapped UTF-8 file read in fixed-size windows.
+
+    Purpose:
+        Expose a large file to the counting pipeline without holding the whole
+        content twice (bytes and decoded str). Each window of the mapping is
+        decoded only when requested, and pages of consumed windows are handed
+        back to the OS, so resident memory stays near the window size.
+
+    Args:
+        path (str | Path): Path to the file.
+        window_size (int): Bytes per window (a window may end up to three bytes
+            shorter or one byte longer to respect character and CRLF boundaries).
+
+    Usage:
+        >>> with MappedSource("big.log") as source:
+        ...     count_tokens(source, encoding_name="cl100k_base")
+    """
+
+    def __init__(
+        self, path: Union[str, Path], window_size: int = DEFAULT_CHUNK_SIZE
+    ) -> None:
+        if window_size < 1:
+            raise ValueError("`window_size` must be at least 1.")
+        self.path = str(path)
+        self.window_size = window_size
+        self._file = None
+        self._map = None
+
+    def __enter__(self) -> "MappedSource":
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def size(self) -> int:
+        """Size of the file in bytes."""
+        return os.path.getsize(self.path)
+
+    def open(self) -> None:
+        """
+        Map the file; called implicitly by `iter_text` and the context manager.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            IOError: If the file cannot be opened or mapped.
+        """
+        if self._file is not None:
+            return
+        try:
+            self._file = open(self.path, "rb")  # pylint: disable=consider-using-with
+            if os.fstat(self._file.fileno()).st_size:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                if hasattr(self._map, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                    self._map.madvise(mmap.MADV_SEQUENTIAL)
+        except FileNotFoundError as e:
+            self.close()
+            raise FileNotFoundError(f"File not found: {self.path}") from e
+        except (OSError, ValueError) as e:
+            self.close()
+            raise IOError(f"Error mapping file '{self.path}': {e}") from e
+
+    def close(self) -> None:
+        """Unmap and close the file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def iter_text(self) -> Iterator[str]:
+        """
+        Yield the decoded text window by window.
+
+        Windows end on UTF-8 character boundaries and never split a CRLF pair, so
+        each one is decoded straight from the mapped buffer with no carry-over.
+        Newlines are translated like `Path.read_text` does.
+
+        Raises:
+            UnicodeDecodeError: If the content is not valid UTF-8; the message
+                carries the absolute byte offset.
+        """
+        self.open()
+        mapped = self._map
+        if mapped is None:
+            return
+        release = hasattr(mapped, "madvise") and hasattr(mmap, "MADV_DONTNEED")
+        start = 0
+        while start < len(mapped):
+            end = self._window_end(start)
+            with memoryview(mapped) as view, view[start:end] as window:
+                try:
+                    text, _ = codecs.utf_8_decode(window, "strict", True)
+                except UnicodeDecodeError as e:
+                    raise utf8_error_at(e, self.path, start + e.start) from e
+            if release:
+                # Страницы прочитанного окна больше не нужны
+                page_start = start - start % mmap.PAGESIZE
+                mapped.madvise(mmap.MADV_DONTNEED, page_start, end - page_start)
+            if "\r" in text:
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+            yield text
+            start = end
+
+    def _window_end(self, start: int) -> int:
+        """
+        End offset of the window starting at `start`, moved back onto a
+        character boundary and past a split CRLF pair.
+        """
+        mapped = self._map
+        size = len(mapped)
+        end = min(start + self.window_size, size)
+        if end == size:
+            return end
+        boundary = end
+        # Отступить с байтов продолжения UTF-8 (не более трёх)
+        while (
+            boundary > start and end - boundary < 3 and mapped[boundary] & 0xC0 == 0x80
+        ):
+            boundary -= 1
+        if boundary > start and mapped[boundary] & 0xC0 != 0x80:
+            end = boundary
+        else:
+            # Окно меньше символа: продлить его до конца символа
+            while end < size and end - boundary < 4 and mapped[end] & 0xC0 == 0x80:
+                end += 1
+        if end == size:
+            return end
+        if mapped[end - 1] == 0x0D and mapped[end] == 0x0A:
+            end += 1
+        return end
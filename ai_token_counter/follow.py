@@ -0,0 +1,315 @@
+"""
+Module: follow.py
+
+Purpose:
+    Count tokens of append-only files as they grow (`--follow`).
+
+    A `FileFollower` remembers the byte offset read so far and the unfinished
+    trailing segment (text after the last safe split point, see
+    `file_utils.ChunkSplitter`). Each `poll` reads only the bytes appended
+    since, releases the completed segments to the count and re-counts just
+    the short unfinished tail. Its state fits in a small JSON checkpoint, so a
+    restarted follower resumes at the saved offset instead of rescanning the
+    file.
+
+    Growth is detected by polling `os.stat` (the standard library has no
+    portable file-change notification). A file that shrinks or is replaced
+    (log rotation) is counted again from its start. While a rotated file is
+    briefly missing (renamed away, not yet recreated), polls report no
+    change and keep the previous count.
+
+Checkpoint file (JSON):
+    {"version": 1, "files": {"/abs/path": {"encoding", "device", "inode",
+     "offset", "pending", "committed"}}}
+"""
+
+import codecs
+import io
+import json
+import os
+from pathlib import Path
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Union
+
+from ai_token_counter.file_utils import ChunkSplitter, utf8_error_at
+from ai_token_counter.tokenizer_factory import (
+    get_tiktoken_encoder,
+    resolve_encoding_name,
+)
+from ai_token_counter.tokenizers.openai import (
+    count_with_encoder,
+    get_pretokenizer_pattern,
+)
+
+CHECKPOINT_VERSION = 1
+
+# Bytes read per step while catching up with a file
+READ_BLOCK_SIZE = 1 << 20
+
+# Segment size of followed files; the unfinished tail is re-counted on every
+# poll, so it is kept much smaller than the streaming chunk size
+FOLLOW_CHUNK_SIZE = 64 << 10
+
+# Default seconds between polls
+DEFAULT_INTERVAL = 1.0
+
+
+class FileFollower:  # pylint: disable=too-many-instance-attributes
+    """
+    Running token count of one append-only file.
+
+    Args:
+        path (str | Path): File to follow.
+        encoding (str): Encoding name (already resolved).
+        state (Optional[Dict[str, Any]]): Checkpoint entry from `state()`; it
+            is ignored when it belongs to another encoding, another file
+            (inode) or a file that has since shrunk.
+        chunk_size (int): Minimum length of a completed segment.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        encoding: str,
+        state: Optional[Dict[str, Any]] = None,
+        chunk_size: int = FOLLOW_CHUNK_SIZE,
+    ) -> None:
+        self.path = os.path.abspath(path)
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self._encoder = get_tiktoken_encoder(encoding)
+        self._seen = False
+        self._reset(None)
+        if state is not None and self._accepts(state):
+            self._identity = (state["device"], state["inode"])
+            self._read_offset = state["offset"]
+            self._committed = state["committed"]
+            self._ingest(state["pending"])
+
+    @property
+    def tokens(self) -> int:
+        """Tokens in the file up to the last poll."""
+        return self._committed + self._pending_tokens
+
+    @property
+    def offset(self) -> int:
+        """Bytes of the file consumed so far."""
+        return self._read_offset
+
+    def poll(self) -> bool:
+        """
+        Count the data appended since the previous poll.
+
+        Returns:
+            bool: True if new data was read (or the file was restarted);
+            False while a file that existed at an earlier poll is missing.
+
+        Raises:
+            FileNotFoundError: If the file has not existed at any poll.
+            UnicodeDecodeError: If appended data is not valid UTF-8; the message
+                carries the absolute byte offset.
+            ValueError: If the appended text contains a special token.
+        """
+        try:
+            info = os.stat(self.path)
+        except FileNotFoundError as e:
+            if self._seen:
+                # Ротация: старый файл переименован, новый ещё не создан
+                return False
+            raise FileNotFoundError(f"File not found: {self.path}") from e
+        self._seen = True
+        identity = (info.st_dev, info.st_ino)
+        restarted = False
+        if identity != self._identity or info.st_size < self._read_offset:
+            # Ротация или усечение: файл считается заново с начала
+            restarted = self._identity is not None
+            self._reset(identity)
+        if info.st_size == self._read_offset:
+            return restarted
+        try:
+            handle = open(self.path, "rb")  # pylint: disable=consider-using-with
+        except FileNotFoundError:
+            # Файл переименован между stat и open: дочитать на следующем опросе
+            return restarted
+        with handle:
+            handle.seek(self._read_offset)
+            while True:
+                data = handle.read(READ_BLOCK_SIZE)
+                if not data:
+                    break
+                self._ingest(self._decode(data))
+        return True
+
+    def state(self) -> Dict[str, Any]:
+        """
+        Return the checkpoint entry of this follower.
+
+        The saved offset excludes bytes still buffered in the decoder (a
+        partial UTF-8 character or a carriage return awaiting its newline),
+        which are read again on resume.
+        """
+        buffered, flag = self._decoder.getstate()
+        device, inode = self._identity or (None, None)
+        return {
+            "encoding": self.encoding,
+            "device": device,
+            "inode": inode,
+            "offset": self._read_offset - len(buffered) - (flag & 1),
+            "pending": self._splitter.pending,
+            "committed": self._committed,
+        }
+
+    def _accepts(self, state: Dict[str, Any]) -> bool:
+        """
+        Tell whether a checkpoint entry still describes the file on disk.
+        """
+        try:
+            info = os.stat(self.path)
+        except OSError:
+            return False
+        return (
+            state.get("encoding") == self.encoding
+            and state.get("device") == info.st_dev
+            and state.get("inode") == info.st_ino
+            and 0 <= state.get("offset", -1) <= info.st_size
+        )
+
+    def _reset(self, identity: Optional[tuple]) -> None:
+        self._identity = identity
+        self._read_offset = 0
+        self._committed = 0
+        self._pending_tokens = 0
+        self._decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder("utf-8")(), translate=True
+        )
+        self._splitter = ChunkSplitter(
+            self.chunk_size, get_pretokenizer_pattern(self._encoder)
+        )
+
+    def _decode(self, data: bytes) -> str:
+        """
+        Decode appended bytes, reporting errors by absolute byte offset.
+        """
+        carried = len(self._decoder.getstate()[0])
+        try:
+            text = self._decoder.decode(data)
+        except UnicodeDecodeError as e:
+            raise utf8_error_at(
+                e, self.path, self._read_offset - carried + e.start
+            ) from e
+        self._read_offset += len(data)
+        return text
+
+    def _ingest(self, text: str) -> None:
+        """
+        Feed decoded text: count released segments, re-count the pending tail.
+        """
+        released = self._splitter.feed(text)
+        if released:
+            self._committed += self._count(released)
+        self._pending_tokens = self._count(self._splitter.pending)
+
+    def _count(self, text: str) -> int:
+        return count_with_encoder(self._encoder, text, count_only=False) if text else 0
+
+
+def load_checkpoint(path: Union[str, Path]) -> Dict[str, Dict[str, Any]]:
+    """
+    Read a checkpoint file; a missing file yields an empty mapping.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Follower states by absolute file path.
+
+    Raises:
+        ValueError: If the file is not a checkpoint of this version.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        raise ValueError(f"Invalid checkpoint file '{path}': {e}") from e
+    if not isinstance(data, dict) or data.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint file: {path}")
+    return data.get("files", {})
+
+
+def save_checkpoint(path: Union[str, Path], followers: Sequence[FileFollower]) -> None:
+    """
+    Write the state of `followers` to `path` atomically (via rename).
+    """
+    path = Path(path)
+    data = {
+        "version": CHECKPOINT_VERSION,
+        "files": {follower.path: follower.state() for follower in followers},
+    }
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(data, handle, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def follow_files(
+    paths: Sequence[Union[str, Path]],
+    model_alias: Optional[str] = None,
+    encoding_name: Optional[str] = None,
+    *,
+    checkpoint: Optional[Union[str, Path]] = None,
+    interval: float = DEFAULT_INTERVAL,
+    on_update: Optional[Callable[[FileFollower], None]] = None,
+    should_stop: Callable[[], bool] = lambda: False,
+) -> Sequence[FileFollower]:
+    """
+    Follow growing files, reporting every change of their token counts.
+
+    Purpose:
+        Poll each file every `interval` seconds, count appended data and call
+        `on_update` for every follower whose file changed (and once for every
+        file on the first poll). With `checkpoint`, follower states are
+        restored at start and saved after every poll that read data.
+
+    Args:
+        paths (Sequence[str | Path]): Files to follow.
+        model_alias (Optional[str]): Model alias used to resolve the encoding.
+        encoding_name (Optional[str]): Explicit encoding name (overrides alias).
+        checkpoint (Optional[str | Path]): Checkpoint file to resume from and
+            keep up to date.
+        interval (float): Seconds between polls.
+        on_update (Optional[Callable[[FileFollower], None]]): Change callback.
+        should_stop (Callable[[], bool]): Checked after every poll; the loop
+            ends when it returns True (otherwise it runs until interrupted).
+
+    Returns:
+        Sequence[FileFollower]: The followers, in input order.
+
+    Raises:
+        ValueError: If no encoding is given or the checkpoint is invalid.
+        FileNotFoundError, UnicodeDecodeError: As raised by `FileFollower.poll`.
+
+    Side effects:
+        Sleeps between polls and rewrites the checkpoint file.
+    """
+    if model_alias is None and encoding_name is None:
+        raise ValueError("One of `model_alias` or `encoding_name` must be specified.")
+    encoding = resolve_encoding_name(
+        model_alias=model_alias, encoding_name=encoding_name
+    )
+    states = load_checkpoint(checkpoint) if checkpoint is not None else {}
+    followers = [
+        FileFollower(path, encoding, states.get(os.path.abspath(path)))
+        for path in paths
+    ]
+    first = True
+    while True:
+        changed = [follower for follower in followers if follower.poll() or first]
+        first = False
+        if changed:
+            if checkpoint is not None:
+                save_checkpoint(checkpoint, followers)
+            if on_update is not None:
+                for follower in changed:
+                    on_update(follower)
+        if should_stop():
+            return followers
+        time.sleep(interval)
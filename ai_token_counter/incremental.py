@@ -0,0 +1,195 @@
+"""
+Module: incremental.py
+
+Purpose:
+    Stateful token counting of a document that is edited in place.
+
+    `IncrementalCounter` keeps the document as segments cut at safe split
+    points (a letter immediately followed by whitespace, see
+    `file_utils.ChunkSplitter`) together with the token count of every
+    segment. No pre-tokenizer piece spans such a point, so the document total
+    is the sum of the segment counts. An edit re-encodes only the segments it
+    touches plus `margin` neighbours on each side (which also lets segments
+    shrunk by deletions merge back with their neighbours); everything else
+    keeps its count.
+
+    Text without any letter/whitespace pair (minified data, unspaced CJK)
+    cannot be cut exactly and stays in one segment, so edits there cost a
+    recount of that stretch.
+
+Example:
+    >>> doc = IncrementalCounter("Hello world", model_alias="gpt4o")
+    >>> doc.edit(5, 0, ", dear")
+    4
+    >>> doc.text
+    'Hello, dear world'
+"""
+
+from bisect import bisect_right
+from itertools import accumulate
+from typing import List, Mapping, Optional
+
+from ai_token_counter.file_utils import safe_split_pattern
+from ai_token_counter.tokenizer_factory import (
+    get_tiktoken_encoder,
+    resolve_encoding_name,
+)
+from ai_token_counter.tokenizers.openai import count_with_encoder
+
+# Minimum length (in characters) of a segment before it is cut at a safe point
+DEFAULT_SEGMENT_SIZE = 2048
+
+# Neighbouring segments re-encoded on each side of an edit
+DEFAULT_MARGIN = 1
+
+
+class IncrementalCounter:  # pylint: disable=too-many-instance-attributes
+    """
+    Token count of a document kept up to date across edits.
+
+    Args:
+        text (str): Initial document text.
+        model_alias (Optional[str]): Model alias used to resolve the encoding.
+        encoding_name (Optional[str]): Explicit encoding name (overrides the alias).
+        user_config (Optional[Mapping[str, str]]): Extra alias mappings.
+        segment_size (int): Minimum segment length in characters.
+        margin (int): Neighbouring segments re-encoded on each side of an edit.
+
+    Raises:
+        ValueError: If neither `model_alias` nor `encoding_name` is given, the
+            encoding cannot be loaded, `segment_size` < 1 or `margin` < 0, or
+            the text contains a special token.
+    """
+
+    def __init__(
+        self,
+        text: str = "",
+        model_alias: Optional[str] = None,
+        encoding_name: Optional[str] = None,
+        *,
+        user_config: Optional[Mapping[str, str]] = None,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        margin: int = DEFAULT_MARGIN,
+    ) -> None:
+        if model_alias is None and encoding_name is None:
+            raise ValueError(
+                "One of `model_alias` or `encoding_name` must be specified."
+            )
+        if segment_size < 1:
+            raise ValueError("`segment_size` must be at least 1.")
+        if margin < 0:
+            raise ValueError("`margin` must not be negative.")
+        self.encoding = resolve_encoding_name(
+            model_alias=model_alias,
+            encoding_name=encoding_name,
+            user_config=user_config,
+        )
+        self.segment_size = segment_size
+        self.margin = margin
+        self._encoder = get_tiktoken_encoder(self.encoding)
+        self._segments: List[str] = []
+        self._counts: List[int] = []
+        self._starts: Optional[List[int]] = None
+        self.total = 0
+        self.set_text(text)
+
+    @property
+    def text(self) -> str:
+        """The current document text."""
+        return "".join(self._segments)
+
+    @property
+    def segment_count(self) -> int:
+        """Number of segments the document is held in."""
+        return len(self._segments)
+
+    def __len__(self) -> int:
+        return self._offsets()[-1]
+
+    def set_text(self, text: str) -> int:
+        """
+        Replace the whole document and count it from scratch.
+
+        Returns:
+            int: The new token total.
+        """
+        segments = self._split(text)
+        counts = [self._count(segment) for segment in segments]
+        self._segments, self._counts = segments, counts
+        self._starts = None
+        self.total = sum(counts)
+        return self.total
+
+    def edit(self, offset: int, deleted: int, inserted: str = "") -> int:
+        """
+        Apply an edit and return the new token total.
+
+        Purpose:
+            Replace `deleted` characters at `offset` by `inserted`, re-encoding
+            only the affected segments plus the context margin.
+
+        Args:
+            offset (int): Character offset of the edit.
+            deleted (int): Number of characters removed at `offset`.
+            inserted (str): Text inserted at `offset`.
+
+        Returns:
+            int: The token total of the edited document, equal to a full recount.
+
+        Raises:
+            ValueError: If the range lies outside the document, or the edited
+                text contains a special token (the document is then unchanged).
+        """
+        starts = self._offsets()
+        if offset < 0 or deleted < 0 or offset + deleted > starts[-1]:
+            raise ValueError(
+                f"Edit range {offset}+{deleted} outside document of length {starts[-1]}."
+            )
+        last_index = len(self._segments) - 1
+        # Границы сегментов, соседние с правкой, могут исчезнуть: берём и их
+        first = max(0, bisect_right(starts, offset - 1) - 1 - self.margin)
+        last = min(last_index, bisect_right(starts, offset + deleted) - 1 + self.margin)
+        span_start = starts[first]
+        old = "".join(self._segments[first : last + 1])
+        local = offset - span_start
+        new = old[:local] + inserted + old[local + deleted :]
+
+        segments = self._split(new)
+        counts = [self._count(segment) for segment in segments]
+        self.total += sum(counts) - sum(self._counts[first : last + 1])
+        self._segments[first : last + 1] = segments
+        self._counts[first : last + 1] = counts
+        self._starts = None
+        return self.total
+
+    def _offsets(self) -> List[int]:
+        """
+        Return segment start offsets plus the document length (rebuilt lazily).
+        """
+        if self._starts is None:
+            self._starts = list(
+                accumulate((len(segment) for segment in self._segments), initial=0)
+            )
+        return self._starts
+
+    def _split(self, text: str) -> List[str]:
+        """
+        Cut `text` at the first safe point after every `segment_size` characters.
+        """
+        segments = []
+        start = 0
+        while len(text) - start > self.segment_size:
+            match = safe_split_pattern().search(text, start + self.segment_size - 1)
+            if match is None:
+                break
+            segments.append(text[start : match.end()])
+            start = match.end()
+        if start < len(text):
+            segments.append(text[start:])
+        return segments
+
+    def _count(self, segment: str) -> int:
+        """
+        Count one segment (rejecting special tokens like `Encoding.encode`).
+        """
+        return count_with_encoder(self._encoder, segment, count_only=False)
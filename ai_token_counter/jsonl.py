@@ -0,0 +1,300 @@
+"""
+Module: jsonl.py
+
+Purpose:
+    Count tokens in JSONL request logs record by record.
+
+    Records are streamed line by line, so memory stays bounded by a few
+    batches of lines. Only the chosen fields are counted (JSON syntax, keys
+    and non-string values are ignored). With `jobs` > 1, batches of records
+    are decoded and encoded on a process pool whose workers preload the
+    encoder (as in `counter.count_tokens_files`), so JSON decoding runs in
+    parallel as well; results are produced in input order.
+
+Field paths:
+    JSON pointer ("/messages/0/content") or dotted form ("messages.0.content").
+    A "*" segment matches every element of a list or value of an object. When
+    a path resolves to a list or object, all string leaves below it count.
+    A string selected by several paths (e.g. "messages" and
+    "messages.0.content") counts toward each of those fields, but only once
+    toward the record total.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import json
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+import sys
+
+from ai_token_counter.file_utils import iter_source_lines
+from ai_token_counter.tokenizer_factory import (
+    get_tiktoken_encoder,
+    preload,
+    resolve_encoding_name,
+)
+from ai_token_counter.tokenizers.openai import count_with_encoder
+
+# Number of lines decoded and counted together by one worker
+DEFAULT_BATCH_SIZE = 256
+
+FieldPath = Tuple[str, ...]
+
+# Location of a string leaf inside a record: the keys and indices leading to it
+_Location = Tuple[Union[str, int], ...]
+
+
+@dataclass(frozen=True)
+class RecordCount:
+    """
+    Token count of one JSONL record.
+
+    Attributes:
+        line (int): 1-based line number in the source.
+        tokens (int): Tokens over all selected fields.
+        fields (Dict[str, int]): Tokens per field path, keyed as given.
+        error (Optional[str]): Why the record could not be counted, if it failed.
+    """
+
+    line: int
+    tokens: int = 0
+    fields: Dict[str, int] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+@dataclass
+class JsonlTotals:
+    """
+    Aggregated counts over a JSONL stream.
+
+    Attributes:
+        records (int): Records counted successfully.
+        failed (int): Records that could not be parsed or counted.
+        tokens (int): Tokens over all counted records.
+        fields (Dict[str, int]): Tokens per field path.
+    """
+
+    records: int = 0
+    failed: int = 0
+    tokens: int = 0
+    fields: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, result: RecordCount) -> None:
+        """Fold one record result into the totals."""
+        if result.error is not None:
+            self.failed += 1
+            return
+        self.records += 1
+        self.tokens += result.tokens
+        for name, count in result.fields.items():
+            self.fields[name] = self.fields.get(name, 0) + count
+
+
+def parse_field_path(path: str) -> FieldPath:
+    """
+    Split a JSON pointer or dotted path into segments.
+
+    Args:
+        path (str): "/a/b/0" (JSON pointer, with ~0/~1 escapes) or "a.b.0".
+
+    Returns:
+        Tuple[str, ...]: Path segments; an empty tuple selects the whole record.
+    """
+    if path.startswith("/"):
+        return tuple(
+            segment.replace("~1", "/").replace("~0", "~")
+            for segment in path[1:].split("/")
+        )
+    if not path:
+        return ()
+    return tuple(path.split("."))
+
+
+def extract_texts(value: Any, path: FieldPath) -> List[str]:
+    """
+    Collect the string leaves selected by `path` inside a decoded record.
+
+    Missing keys, out-of-range indices and non-string scalars select nothing.
+    """
+    return list(_select_leaves(value, path).values())
+
+
+def _select_leaves(
+    value: Any, path: FieldPath, location: _Location = ()
+) -> Dict[_Location, str]:
+    """
+    Map the location of every string leaf selected by `path` to its text.
+    """
+    if not path:
+        return _string_leaves(value, location)
+    head, rest = path[0], path[1:]
+    if head == "*" and isinstance(value, dict):
+        items: list = list(value.items())
+    elif head == "*" and isinstance(value, list):
+        items = list(enumerate(value))
+    elif isinstance(value, dict) and head in value:
+        items = [(head, value[head])]
+    elif isinstance(value, list) and head.isdigit() and int(head) < len(value):
+        items = [(int(head), value[int(head)])]
+    else:
+        items = []
+    leaves: Dict[_Location, str] = {}
+    for key, item in items:
+        leaves.update(_select_leaves(item, rest, location + (key,)))
+    return leaves
+
+
+def _string_leaves(value: Any, location: _Location) -> Dict[_Location, str]:
+    """
+    Map the location of every string value below `value` (object keys
+    excluded) to its text.
+    """
+    if isinstance(value, str):
+        return {location: value}
+    if isinstance(value, dict):
+        items: Iterable = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return {}
+    leaves: Dict[_Location, str] = {}
+    for key, item in items:
+        leaves.update(_string_leaves(item, location + (key,)))
+    return leaves
+
+
+def count_jsonl_tokens(
+    source: Union[str, Path, sys.stdin.__class__],
+    fields: Sequence[str] = (),
+    *,
+    model_alias: Optional[str] = None,
+    encoding_name: Optional[str] = None,
+    config: Optional[Mapping[str, str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    jobs: int = 1,
+) -> Iterator[RecordCount]:
+    """
+    Stream per-record token counts of a JSONL source.
+
+    Purpose:
+        Read `source` line by line, decode each record and count the tokens
+        of the selected fields. Blank lines are skipped; malformed records are
+        reported through `RecordCount.error` without stopping the stream.
+
+    Args:
+        source (str | Path | TextIO): Path to file, '-' for stdin, or file-like object.
+        fields (Sequence[str]): Field paths to count; empty counts every string value.
+        model_alias (Optional[str]): Case-insensitive alias for the AI model.
+        encoding_name (Optional[str]): Explicit name of the tiktoken encoding.
+        config (Optional[Mapping[str, str]]): Override mapping for model aliases.
+        batch_size (int): Lines per batch handed to a worker.
+        jobs (int): Worker processes (1 counts in-process); at most two
+            batches per worker are in flight.
+
+    Yields:
+        RecordCount: One result per non-blank line, in input order.
+
+    Raises:
+        ValueError: If no encoding can be resolved or loaded, or
+            `batch_size` or `jobs` is below 1.
+        FileNotFoundError, IOError, UnicodeDecodeError: On source read failures.
+    Side effects:
+        May start worker processes.
+    """
+    if model_alias is None and encoding_name is None:
+        raise ValueError("One of `model_alias` or `encoding_name` must be specified.")
+    if batch_size < 1 or jobs < 1:
+        raise ValueError("`batch_size` and `jobs` must be at least 1.")
+
+    encoding = resolve_encoding_name(
+        model_alias=model_alias, encoding_name=encoding_name, user_config=config
+    )
+    # Загрузить кодировщик заранее: ошибки кодировки видны до чтения входа
+    get_tiktoken_encoder(encoding)
+    paths = [(name, parse_field_path(name)) for name in fields]
+    batches = _iter_batches(iter_source_lines(source), batch_size)
+
+    if jobs == 1:
+        for batch in batches:
+            yield from _count_batch(encoding, paths, batch)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=preload, initargs=([encoding],)
+    ) as pool:
+        in_flight: deque = deque()
+        for batch in batches:
+            in_flight.append(pool.submit(_count_batch, encoding, paths, batch))
+            # Ограничить число пакетов в работе, чтобы память оставалась ограниченной
+            if len(in_flight) >= 2 * jobs:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def _iter_batches(
+    lines: Iterable[str], batch_size: int
+) -> Iterator[List[Tuple[int, str]]]:
+    """
+    Group non-blank lines into numbered batches.
+    """
+    batch: List[Tuple[int, str]] = []
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        batch.append((number, line))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _count_batch(
+    encoding: str,
+    paths: Sequence[Tuple[str, FieldPath]],
+    batch: Sequence[Tuple[int, str]],
+) -> List[RecordCount]:
+    """
+    Decode and count one batch of numbered lines.
+
+    Module-level so that it can be sent to worker processes.
+    """
+    encoder = get_tiktoken_encoder(encoding)
+    results = []
+    for number, line in batch:
+        try:
+            record = json.loads(line)
+            selected = {name: _select_leaves(record, path) for name, path in paths}
+            leaves: Dict[_Location, str] = {}
+            for found in selected.values() if paths else [_string_leaves(record, ())]:
+                leaves.update(found)
+            # Строка, выбранная несколькими путями, кодируется и входит в итог один раз
+            tokens = {
+                location: count_with_encoder(encoder, text, count_only=False)
+                for location, text in leaves.items()
+            }
+            counts = {
+                name: sum(tokens[location] for location in found)
+                for name, found in selected.items()
+            }
+        except ValueError as err:
+            # json.JSONDecodeError и запрещённые спецтокены — ошибки записи
+            results.append(RecordCount(line=number, error=str(err)))
+            continue
+        results.append(
+            RecordCount(line=number, tokens=sum(tokens.values()), fields=counts)
+        )
+    return results
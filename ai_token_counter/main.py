@@ -5,12 +5,35 @@ Purpose:
     Package entry point for ai_token_counter, enabling `python -m ai_token_counter` execution.
 
 Delegates argument parsing and token counting to cli and counter modules.
+
+Only the argument parser is imported up front. tiktoken, regex, sqlite3 and
+the counting modules are imported by the code path that needs them, so
+`--help`, usage errors and daemon-client runs start fast
+(see tests/test_import_time.py).
 """
 
+# pylint: disable=import-outside-toplevel
+
+import contextlib
+import json
+import os
+import signal
 import sys
+import time
+
+from ai_token_counter.cli import (
+    parse_analyze_arguments,
+    parse_arguments,
+    parse_calibrate_arguments,
+    parse_chunk_arguments,
+    parse_corpus_arguments,
+    parse_export_arguments,
+    parse_serve_arguments,
+    parse_vocab_arguments,
+)
 
-from ai_token_counter.cli import parse_arguments
-from ai_token_counter.counter import count_tokens
+# Failures reported as "Error: ..." with a non-zero exit code
+EXPECTED_ERRORS = (ValueError, FileNotFoundError, UnicodeError, IOError, TypeError)
 
 
 def main() -> None:
@@ -19,7 +42,20 @@ def main() -> None:
 
     Purpose:
         Parse command-line arguments, delegate to the core `count_tokens` API,
-        and output the token count or an error message.
+        and output the token count or an error message. Several inputs
+        (paths, directories, globs) are counted with `count_tokens_files` and
+        reported per file plus a grand total. With `--jsonl` inputs are
+        counted record by record; with `--cache` counts go through the
+        persistent count cache and with `--daemon` through a running counting
+        daemon. `--stats` prints timing statistics to stderr and `--follow`
+        keeps counting data appended to the files.
+        `ai-token-counter serve ...` starts that daemon and
+        `ai-token-counter vocab ...` manages the offline vocabulary store and
+        `ai-token-counter chunk ...` writes token-limited chunks as JSONL,
+        `ai-token-counter calibrate ...` refits the token estimator and
+        `ai-token-counter corpus ...` estimates a corpus from samples,
+        `ai-token-counter analyze ...` reports token frequencies and
+        `ai-token-counter export ...` writes token-id shards.
 
     Args:
         None
@@ -34,18 +70,42 @@ def main() -> None:
         Prints to stdout or stderr and exits the process.
 
     Assumptions:
-        `parse_arguments()` returns valid attributes: file, model, encoding.
+        `parse_arguments()` returns valid attributes: file, model, encoding, jobs.
         `count_tokens()` may raise ValueError, FileNotFoundError,
         UnicodeError, IOError, TypeError.
     """
+    if sys.argv[1:2] == ["serve"]:
+        sys.exit(_serve(sys.argv[2:]))
+    if sys.argv[1:2] == ["vocab"]:
+        sys.exit(_vocab(sys.argv[2:]))
+    if sys.argv[1:2] == ["chunk"]:
+        sys.exit(_chunk(sys.argv[2:]))
+    if sys.argv[1:2] == ["calibrate"]:
+        sys.exit(_calibrate(sys.argv[2:]))
+    if sys.argv[1:2] == ["corpus"]:
+        sys.exit(_corpus(sys.argv[2:]))
+    if sys.argv[1:2] == ["analyze"]:
+        sys.exit(_analyze(sys.argv[2:]))
+    if sys.argv[1:2] == ["export"]:
+        sys.exit(_export(sys.argv[2:]))
     args = parse_arguments()
+    from ai_token_counter.file_utils import expand_sources
+
     try:
-        count, _ = count_tokens(
-            source=args.file,
-            model_alias=args.model,
-            encoding_name=args.encoding,
-        )
-    except (ValueError, FileNotFoundError, UnicodeError, IOError, TypeError) as err:
+        sources = expand_sources(args.file)
+        if args.jsonl:
+            sys.exit(_count_jsonl(sources, args))
+        if args.follow:
+            sys.exit(_follow(sources, args))
+        many = sources != args.file or len(sources) > 1
+        with _open_cache(args) as cache, _stats_report(
+            args, "total" if many else sources[0]
+        ) as summary:
+            if many:
+                sys.exit(_count_many(sources, args, cache, summary))
+            count = _count_one(sources[0], args, cache)
+            _fill_summary(summary, sources, count)
+    except EXPECTED_ERRORS as err:
         # Handle only expected failures with a clean exit code
         print(f"Error: {err}", file=sys.stderr)
         sys.exit(1)
@@ -54,5 +114,480 @@ def main() -> None:
     print(count)
 
 
+def _count_one(source: str, args, cache) -> int:
+    """
+    Count one source on the daemon (with fallback) or in-process.
+    """
+    if args.daemon is not None:
+        from ai_token_counter import client
+
+        return client.count_tokens(
+            source,
+            model_alias=args.model,
+            encoding_name=args.encoding,
+            socket_path=args.daemon or None,
+        )[0]
+    from ai_token_counter.counter import count_tokens
+
+    return count_tokens(
+        source=source,
+        model_alias=args.model,
+        encoding_name=args.encoding,
+        cache=cache,
+    )[0]
+
+
+def _serve(argv: list) -> int:
+    """
+    Run the counting daemon until interrupted.
+
+    Returns:
+        int: Exit code.
+    """
+    args = parse_serve_arguments(argv)
+    from ai_token_counter import client
+    from ai_token_counter.server import CountingDaemon
+
+    socket_path = client.default_socket_path() if args.socket == "" else args.socket
+    try:
+        daemon = CountingDaemon(socket_path, args.http, args.preload)
+    except EXPECTED_ERRORS as err:
+        print(f"Error: {err}", file=sys.stderr)
+        return 1
+    if socket_path is not None:
+        print(f"Listening on {socket_path}", file=sys.stderr)
+    if daemon.http_address is not None:
+        host, port = daemon.http_address[:2]
+        print(f"Listening on http://{host}:{port}", file=sys.stderr)
+    # SIGTERM завершает демона так же чисто, как Ctrl+C
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _vocab(argv: list) -> int:
+    """
+    Export encodings to, or list, the offline vocabulary store.
+
+    Returns:
+        int: Exit code.
+    """
+    args = parse_vocab_arguments(argv)
+    from ai_token_counter import vocab_store
+
+    if args.action == "list":
+        for name in vocab_store.list_vocab(args.dir):
+            print(name)
+        return 0
+    try:
+        for path in vocab_store.export_vocab(args.encodings, args.dir):
+            print(path)
+    except EXPECTED_ERRORS as err:
+        print(f"Error: {err}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _chunk(argv: list) -> int:
+    """
+    Write token-limited chunks of the inputs as JSONL records.
+
+    Returns:
+        int: Exit code, 1 if any input failed.
+    """
+    args = parse_chunk_arguments(argv)
+    from ai_token_counter.file_utils import expand_sources
+
+    try:
+        sources = expand_sources(args.file)
+        with _open_output(args.output) as out:
+            return _write_chunks(sources, args, out)
+    except EXPECTED_ERRORS as err:
+        print(f"Error: {err}", file=sys.stderr)
+        return 1
+
+
+def _calibrate(argv: list) -> int:
+    """
+    Refit the estimator models of the given encodings on a corpus; files
+    that cannot be read as UTF-8 text are skipped with a note on stderr.
+
+    Returns:
+        int: Exit code.
+    """
+    args = parse_calibrate_arguments(argv)
+    from ai_token_counter.file_utils import expand_sources, read_source
+    from ai_token_counter.tokenizers.estimator import calibrate
+
+    try:
+        texts = []
+        for source in expand_sources(args.file):
+            try:
+                texts.append(read_source(source))
+            except (UnicodeError, IOError) as err:
+                # Двоичные и нечитаемые файлы корпуса пропускаются
+                print(f"Skipped: {source}: {err}", file=sys.stderr)
+        results = calibrate(args.encodings, texts, args.dir)
+    except EXPECTED_ERRORS as err:
+        print(f"Error: {err}", file=sys.stderr)
+        return 1
+    for model, path, errors in results:
+        print(
+            f"{model.encoding}: {model.samples} samples, "
+            f"mean error {errors['mean']:.1%}, p95 {errors['p95']:.1%}, "
+            f"max {errors['max']:.1%}, upper bound x{model.upper_ratio:.3f}"
+            f" + {model.upper_margin:g} -> {path}"
+        )
+    return 0
+
+
+def _corpus(argv: list) -> int:
+    """
+    Estimate the tokens of a corpus by sampling, reporting each round on stderr.
+
+    Returns:
+        int: Exit code.
+    """
+    args = parse_corpus_arguments(argv)
+    from ai_token_counter.file_utils import expand_sources
+    from ai_token_counter import sampling
+
+    options = sampling.SamplingOptions(
+        precision=args.precision,
+        confidence=args.confidence,
+        range_size=args.range_size,
+        max_bytes=args.max_bytes,
+        seed=args.seed,
+        threads=args.jobs or sampling.DEFAULT_THREADS,
+    )
+
+    def progress(estimate) -> None:
+        print(
+            f"round {estimate.rounds}: {estimate.tokens} tokens "
+            f"+-{estimate.relative_error:.2%} "
+            f"({estimate.sampled_bytes} of {estimate.bytes} bytes counted)",
+            file=sys.stderr,
+        )
+
+    try:
+        result = sampling.estimate_corpus(
+            expand_sources(args.file),
+            args.model,
+            args.encoding,
+            options=options,
+            on_round=progress,
+        )
+    except EXPECTED_ERRORS as err:
+        print(f"Error: {err}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(result.to_dict()))
+    else:
+        print(
+            f"{result.tokens} tokens ({result.confidence:.0%} interval "
+            f"{result.low}-{result.high}, +-{result.relative_error:.2%}; "
+            f"{result.encoding})"
+        )
+    return 0
+
+
+def _analyze(argv: list) -> int:
+    """
+    Print token frequencies and tokens per byte of a corpus.
+
+    Returns:
+        int: Exit code.
+    """
+    args = parse_analyze_arguments(argv)
+    from ai_token_counter.file_utils import expand_sources
+    from ai_token_counter.analysis import analyze_sources
+
+    try:
+        result = analyze_sources(
+            expand_sources(args.file), args.model, args.encoding, top=args.top
+        )
+    except (ImportError, *EXPECTED_ERRORS) as err:
+        print(f"Error: {err}", file=sys.stderr)
+        return 1
+    if args.json:
+        data = result.to_dict()
+        if not args.per_file:
+            del data["files"]
+        print(json.dumps(data, ensure_ascii=False))
+        return 0
+    print(
+        f"{result.tokens} tokens, {result.bytes} bytes, "
+        f"{result.tokens_per_byte:.4f} tokens/byte, "
+        f"{result.distinct} distinct ({result.encoding})"
+    )
+    for stat in result.top:
+        # json.dumps показывает пробелы и переводы строк в токене
+        text = json.dumps(stat.text, ensure_ascii=False)
+        print(f"{stat.count:>12} {stat.share:>8.2%} {stat.token:>8} {text}")
+    if args.per_file:
+        for stats in result.files:
+            print(
+                f"{stats.source}: {stats.tokens} tokens, "
+                f"{stats.tokens_per_byte:.4f} tokens/byte, {stats.distinct} distinct"
+            )
+    return 0
+
+
+def _export(argv: list) -> int:
+    """
+    Write token-id shards and their index, then print a summary.
+
+    Returns:
+        int: Exit code.
+    """
+    args = parse_export_arguments(argv)
+    from ai_token_counter.file_utils import expand_sources
+    from ai_token_counter import export
+
+    options = export.ExportOptions(
+        shard_tokens=args.shard_tokens, jobs=args.jobs, append_eot=args.eot
+    )
+    try:
+        index = export.export_tokens(
+            expand_sources(args.file),
+            args.output,
+            args.model,
+            args.encoding,
+            options=options,
+        )
+    except EXPECTED_ERRORS as err:
+        print(f"Error: {err}", file=sys.stderr)
+        return 1
+    print(
+        f"{index.tokens} tokens from {len(index.documents)} documents in "
+        f"{len(index.shards)} {index.dtype} shards ({index.encoding}); "
+        f"index: {args.output}.index.json"
+    )
+    return 0
+
+
+def _write_chunks(sources: list, args, out) -> int:
+    """
+    Write the chunks of every source to `out`; per-source failures are reported.
+
+    Returns:
+        int: Exit code, 1 if any input failed.
+    """
+    from ai_token_counter.chunker import iter_token_chunks
+
+    failed = False
+    for source in sources:
+        try:
+            for chunk in iter_token_chunks(
+                source,
+                args.max_tokens,
+                args.overlap,
+                model_alias=args.model,
+                encoding_name=args.encoding,
+            ):
+                record = {"source": source, **chunk.to_dict()}
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except EXPECTED_ERRORS as err:
+            failed = True
+            print(f"Error: {source}: {err}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def _open_output(path) -> contextlib.AbstractContextManager:
+    """
+    Open the `--output` file for writing, or wrap stdout in a null context.
+    """
+    if path is None:
+        return contextlib.nullcontext(sys.stdout)
+    return open(path, "w", encoding="utf-8")  # pylint: disable=consider-using-with
+
+
+def _open_cache(args) -> contextlib.AbstractContextManager:
+    """
+    Open the count cache requested with `--cache`, or a null context.
+    """
+    if args.cache is None:
+        return contextlib.nullcontext()
+    from ai_token_counter.cache import TokenCountCache
+
+    return TokenCountCache(args.cache or None)
+
+
+@contextlib.contextmanager
+def _stats_report(args, source: str):
+    """
+    Collect the stats of the counts inside the block and print them to stderr.
+
+    Yields:
+        Optional[CountStats]: The running summary, or None without `--stats`.
+    """
+    if args.stats is None:
+        yield None
+        return
+    from ai_token_counter import stats
+
+    summary = stats.CountStats(source=source, counts=0)
+    stats.add_hook(summary.merge)
+    started = time.perf_counter()
+    try:
+        yield summary
+    finally:
+        stats.remove_hook(summary.merge)
+        # Общее время выполнения, а не сумма времён отдельных файлов
+        summary.wall_time = time.perf_counter() - started
+        summary.peak_memory = stats.peak_memory()
+        if args.stats == "json":
+            print(json.dumps(summary.to_dict()), file=sys.stderr)
+        else:
+            print(stats.format_stats(summary), file=sys.stderr)
+
+
+def _fill_summary(summary, sources: list, tokens: int) -> None:
+    """
+    Fill totals of counts made out of process (worker pool or daemon).
+
+    Those counts report no stages; only sizes and the token total are known.
+    """
+    if summary is None or summary.counts:
+        return
+    summary.tokens = tokens
+    summary.counts = len(sources)
+    for source in sources:
+        try:
+            summary.bytes += os.stat(source).st_size
+        except OSError:
+            pass
+
+
+def _count_many(sources: list, args, cache=None, summary=None) -> int:
+    """
+    Count several files and print "<count>\t<path>" lines plus a total line.
+
+    Returns:
+        int: Exit code, 1 if any file failed.
+    """
+    results = None
+    if args.daemon is not None:
+        results = _count_on_daemon(sources, args)
+    if results is None:
+        from ai_token_counter.counter import count_tokens_files
+
+        results, _ = count_tokens_files(
+            sources,
+            model_alias=args.model,
+            encoding_name=args.encoding,
+            jobs=args.jobs,
+            cache=cache,
+        )
+    total = 0
+    failed = False
+    for path, result in zip(sources, results):
+        if isinstance(result, Exception):
+            failed = True
+            print(f"Error: {result}", file=sys.stderr)
+            continue
+        total += result
+        print(f"{result}\t{path}")
+    print(f"{total}\ttotal")
+    _fill_summary(summary, sources, total)
+    return 1 if failed else 0
+
+
+def _count_on_daemon(sources: list, args):
+    """
+    Count files over one daemon connection; None if no daemon answers.
+    """
+    from ai_token_counter import client
+
+    results = []
+    try:
+        with client.DaemonClient(args.daemon or None) as connection:
+            for source in sources:
+                try:
+                    results.append(
+                        connection.count(source, args.model, args.encoding)[0]
+                    )
+                except client.DaemonUnavailable:
+                    raise
+                except EXPECTED_ERRORS as err:
+                    results.append(err)
+    except client.DaemonUnavailable:
+        return None
+    return results
+
+
+def _follow(sources: list, args) -> int:
+    """
+    Print updated counts of growing files until interrupted.
+
+    Returns:
+        int: Exit code.
+    """
+    from ai_token_counter.follow import follow_files
+
+    several = len(sources) > 1
+
+    def report(follower) -> None:
+        if several:
+            print(f"{follower.tokens}\t{follower.path}", flush=True)
+        else:
+            print(follower.tokens, flush=True)
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        follow_files(
+            sources,
+            model_alias=args.model,
+            encoding_name=args.encoding,
+            checkpoint=args.checkpoint,
+            interval=args.interval,
+            on_update=report,
+        )
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _count_jsonl(sources: list, args) -> int:
+    """
+    Count JSONL records and print per-record JSON lines or per-field totals.
+
+    Returns:
+        int: Exit code, 1 if any record failed.
+    """
+    from ai_token_counter.jsonl import JsonlTotals, count_jsonl_tokens
+
+    totals = JsonlTotals()
+    for source in sources:
+        results = count_jsonl_tokens(
+            source,
+            args.field,
+            model_alias=args.model,
+            encoding_name=args.encoding,
+            jobs=args.jobs,
+        )
+        for result in results:
+            totals.add(result)
+            if result.error is not None:
+                print(f"Error: {source}:{result.line}: {result.error}", file=sys.stderr)
+            elif args.per_record:
+                record = {
+                    "source": source,
+                    "line": result.line,
+                    "tokens": result.tokens,
+                }
+                if args.field:
+                    record["fields"] = result.fields
+                print(json.dumps(record, ensure_ascii=False))
+    if not args.per_record:
+        for name in args.field:
+            print(f"{totals.fields.get(name, 0)}\t{name}")
+        print(f"{totals.tokens}\ttotal")
+    return 1 if totals.failed else 0
+
+
 if __name__ == "__main__":
     main()
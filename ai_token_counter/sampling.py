@@ -0,0 +1,511 @@
+"""
+Module: sampling.py
+
+Purpose:
+    Estimate the token count of a large corpus from a sample, with a
+    confidence interval, instead of encoding every byte.
+
+Method:
+    Files are grouped into strata by extension and size class. Every file is
+    divided into units of about `range_size` bytes; unit boundaries are moved
+    forward to the next safe split point (a letter followed by whitespace, see
+    `file_utils.ChunkSplitter`), so neighbouring units share their boundary,
+    the units of a file partition it exactly, and the tokens of a unit are
+    exactly its share of the whole-file count. Reading a random range
+    therefore does not bias the count the way a cut inside a word would.
+
+    Each round draws units without replacement in every stratum, counts
+    them with the regular encoder path and extrapolates with a ratio
+    estimator (tokens per byte times the stratum's bytes). The variance
+    includes the finite population correction, so a stratum sampled
+    completely contributes its exact count. Rounds continue, with Neyman
+    allocation of the new units to the strata whose estimates vary most,
+    until the interval's half-width is within `precision` of the estimate,
+    every unit has been counted, or the `max_bytes` budget is spent.
+
+    A boundary with no safe point within `ALIGN_WINDOW` bytes (minified
+    data, unspaced CJK) falls back to the next UTF-8 character boundary;
+    only such cuts may split a pre-tokenizer piece.
+
+Example:
+    >>> options = SamplingOptions(precision=0.01, confidence=0.95)
+    >>> result = estimate_corpus(paths, model_alias="gpt4o", options=options)
+    >>> result.tokens, result.low, result.high
+"""
+
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+import math
+import os
+from pathlib import Path
+import random
+import statistics
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from tiktoken import Encoding
+
+from ai_token_counter.file_utils import (
+    detect_compression,
+    safe_split_pattern,
+    utf8_error_at,
+)
+from ai_token_counter.tokenizer_factory import (
+    get_tiktoken_encoder,
+    resolve_encoding_name,
+)
+from ai_token_counter.tokenizers.openai import count_with_encoder
+
+# Nominal size in bytes of a sampling unit
+DEFAULT_RANGE_SIZE = 64 << 10
+
+# Bytes scanned after a nominal boundary for a safe split point
+ALIGN_WINDOW = 4 << 10
+
+# Units drawn per stratum in the first round (all of them in smaller strata)
+MIN_UNITS = 8
+
+DEFAULT_PRECISION = 0.01
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_THREADS = min(8, os.cpu_count() or 1)
+
+# Upper limits (exclusive) of the file size classes; larger files form the last
+SIZE_CLASSES = (64 << 10, 1 << 20, 16 << 20, 256 << 20)
+SIZE_CLASS_NAMES = ("<64K", "64K-1M", "1M-16M", "16M-256M", ">=256M")
+
+
+@dataclass
+class StratumEstimate:  # pylint: disable=too-many-instance-attributes
+    """
+    Estimate for one stratum (extension and size class).
+
+    Attributes:
+        extension (str): Lower-case file extension ("" for none).
+        size_class (str): One of `SIZE_CLASS_NAMES`.
+        files (int), bytes (int), units (int): Size of the stratum.
+        sampled_units (int), sampled_bytes (int): Part counted so far.
+        tokens (float): Estimated tokens.
+        std_error (float): Standard error of `tokens` (0 when fully counted).
+    """
+
+    extension: str
+    size_class: str
+    files: int
+    bytes: int
+    units: int
+    sampled_units: int = 0
+    sampled_bytes: int = 0
+    tokens: float = 0.0
+    std_error: float = 0.0
+
+
+@dataclass
+class CorpusEstimate:  # pylint: disable=too-many-instance-attributes
+    """
+    Result of `estimate_corpus`.
+
+    Attributes:
+        encoding (str): Encoding name.
+        tokens (int): Estimated corpus tokens.
+        low (int), high (int): Confidence interval (`low` is at least the
+            tokens actually counted; `high` is -1 while a stratum has fewer
+            than two samples).
+        confidence (float): Confidence level of the interval.
+        relative_error (float): Half-width of the interval over `tokens`.
+        files (int), bytes (int): Corpus size.
+        sampled_units (int), sampled_bytes (int): Part counted exactly.
+        rounds (int): Sampling rounds run.
+        exact (bool): True if every unit was counted.
+        strata (List[StratumEstimate]): Per-stratum estimates.
+    """
+
+    encoding: str
+    tokens: int
+    low: int
+    high: int
+    confidence: float
+    relative_error: float
+    files: int
+    bytes: int
+    sampled_units: int
+    sampled_bytes: int
+    rounds: int
+    exact: bool
+    strata: List[StratumEstimate] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the estimate as a JSON-serialisable dictionary."""
+        return asdict(self)
+
+
+class _Stratum:
+    """
+    Files of one stratum, their units and the samples counted so far.
+    """
+
+    def __init__(self, extension: str, size_class: str) -> None:
+        self.extension = extension
+        self.size_class = size_class
+        self.files: List[Tuple[str, int]] = []
+        self.starts = [0]
+        self.size = 0
+        self.samples: List[Tuple[int, int]] = []
+        self.taken: set = set()
+
+    @property
+    def units(self) -> int:
+        """Number of units in the stratum."""
+        return self.starts[-1]
+
+    def add(self, path: str, size: int, range_size: int) -> None:
+        """Add a file of `size` bytes."""
+        self.files.append((path, size))
+        self.starts.append(self.starts[-1] + max(1, math.ceil(size / range_size)))
+        self.size += size
+
+    def locate(self, unit: int) -> Tuple[str, int, int]:
+        """Return (path, file size, index of the unit in the file)."""
+        index = bisect_right(self.starts, unit) - 1
+        path, size = self.files[index]
+        return path, size, unit - self.starts[index]
+
+    def draw(self, rng: random.Random, count: int) -> List[int]:
+        """Draw up to `count` units not drawn before."""
+        if count <= 0:
+            return []
+        remaining = self.units - len(self.taken)
+        if count >= remaining:
+            drawn = [unit for unit in range(self.units) if unit not in self.taken]
+        else:
+            drawn = []
+            while len(drawn) < count:
+                unit = rng.randrange(self.units)
+                if unit not in self.taken:
+                    self.taken.add(unit)
+                    drawn.append(unit)
+        self.taken.update(drawn)
+        return drawn
+
+    def estimate(self) -> Tuple[float, float]:
+        """
+        Return (tokens, variance) of the ratio estimator; an unsampled
+        stratum has infinite variance.
+        """
+        count = len(self.samples)
+        if count == 0:
+            return 0.0, math.inf
+        sample_bytes = sum(size for size, _ in self.samples)
+        sample_tokens = sum(tokens for _, tokens in self.samples)
+        if count == self.units:
+            return float(sample_tokens), 0.0
+        if count < 2:
+            return float(sample_tokens), math.inf
+        ratio = sample_tokens / sample_bytes if sample_bytes else 0.0
+        spread = statistics.variance(
+            [tokens - ratio * size for size, tokens in self.samples]
+        )
+        variance = self.units**2 * (1 - count / self.units) * spread / count
+        return ratio * self.size, variance
+
+    def std_dev(self) -> float:
+        """Spread of the tokens per unit, used for Neyman allocation."""
+        if len(self.samples) < 2:
+            return 0.0
+        return statistics.stdev(tokens for _, tokens in self.samples)
+
+
+def file_size_class(size: int) -> str:
+    """
+    Return the size class name of a file of `size` bytes.
+    """
+    return SIZE_CLASS_NAMES[bisect_right(SIZE_CLASSES, size)]
+
+
+@dataclass(frozen=True)
+class SamplingOptions:
+    """
+    Tuning of `estimate_corpus`.
+
+    Attributes:
+        precision (float): Target half-width of the interval relative to the
+            estimate (e.g. 0.01 for +-1%).
+        confidence (float): Confidence level of the interval (0 < c < 1).
+        range_size (int): Nominal size in bytes of a sampled range.
+        max_bytes (Optional[int]): Stop starting new rounds once this many
+            bytes have been counted.
+        seed (Optional[int]): Seed of the random draws (reproducible runs).
+        threads (int): Threads reading and counting units.
+    """
+
+    precision: float = DEFAULT_PRECISION
+    confidence: float = DEFAULT_CONFIDENCE
+    range_size: int = DEFAULT_RANGE_SIZE
+    max_bytes: Optional[int] = None
+    seed: Optional[int] = None
+    threads: int = DEFAULT_THREADS
+
+    def validate(self) -> None:
+        """
+        Raises:
+            ValueError: If an option is out of range.
+        """
+        if self.precision <= 0:
+            raise ValueError("`precision` must be positive.")
+        if not 0 < self.confidence < 1:
+            raise ValueError("`confidence` must be between 0 and 1.")
+        if self.range_size <= ALIGN_WINDOW:
+            raise ValueError(f"`range_size` must be larger than {ALIGN_WINDOW} bytes.")
+        if self.threads < 1:
+            raise ValueError("`threads` must be at least 1.")
+
+
+def estimate_corpus(
+    paths: Sequence[str],
+    model_alias: Optional[str] = None,
+    encoding_name: Optional[str] = None,
+    *,
+    config: Optional[Mapping[str, str]] = None,
+    options: SamplingOptions = SamplingOptions(),
+    on_round: Optional[Callable[[CorpusEstimate], None]] = None,
+) -> CorpusEstimate:
+    """
+    Estimate the tokens of a corpus by stratified sampling of byte ranges.
+
+    Args:
+        paths (Sequence[str]): Corpus files (see `file_utils.expand_sources`).
+        model_alias, encoding_name, config: Encoding selection.
+        options (SamplingOptions): Precision, confidence and sampling limits.
+        on_round (Optional[Callable[[CorpusEstimate], None]]): Called with the
+            running estimate after every round.
+
+    Returns:
+        CorpusEstimate: Estimate, interval and per-stratum details.
+
+    Raises:
+        ValueError: If no encoding is given or it is unknown, an option is
+            out of range, a path is '-' or a sampled range contains a
+            special token.
+        FileNotFoundError, UnicodeDecodeError: If a file is missing or a
+            sampled range is not valid UTF-8.
+    """
+    if model_alias is None and encoding_name is None:
+        raise ValueError("One of `model_alias` or `encoding_name` must be specified.")
+    options.validate()
+    encoding = resolve_encoding_name(
+        model_alias=model_alias, encoding_name=encoding_name, user_config=config
+    )
+    sampler = _Sampler(
+        get_tiktoken_encoder(encoding),
+        _build_strata(paths, options.range_size),
+        options,
+        len(paths),
+    )
+    return sampler.run(on_round)
+
+
+def _build_strata(paths: Sequence[str], range_size: int) -> List[_Stratum]:
+    """
+    Group non-empty files into strata by extension and size class.
+    """
+    strata: Dict[Tuple[str, str], _Stratum] = {}
+    for path in paths:
+        if path == "-":
+            raise ValueError("Corpus estimation needs files, not stdin.")
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"File not found: {path}") from e
+        if size == 0:
+            continue
+        if detect_compression(path) is not None:
+            # Диапазоны байтов сжатого файла нельзя декодировать по отдельности
+            raise ValueError(
+                f"Corpus estimation needs uncompressed files: {path} is compressed."
+            )
+        key = (Path(path).suffix.lower(), file_size_class(size))
+        if key not in strata:
+            strata[key] = _Stratum(*key)
+        strata[key].add(path, size, range_size)
+    return sorted(strata.values(), key=lambda stratum: -stratum.size)
+
+
+class _Sampler:
+    """
+    Progressive sampling rounds over a set of strata.
+    """
+
+    def __init__(
+        self,
+        encoder: Encoding,
+        strata: List[_Stratum],
+        options: SamplingOptions,
+        files: int,
+    ) -> None:
+        self.encoder = encoder
+        self.strata = strata
+        self.options = options
+        self.files = files
+        self.z = statistics.NormalDist().inv_cdf((1 + options.confidence) / 2)
+        self.rng = random.Random(options.seed)
+        self.rounds = 0
+
+    def run(
+        self, on_round: Optional[Callable[[CorpusEstimate], None]]
+    ) -> CorpusEstimate:
+        """
+        Sample until the precision, the byte budget or a full count is reached.
+        """
+        wanted = {id(stratum): MIN_UNITS for stratum in self.strata}
+        with ThreadPoolExecutor(max_workers=self.options.threads) as executor:
+            while True:
+                jobs = [
+                    (stratum, unit)
+                    for stratum in self.strata
+                    for unit in stratum.draw(
+                        self.rng, wanted[id(stratum)] - len(stratum.taken)
+                    )
+                ]
+                if not jobs:
+                    break
+                list(executor.map(self._count, jobs))
+                self.rounds += 1
+                result = self.summary()
+                if on_round is not None:
+                    on_round(result)
+                max_bytes = self.options.max_bytes
+                if result.relative_error <= self.options.precision or (
+                    max_bytes is not None and result.sampled_bytes >= max_bytes
+                ):
+                    return result
+                wanted = self._allocate(result.tokens)
+        return self.summary()
+
+    def _count(self, job: Tuple[_Stratum, int]) -> None:
+        stratum, unit = job
+        path, size, index = stratum.locate(unit)
+        stratum.samples.append(
+            _count_unit(self.encoder, path, size, index, self.options.range_size)
+        )
+
+    def _allocate(self, total: float) -> Dict[int, int]:
+        """
+        Return the units wanted per stratum for the next round.
+
+        Neyman allocation of the sample size that reaches the precision, at
+        most doubling each stratum's sample per round.
+        """
+        deviations = [stratum.std_dev() for stratum in self.strata]
+        weights = [
+            stratum.units * deviation
+            for stratum, deviation in zip(self.strata, deviations)
+        ]
+        spread = sum(
+            weight * deviation for weight, deviation in zip(weights, deviations)
+        )
+        bound = (self.options.precision * total / self.z) ** 2
+        needed = sum(weights) ** 2 / (bound + spread) if bound + spread > 0 else 0.0
+        wanted = {}
+        for stratum, weight in zip(self.strata, weights):
+            have = len(stratum.taken)
+            target = have
+            if weight:
+                target = max(have + 1, math.ceil(needed * weight / sum(weights)))
+            wanted[id(stratum)] = min(stratum.units, target, 2 * max(have, MIN_UNITS))
+        return wanted
+
+    def summary(self) -> CorpusEstimate:
+        """
+        Combine the stratum estimates into a `CorpusEstimate`.
+        """
+        details = []
+        tokens = variance = 0.0
+        for stratum in self.strata:
+            stratum_tokens, stratum_variance = stratum.estimate()
+            tokens += stratum_tokens
+            variance += stratum_variance
+            details.append(
+                StratumEstimate(
+                    extension=stratum.extension,
+                    size_class=stratum.size_class,
+                    files=len(stratum.files),
+                    bytes=stratum.size,
+                    units=stratum.units,
+                    sampled_units=len(stratum.samples),
+                    sampled_bytes=sum(size for size, _ in stratum.samples),
+                    tokens=stratum_tokens,
+                    std_error=math.sqrt(stratum_variance),
+                )
+            )
+        counted = sum(count for stratum in self.strata for _, count in stratum.samples)
+        half_width = self.z * math.sqrt(variance)
+        return CorpusEstimate(
+            encoding=self.encoder.name,
+            tokens=round(tokens),
+            low=max(counted, math.floor(tokens - half_width)),
+            high=(math.ceil(tokens + half_width) if math.isfinite(half_width) else -1),
+            confidence=self.options.confidence,
+            relative_error=half_width / tokens if tokens else 0.0,
+            files=self.files,
+            bytes=sum(stratum.size for stratum in self.strata),
+            sampled_units=sum(detail.sampled_units for detail in details),
+            sampled_bytes=sum(detail.sampled_bytes for detail in details),
+            rounds=self.rounds,
+            exact=all(len(stratum.samples) == stratum.units for stratum in self.strata),
+            strata=details,
+        )
+
+
+def _count_unit(
+    encoder: Encoding, path: str, size: int, index: int, range_size: int
+) -> Tuple[int, int]:
+    """
+    Count unit `index` of a file; return (bytes, tokens).
+
+    Newlines are translated as by `read_source`, so the units of a file sum
+    to its regular count.
+    """
+    try:
+        with open(path, "rb") as handle:
+            start = _align(handle, index * range_size, size)
+            end = _align(handle, (index + 1) * range_size, size)
+            handle.seek(start)
+            data = handle.read(end - start)
+    except FileNotFoundError as e:
+        raise FileNotFoundError(f"File not found: {path}") from e
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise utf8_error_at(e, path, start + e.start) from e
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return end - start, count_with_encoder(encoder, text, count_only=False)
+
+
+def _align(handle, position: int, size: int) -> int:
+    """
+    Return the first safe split point at or after byte `position`.
+
+    Falls back to the next UTF-8 character boundary (not inside CRLF) when
+    there is no safe point within `ALIGN_WINDOW` bytes.
+    """
+    if position <= 0:
+        return 0
+    if position >= size:
+        return size
+    # Буква перед точкой разреза может начинаться до `position`
+    base = max(0, position - 4)
+    handle.seek(base)
+    data = handle.read(position - base + ALIGN_WINDOW)
+    skip = 0
+    while skip < len(data) and data[skip] & 0xC0 == 0x80:
+        skip += 1
+    text = data[skip:].decode("utf-8", "surrogateescape")
+    for match in safe_split_pattern().finditer(text):
+        cut = base + skip + len(text[: match.end()].encode("utf-8", "surrogateescape"))
+        if cut >= position:
+            return cut
+    cut = position - base
+    while cut < len(data) and (
+        data[cut] & 0xC0 == 0x80 or data[cut - 1 : cut + 1] == b"\r\n"
+    ):
+        cut += 1
+    return min(size, base + cut)
@@ -0,0 +1,340 @@
+"""
+Module: server.py
+
+Purpose:
+    Long-running counting daemon for `ai-token-counter serve`.
+
+    Keeps encoders warm in memory and answers count requests over a Unix
+    domain socket (newline-delimited JSON, several requests per connection)
+    and/or a localhost HTTP endpoint (POST /count, GET /health). Requests are
+    served on threads; tiktoken releases the GIL while encoding.
+
+    The default socket path is `client.default_socket_path()`.
+
+    Only the owner can connect to the socket (mode 0600), so only socket
+    requests may name a file by "path"; any local process or web page can
+    reach the HTTP port, which therefore counts "text" only and requires a
+    JSON Content-Type (a browser cannot send that cross-origin without a
+    preflight, which is refused). Files must be regular files and are
+    streamed, at most `MAX_PATH_CHARS` characters.
+
+Protocol:
+    Request:  {"op": "count", "text": "..." | "path": "/abs/path",
+               "model": "gpt-4o", "encoding": "o200k_base"}
+              {"op": "ping"}
+    Response: {"tokens": 12, "encoding": "o200k_base"}
+              {"error": "message", "type": "ValueError"}
+"""
+
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+from ai_token_counter.client import MAX_REQUEST_BYTES
+from ai_token_counter.file_utils import iter_source_chunks
+from ai_token_counter.tokenizer_factory import (
+    get_tiktoken_encoder,
+    preload,
+    resolve_encoding_name,
+)
+from ai_token_counter.tokenizers.openai import (
+    count_chunks,
+    count_tokens_tiktoken,
+    get_pretokenizer_pattern,
+)
+
+# Encodings loaded before the daemon starts accepting requests
+DEFAULT_PRELOAD = ("cl100k_base", "o200k_base")
+
+# Upper bound for the text of one file counted by path
+MAX_PATH_CHARS = 1 << 30
+
+# Failures reported to the client instead of stopping the daemon
+REQUEST_ERRORS = (ValueError, OSError, UnicodeError, TypeError)
+
+
+def handle_request(request: Any, allow_paths: bool = True) -> Dict[str, Any]:
+    """
+    Answer one decoded request.
+
+    Args:
+        request (Any): Decoded JSON request (see module docstring).
+        allow_paths (bool): Accept "path" requests (False for HTTP).
+
+    Returns:
+        Dict[str, Any]: Response object; failures become {"error", "type"}.
+    """
+    try:
+        if not isinstance(request, dict):
+            raise TypeError("Request must be a JSON object.")
+        op = request.get("op", "count")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if op != "count":
+            raise ValueError(f"Unknown op: {op!r}")
+        model_alias = request.get("model")
+        encoding_name = request.get("encoding")
+        if model_alias is None and encoding_name is None:
+            raise ValueError(
+                "One of `model_alias` or `encoding_name` must be specified."
+            )
+        if "text" in request:
+            encoding = resolve_encoding_name(
+                model_alias=model_alias, encoding_name=encoding_name
+            )
+            text = request["text"]
+            if not isinstance(text, str):
+                raise TypeError(f"Unsupported text type: {type(text)}")
+            tokens = count_tokens_tiktoken(text, encoding)
+        elif "path" in request and not allow_paths:
+            raise ValueError("`path` is only accepted on the Unix socket.")
+        elif isinstance(request.get("path"), str):
+            encoding = resolve_encoding_name(
+                model_alias=model_alias, encoding_name=encoding_name
+            )
+            tokens = _count_path(request["path"], encoding)
+        else:
+            raise ValueError("Request needs a `text` or `path` field.")
+    except REQUEST_ERRORS as err:
+        return {"error": str(err), "type": type(err).__name__}
+    return {"tokens": tokens, "encoding": encoding}
+
+
+def _count_path(path: str, encoding: str) -> int:
+    """
+    Count a regular file, streamed in bounded chunks.
+
+    Raises:
+        ValueError: If `path` is not a regular file (a FIFO or a device such
+            as /dev/zero would never end) or its text exceeds `MAX_PATH_CHARS`.
+        OSError, UnicodeDecodeError: As raised while reading the file.
+    """
+    if not stat.S_ISREG(os.stat(path).st_mode):
+        raise ValueError(f"{path}: not a regular file.")
+    encoder = get_tiktoken_encoder(encoding)
+    chunks = iter_source_chunks(
+        path, boundary_pattern=get_pretokenizer_pattern(encoder)
+    )
+    return count_chunks(encoder, _capped(path, chunks))
+
+
+def _capped(path: str, chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Pass chunks through until more than `MAX_PATH_CHARS` characters were read.
+    """
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        # Сжатый файл может распаковаться во много раз больше своего размера
+        if size > MAX_PATH_CHARS:
+            raise ValueError(f"{path}: more than {MAX_PATH_CHARS} characters.")
+        yield chunk
+
+
+def _handle_line(line: bytes, allow_paths: bool = True) -> bytes:
+    """
+    Decode one JSON request line and encode its response line.
+    """
+    try:
+        request = json.loads(line)
+    except ValueError as err:
+        response = {"error": f"Invalid JSON request: {err}", "type": "ValueError"}
+    else:
+        response = handle_request(request, allow_paths)
+    return json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+class _SocketHandler(socketserver.StreamRequestHandler):
+    """
+    Serve newline-delimited JSON requests until the client disconnects.
+    """
+
+    def handle(self) -> None:
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_BYTES)
+            if not line:
+                return
+            if len(line) >= MAX_REQUEST_BYTES and not line.endswith(b"\n"):
+                # Остаток строки нельзя принять за следующие запросы: закрыть
+                self.wfile.write(
+                    b'{"error": "Request too large", "type": "ValueError"}\n'
+                )
+                return
+            if line.strip():
+                self.wfile.write(_handle_line(line))
+                self.wfile.flush()
+
+
+class _HttpHandler(BaseHTTPRequestHandler):
+    """
+    POST /count with a JSON request body ("text" only); GET /health.
+    """
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Answer health checks."""
+        if self.path != "/health":
+            self._reply(404, {"error": "Not found", "type": "ValueError"})
+            return
+        self._reply(200, handle_request({"op": "ping"}))
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """Answer one count request."""
+        if self.path != "/count":
+            self._reply(404, {"error": "Not found", "type": "ValueError"})
+            return
+        if self.headers.get_content_type() != "application/json":
+            self._reply(
+                415,
+                {
+                    "error": "Content-Type must be application/json",
+                    "type": "ValueError",
+                },
+            )
+            return
+        length = self._content_length()
+        if length is None:
+            return
+        response = json.loads(_handle_line(self.rfile.read(length), False))
+        self._reply(400 if "error" in response else 200, response)
+
+    def _content_length(self) -> Optional[int]:
+        """
+        Return the body length, or reply with an error and return None.
+        """
+        header = self.headers.get("Content-Length")
+        if header is None:
+            self._reply(411, {"error": "Content-Length required", "type": "ValueError"})
+            return None
+        try:
+            length = int(header)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._reply(400, {"error": "Invalid Content-Length", "type": "ValueError"})
+            return None
+        if length > MAX_REQUEST_BYTES:
+            self._reply(413, {"error": "Request too large", "type": "ValueError"})
+            return None
+        return length
+
+    def log_message(
+        self, format: str, *args
+    ) -> None:  # pylint: disable=redefined-builtin
+        """Keep the daemon quiet; errors are returned to clients."""
+
+    def _reply(self, status: int, response: Mapping[str, Any]) -> None:
+        body = json.dumps(response, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class CountingDaemon:
+    """
+    Unix-socket and/or localhost HTTP counting server.
+
+    Args:
+        socket_path (Optional[str]): Unix socket to listen on; None disables it.
+        http_port (Optional[int]): Localhost TCP port for HTTP (0 picks a free
+            port); None disables HTTP.
+        preload_encodings (Sequence[str]): Encodings to load before serving.
+
+    Raises:
+        ValueError: If neither transport is enabled, an encoding cannot be
+            loaded, or another daemon already listens on `socket_path`.
+        OSError: If a listener cannot be bound.
+    """
+
+    def __init__(
+        self,
+        socket_path: Optional[str] = None,
+        http_port: Optional[int] = None,
+        preload_encodings: Sequence[str] = DEFAULT_PRELOAD,
+    ) -> None:
+        if socket_path is None and http_port is None:
+            raise ValueError("Enable a Unix socket, an HTTP port, or both.")
+        preload(preload_encodings)
+        self.socket_path = socket_path
+        self._servers: List[socketserver.BaseServer] = []
+        self._threads: List[threading.Thread] = []
+        if socket_path is not None:
+            self._servers.append(_bind_unix(socket_path))
+        if http_port is not None:
+            http = ThreadingHTTPServer(("127.0.0.1", http_port), _HttpHandler)
+            http.daemon_threads = True
+            self._servers.append(http)
+
+    @property
+    def http_address(self) -> Optional[tuple]:
+        """(host, port) of the HTTP listener, or None."""
+        for server in self._servers:
+            if isinstance(server, ThreadingHTTPServer):
+                return server.server_address
+        return None
+
+    def start(self) -> None:
+        """Serve every listener on a background thread."""
+        for server in self._servers:
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def serve_forever(self) -> None:
+        """Serve until interrupted, then shut down."""
+        self.start()
+        try:
+            for thread in self._threads:
+                thread.join()
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """Stop all listeners and remove the socket file."""
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers = []
+        if self.socket_path is not None and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def __enter__(self) -> "CountingDaemon":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+
+def _bind_unix(path: str) -> socketserver.BaseServer:
+    """
+    Bind a threading Unix stream server at `path`, replacing a stale socket.
+
+    The socket is created with mode 0600 so only the owner can connect.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise ValueError("Unix domain sockets are not supported here; use --http.")
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except OSError:
+            # Сокет остался от завершившегося демона
+            os.unlink(path)
+        else:
+            raise ValueError(f"A daemon is already listening on {path}")
+        finally:
+            probe.close()
+    old_umask = os.umask(0o177)
+    try:
+        server = socketserver.ThreadingUnixStreamServer(path, _SocketHandler)
+    finally:
+        os.umask(old_umask)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,346 @@
+"""
+Module: stats.py
+
+Purpose:
+    Per-stage timing and throughput instrumentation of `counter.count_tokens`.
+
+    Register a hook with `add_hook` (or use `collect()`) and every count
+    reports a `CountStats`: wall time per stage (read, resolve, load, hash,
+    cache, encode), input bytes, tokens, bytes/s, tokens/s, encoder-registry
+    hits and misses of the counting thread and the process peak memory.
+    Without hooks `recorder()` returns a shared no-op recorder, so
+    instrumentation costs a few attribute lookups per count.
+
+    Hooks are process-wide and are called from whichever thread counted.
+
+Example:
+    >>> with collect() as collected:
+    ...     count_tokens("big.txt", model_alias="gpt4")
+    >>> print(format_stats(collected[0]))
+"""
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+import os
+from pathlib import Path
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from ai_token_counter.file_utils import detect_compression
+from ai_token_counter.tokenizer_factory import EncoderLookups, track_encoder_lookups
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+# Stage names in pipeline order
+STAGES = ("read", "resolve", "load", "hash", "cache", "encode")
+
+
+@dataclass
+class CountStats:  # pylint: disable=too-many-instance-attributes
+    """
+    Measurements of one count (or, after `merge`, of several).
+
+    Attributes:
+        source (str): The counted source ('-' for stdin).
+        encoding (Optional[str]): Encoding used.
+        stages (Dict[str, float]): Seconds spent per stage (see `STAGES`).
+        bytes (int): Input size in bytes; decoded (not compressed) bytes
+            for compressed files, measured as their text is read, so 0 when
+            a cache hit skips reading one.
+        tokens (int): Tokens counted.
+        wall_time (float): Seconds from start to end of the count.
+        encoder_cache_hits (int): Encoder-registry hits of this count (lookups
+            on other threads are not included).
+        encoder_cache_misses (int): Encoder-registry misses (vocabulary loads)
+            of this count.
+        peak_memory (Optional[int]): Peak resident memory of the process, in
+            bytes, where the platform reports it.
+        counts (int): Number of counts aggregated.
+    """
+
+    source: str = ""
+    encoding: Optional[str] = None
+    stages: Dict[str, float] = field(default_factory=dict)
+    bytes: int = 0
+    tokens: int = 0
+    wall_time: float = 0.0
+    encoder_cache_hits: int = 0
+    encoder_cache_misses: int = 0
+    peak_memory: Optional[int] = None
+    counts: int = 1
+
+    @property
+    def bytes_per_s(self) -> float:
+        """Input bytes per second of wall time."""
+        return self.bytes / self.wall_time if self.wall_time > 0 else 0.0
+
+    @property
+    def tokens_per_s(self) -> float:
+        """Tokens per second of wall time."""
+        return self.tokens / self.wall_time if self.wall_time > 0 else 0.0
+
+    def merge(self, other: "CountStats") -> None:
+        """Add the measurements of `other` to this one."""
+        for stage, seconds in other.stages.items():
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        self.bytes += other.bytes
+        self.tokens += other.tokens
+        self.wall_time += other.wall_time
+        self.encoder_cache_hits += other.encoder_cache_hits
+        self.encoder_cache_misses += other.encoder_cache_misses
+        if other.peak_memory is not None:
+            self.peak_memory = max(self.peak_memory or 0, other.peak_memory)
+        self.counts += other.counts
+        if self.encoding != other.encoding:
+            self.encoding = self.encoding or other.encoding
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serialisable dictionary including the rates."""
+        data = asdict(self)
+        data["bytes_per_s"] = self.bytes_per_s
+        data["tokens_per_s"] = self.tokens_per_s
+        return data
+
+
+StatsHook = Callable[[CountStats], None]
+
+_HOOKS: List[StatsHook] = []
+_HOOKS_LOCK = threading.Lock()
+
+
+def add_hook(hook: StatsHook) -> None:
+    """
+    Register `hook` to receive the `CountStats` of every following count.
+    """
+    with _HOOKS_LOCK:
+        _HOOKS.append(hook)
+
+
+def remove_hook(hook: StatsHook) -> None:
+    """
+    Unregister a hook added with `add_hook` (no error if it is absent).
+    """
+    with _HOOKS_LOCK:
+        if hook in _HOOKS:
+            _HOOKS.remove(hook)
+
+
+@contextmanager
+def collect() -> Iterator[List[CountStats]]:
+    """
+    Collect the stats of every count made inside the `with` block.
+
+    Yields:
+        List[CountStats]: Filled as counts finish.
+    """
+    collected: List[CountStats] = []
+    add_hook(collected.append)
+    try:
+        yield collected
+    finally:
+        remove_hook(collected.append)
+
+
+def peak_memory() -> Optional[int]:
+    """
+    Return the peak resident set size of this process in bytes, if known.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает килобайты, macOS — байты
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _Stage:
+    """
+    Context manager adding its elapsed time to one stage.
+    """
+
+    __slots__ = ("_stages", "_name", "_started")
+
+    def __init__(self, stages: Dict[str, float], name: str) -> None:
+        self._stages = stages
+        self._name = name
+        self._started = 0.0
+
+    def __enter__(self) -> None:
+        self._started = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self._started
+        self._stages[self._name] = self._stages.get(self._name, 0.0) + elapsed
+
+
+class StatsRecorder:
+    """
+    Collects the measurements of one count and reports them to the hooks.
+
+    Args:
+        source (Any): The counted source; an uncompressed file's size gives
+            `bytes` directly, other sources are measured as their text passes
+            through.
+
+    Side effects:
+        Tracks the encoder lookups of the calling thread until `finish`.
+    """
+
+    enabled = True
+
+    def __init__(self, source: Any) -> None:
+        self._started = time.perf_counter()
+        self._lookups = EncoderLookups()
+        track_encoder_lookups(self._lookups)
+        self.stats = CountStats(source=_source_name(source))
+        self._measure = True
+        # Размер сжатого файла не равен объёму прочитанного текста
+        if (
+            isinstance(source, (str, Path))
+            and str(source) != "-"
+            and detect_compression(source) is None
+        ):
+            try:
+                self.stats.bytes = os.stat(source).st_size
+                self._measure = False
+            except OSError:
+                pass
+
+    def stage(self, name: str) -> _Stage:
+        """Return a context manager timing `name`."""
+        return _Stage(self.stats.stages, name)
+
+    def add_text(self, text: str) -> None:
+        """Account the UTF-8 size of the whole text read from the source."""
+        self._account(len(text.encode("utf-8", "surrogatepass")))
+
+    def timed_iter(self, items: Iterable[str], name: str, within: str) -> Iterator[str]:
+        """
+        Yield `items`, moving the time spent producing them from stage
+        `within` (which encloses the consumer) to stage `name`.
+        """
+        stages = self.stats.stages
+        iterator = iter(items)
+        passed = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed = time.perf_counter() - started
+                stages[name] = stages.get(name, 0.0) + elapsed
+                stages[within] = stages.get(within, 0.0) - elapsed
+            if self._measure:
+                passed += len(item.encode("utf-8", "surrogatepass"))
+                self._account(passed)
+            yield item
+
+    def _account(self, size: int) -> None:
+        """
+        Record `size` bytes read in one pass over the source; a source read
+        twice (hashed, then encoded) is not counted twice.
+        """
+        if self._measure:
+            self.stats.bytes = max(self.stats.bytes, size)
+
+    def finish(self, tokens: int, encoding: str) -> None:
+        """Complete the measurements and pass them to every hook."""
+        stats = self.stats
+        stats.wall_time = time.perf_counter() - self._started
+        stats.tokens = tokens
+        stats.encoding = encoding
+        track_encoder_lookups(None)
+        stats.encoder_cache_hits = self._lookups.hits
+        stats.encoder_cache_misses = self._lookups.misses
+        stats.peak_memory = peak_memory()
+        for hook in list(_HOOKS):
+            hook(stats)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+class _NullRecorder:
+    """
+    Recorder used while no hook is registered: every method is a no-op.
+    """
+
+    # pylint: disable=unused-argument
+
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name: str) -> _NullStage:
+        """Return a shared no-op context manager."""
+        return self._stage
+
+    def add_text(self, text: str) -> None:
+        """Do nothing."""
+
+    def timed_iter(self, items: Iterable[str], name: str, within: str) -> Iterable[str]:
+        """Return `items` unchanged."""
+        return items
+
+    def finish(self, tokens: int, encoding: str) -> None:
+        """Do nothing."""
+
+
+NULL_RECORDER = _NullRecorder()
+
+
+def recorder(source: Any) -> Any:
+    """
+    Return a `StatsRecorder` when hooks are registered, else `NULL_RECORDER`.
+    """
+    if _HOOKS:
+        return StatsRecorder(source)
+    return NULL_RECORDER
+
+
+def _source_name(source: Any) -> str:
+    if isinstance(source, (str, Path)):
+        return str(source)
+    return getattr(source, "name", None) or type(source).__name__
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size:.0f} B"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def format_stats(stats: CountStats) -> str:
+    """
+    Render stats as human-readable lines (for `--stats`).
+    """
+    lines = [f"source:        {stats.source}"]
+    if stats.encoding is not None:
+        lines.append(f"encoding:      {stats.encoding}")
+    for stage in STAGES:
+        if stage in stats.stages:
+            lines.append(f"  {stage + ':':<12}{stats.stages[stage] * 1000:10.2f} ms")
+    lines += [
+        f"wall time:     {stats.wall_time * 1000:.2f} ms",
+        f"input:         {_format_bytes(stats.bytes)} ({_format_bytes(stats.bytes_per_s)}/s)",
+        f"tokens:        {stats.tokens} ({stats.tokens_per_s:,.0f}/s)",
+        f"encoder cache: {stats.encoder_cache_hits} hits, "
+        f"{stats.encoder_cache_misses} misses",
+    ]
+    if stats.peak_memory is not None:
+        lines.append(f"peak memory:   {_format_bytes(stats.peak_memory)}")
+    return "\n".join(lines)
@@ -2,7 +2,8 @@
 Module: tokenizer_config.py
 
 Purpose:
-    Central storage for mapping AI model aliases to tiktoken encoding names.
+    Central storage for mapping AI model aliases to tiktoken encoding names,
+    and for the per-message overhead of chat formats.
 
 This configuration enables easy extension and override of model-to-encoding mappings.
 """
@@ -12,15 +13,48 @@ This configuration enables easy extension and override of model-to-encoding mapp
 TOKENIZER_CONFIG: dict[str, str] = {
     # OpenAI GPT-3.5 and GPT-4 families
     "gpt-3.5-turbo": "cl100k_base",  # primary alias for GPT-3.5-Turbo
+    "gpt-3.5-turbo-0301": "cl100k_base",  # legacy snapshot with its own chat overhead
     "gpt35": "cl100k_base",  # shorthand alias
     "gpt-4": "cl100k_base",  # GPT-4 uses same encoding as GPT-3.5
     "gpt4": "cl100k_base",  # shorthand alias
+    "gpt-4-turbo": "cl100k_base",  # GPT-4 Turbo keeps the GPT-4 encoding
     # GPT-4o (omni) for overheard / multimodal
     "gpt4o": "o200k_base",  # alias for GPT-4o requiring larger token space
     "gpt-4o": "o200k_base",  # hyphenated alias
+    "gpt-4o-mini": "o200k_base",  # small GPT-4o, same encoding
+    # GPT-4.1 family moved to the GPT-4o encoding
+    "gpt-4.1": "o200k_base",
+    "gpt-4.1-mini": "o200k_base",
+    "gpt-4.1-nano": "o200k_base",
     # Direct encoding names
     "cl100k_base": "cl100k_base",  # direct reference
     "o200k_base": "o200k_base",  # direct reference
 }
 
 # T O D O: Merge with user-provided config in tokenizer_factory to allow overrides
+
+# Overhead of OpenAI-style chat messages, keyed by model alias (lowercase).
+#   tokens_per_message: tokens wrapping every message (<|start|>{role}...<|end|>)
+#   tokens_per_name: extra tokens when a message carries a "name" field
+#   reply_priming: tokens priming the assistant reply (<|start|>assistant<|message|>)
+# Aliases missing here use DEFAULT_CHAT_OVERHEAD.
+DEFAULT_CHAT_OVERHEAD: dict[str, int] = {
+    "tokens_per_message": 3,
+    "tokens_per_name": 1,
+    "reply_priming": 3,
+}
+
+CHAT_OVERHEAD_CONFIG: dict[str, dict[str, int]] = {
+    # Legacy GPT-3.5 snapshot: name replaces role, hence the negative name cost
+    "gpt-3.5-turbo-0301": {
+        "tokens_per_message": 4,
+        "tokens_per_name": -1,
+        "reply_priming": 3,
+    },
+    "gpt-3.5-turbo": DEFAULT_CHAT_OVERHEAD,
+    "gpt35": DEFAULT_CHAT_OVERHEAD,
+    "gpt-4": DEFAULT_CHAT_OVERHEAD,
+    "gpt4": DEFAULT_CHAT_OVERHEAD,
+    "gpt4o": DEFAULT_CHAT_OVERHEAD,
+    "gpt-4o": DEFAULT_CHAT_OVERHEAD,
+}
@@ -5,17 +5,259 @@ Purpose:
     Resolve tiktoken encoding names from model aliases or explicit encoding names,
     and provide factory functions for tiktoken encoders.
 
+    All encoders are served from a single process-wide registry with bounded
+    LRU eviction, so a warm process never goes back to the tiktoken loader.
+    Encodings exported to the offline vocabulary store (see `vocab_store`)
+    are loaded from there, without tiktoken's parsing or network access.
+
 Dependencies:
     tiktoken
     typing.Mapping, typing.Optional
     ai_token_counter.tokenizer_config.TOKENIZER_CONFIG
 """
 
-from typing import Mapping, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Mapping, Optional
+import threading
+import time
+
 import tiktoken
 from tiktoken import Encoding
 
+from ai_token_counter.alias_index import AliasIndex
 from ai_token_counter.tokenizer_config import TOKENIZER_CONFIG
+from ai_token_counter.vocab_store import load_encoding, vocab_path
+
+# Maximum number of encoders kept alive by the registry at the same time
+DEFAULT_ENCODER_CACHE_SIZE = 4
+
+# Number of distinct user configs whose compiled alias index is memoised
+ALIAS_INDEX_CACHE_SIZE = 32
+
+
+@dataclass(frozen=True)
+class EncoderCacheInfo:
+    """
+    Snapshot of the encoder registry counters.
+
+    Attributes:
+        hits (int): Lookups served from the registry.
+        misses (int): Lookups that had to go to the tiktoken loader.
+        evictions (int): Encoders dropped by LRU eviction or `evict()`.
+        load_time (float): Total seconds spent loading encoders.
+        currsize (int): Number of encoders currently held.
+        maxsize (int): Registry capacity.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    load_time: float
+    currsize: int
+    maxsize: int
+
+
+@dataclass
+class EncoderLookups:
+    """
+    Registry lookups made by one thread while it is tracked.
+
+    Attributes:
+        hits (int): Lookups served from the registry.
+        misses (int): Lookups that loaded the encoder.
+    """
+
+    hits: int = 0
+    misses: int = 0
+
+
+# Lookup counters of the work each thread is doing (see `track_encoder_lookups`)
+_THREAD_LOOKUPS = threading.local()
+
+
+def track_encoder_lookups(lookups: Optional[EncoderLookups]) -> None:
+    """
+    Attribute the following registry lookups of the calling thread to
+    `lookups`, replacing any previous tracker; None stops tracking.
+
+    Unlike the process-wide counters of `encoder_cache_info`, these are not
+    affected by lookups on other threads.
+    """
+    _THREAD_LOOKUPS.current = lookups
+
+
+def _note_lookup(hit: bool) -> None:
+    lookups = getattr(_THREAD_LOOKUPS, "current", None)
+    if lookups is not None:
+        if hit:
+            lookups.hits += 1
+        else:
+            lookups.misses += 1
+
+
+class EncoderRegistry:
+    """
+    Thread-safe LRU registry of tiktoken encoders keyed by encoding name.
+
+    Purpose:
+        Load each encoding at most once while it stays in the registry and
+        keep hit/miss/load-time counters for diagnostics.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_ENCODER_CACHE_SIZE) -> None:
+        if maxsize < 1:
+            raise ValueError("Encoder cache size must be at least 1.")
+        self._maxsize = maxsize
+        self._encoders: "OrderedDict[str, Encoding]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._load_time = 0.0
+
+    def get(self, encoding_name: str) -> Encoding:
+        """
+        Return the encoder for `encoding_name`, loading it on a miss.
+
+        Raises:
+            ValueError: If the encoding cannot be loaded.
+        """
+        with self._lock:
+            encoder = self._encoders.get(encoding_name)
+            _note_lookup(encoder is not None)
+            if encoder is not None:
+                self._hits += 1
+                self._encoders.move_to_end(encoding_name)
+                return encoder
+            self._misses += 1
+            started = time.perf_counter()
+            try:
+                encoder = _load_encoder(encoding_name)
+            finally:
+                self._load_time += time.perf_counter() - started
+            self._encoders[encoding_name] = encoder
+            while len(self._encoders) > self._maxsize:
+                oldest, _ = self._encoders.popitem(last=False)
+                _forget_tiktoken_encoding(oldest)
+                self._evictions += 1
+            return encoder
+
+    def peek(self, encoding_name: str) -> Optional[Encoding]:
+        """
+        Return the encoder if it is already loaded, without loading or waiting.
+
+        Returns None on a miss and while another thread holds the registry
+        (e.g. during a load), so callers on an event loop never block.
+        """
+        # pylint: disable-next=consider-using-with
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            encoder = self._encoders.get(encoding_name)
+            if encoder is not None:
+                _note_lookup(True)
+                self._hits += 1
+                self._encoders.move_to_end(encoding_name)
+            return encoder
+        finally:
+            self._lock.release()
+
+    def evict(self, encoding_name: Optional[str] = None) -> int:
+        """
+        Drop one encoder (or all of them when `encoding_name` is None).
+
+        Returns:
+            int: Number of encoders removed.
+        """
+        with self._lock:
+            if encoding_name is None:
+                names = list(self._encoders)
+            else:
+                names = [encoding_name] if encoding_name in self._encoders else []
+            for name in names:
+                del self._encoders[name]
+                _forget_tiktoken_encoding(name)
+            self._evictions += len(names)
+            return len(names)
+
+    def resize(self, maxsize: int) -> None:
+        """
+        Change the registry capacity, evicting least recently used encoders.
+        """
+        if maxsize < 1:
+            raise ValueError("Encoder cache size must be at least 1.")
+        with self._lock:
+            self._maxsize = maxsize
+            while len(self._encoders) > self._maxsize:
+                oldest, _ = self._encoders.popitem(last=False)
+                _forget_tiktoken_encoding(oldest)
+                self._evictions += 1
+
+    def info(self) -> EncoderCacheInfo:
+        """
+        Return a snapshot of the registry counters.
+        """
+        with self._lock:
+            return EncoderCacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                load_time=self._load_time,
+                currsize=len(self._encoders),
+                maxsize=self._maxsize,
+            )
+
+    def reset_stats(self) -> None:
+        """
+        Zero the hit/miss/eviction/load-time counters.
+        """
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+            self._load_time = 0.0
+
+
+def _load_encoder(encoding_name: str) -> Encoding:
+    """
+    Load an encoder from the vocabulary store or through tiktoken, wrapping
+    failures in ValueError.
+    """
+    stored = vocab_path(encoding_name)
+    if stored.is_file():
+        try:
+            return load_encoding(stored)
+        except (ValueError, OSError) as e:
+            raise ValueError(
+                f"Failed to load tiktoken encoding '{encoding_name}' from {stored}: {e}"
+            ) from e
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except KeyError as e:
+        # Specific failure when encoding name is not found
+        raise ValueError(
+            f"Failed to load tiktoken encoding '{encoding_name}': {e}"
+        ) from e
+    except Exception as e:
+        # Any other error from tiktoken
+        raise ValueError(
+            f"Failed to load tiktoken encoding '{encoding_name}': {e}"
+        ) from e
+
+
+def _forget_tiktoken_encoding(encoding_name: str) -> None:
+    """
+    Drop tiktoken's own module-level reference so eviction frees memory.
+    """
+    encodings = getattr(tiktoken.registry, "ENCODINGS", None)
+    if isinstance(encodings, dict):
+        encodings.pop(encoding_name, None)
+
+
+# Process-wide registry shared by every counting path
+_ENCODER_REGISTRY = EncoderRegistry()
 
 
 def merge_configs(
@@ -45,6 +287,60 @@ def merge_configs(
     return merged
 
 
+@lru_cache(maxsize=1)
+def _default_alias_index() -> AliasIndex:
+    """
+    Compile (once) the alias index of the default configuration.
+    """
+    return AliasIndex(TOKENIZER_CONFIG)
+
+
+@lru_cache(maxsize=ALIAS_INDEX_CACHE_SIZE)
+def _user_alias_index(fingerprint: tuple) -> AliasIndex:
+    """
+    Compile the alias index of the defaults merged with one user config.
+    """
+    return AliasIndex(TOKENIZER_CONFIG, dict(fingerprint))
+
+
+def get_alias_index(user_config: Optional[Mapping[str, str]] = None) -> AliasIndex:
+    """
+    Return the compiled alias index for the defaults plus `user_config`.
+
+    Purpose:
+        Avoid re-merging and re-lowercasing the configuration on every
+        lookup: the default index is built once and user configs are
+        memoised by content (their items in order), so an equal config
+        passed again, even as a new object, reuses its index.
+
+    Args:
+        user_config (Optional[Mapping[str, str]]): User-provided overrides.
+
+    Returns:
+        AliasIndex: Immutable index; see `alias_index.AliasIndex.lookup`.
+
+    Side effects:
+        `TOKENIZER_CONFIG` is read when first needed; call
+        `clear_alias_index_cache()` after changing it at runtime.
+    """
+    if not user_config:
+        return _default_alias_index()
+    fingerprint = tuple(user_config.items())
+    try:
+        return _user_alias_index(fingerprint)
+    except TypeError:
+        # Нехэшируемые значения: собрать индекс без мемоизации
+        return AliasIndex(TOKENIZER_CONFIG, user_config)
+
+
+def clear_alias_index_cache() -> None:
+    """
+    Drop every compiled alias index (e.g. after editing `TOKENIZER_CONFIG`).
+    """
+    _default_alias_index.cache_clear()
+    _user_alias_index.cache_clear()
+
+
 def resolve_encoding_name(
     model_alias: Optional[str] = None,
     encoding_name: Optional[str] = None,
@@ -55,7 +351,10 @@ def resolve_encoding_name(
 
     Purpose:
         Use explicit encoding_name if provided; otherwise map model_alias
-        via merged default and user configuration.
+        via the compiled index of the default and user configuration. Exact
+        aliases win; versioned names fall back to the longest known alias
+        followed by "-", ":" or "@" and a version or date suffix (e.g.
+        gpt-4o-2024-08-06 -> gpt-4o, but gpt-4.1 never -> gpt-4).
 
     Args:
         model_alias (Optional[str]): Case-insensitive alias for the AI model.
@@ -79,13 +378,11 @@ def resolve_encoding_name(
     if not model_alias:
         raise ValueError("One of `model_alias` or `encoding_name` must be specified.")
 
-    config = merge_configs(TOKENIZER_CONFIG, user_config)
-    alias_key = model_alias.lower()
-    try:
-        return config[alias_key]
-    except KeyError as e:
+    encoding = get_alias_index(user_config).lookup(model_alias)
+    if encoding is None:
         # Unknown alias
-        raise ValueError(f"Unknown model alias: {model_alias}") from e
+        raise ValueError(f"Unknown model alias: {model_alias}")
+    return encoding
 
 
 def get_tiktoken_encoder(encoding_name: str) -> Encoding:
@@ -93,7 +390,8 @@ def get_tiktoken_encoder(encoding_name: str) -> Encoding:
     Retrieve a tiktoken Encoding instance for the given encoding name.
 
     Purpose:
-        Wrap tiktoken.get_encoding, adding context to errors.
+        Serve encoders from the process-wide registry, loading them through
+        tiktoken only on a cache miss and adding context to errors.
 
     Args:
         encoding_name (str): Name of the tiktoken encoding (e.g., 'cl100k_base').
@@ -105,17 +403,68 @@ def get_tiktoken_encoder(encoding_name: str) -> Encoding:
         ValueError: If the encoding_name is not recognized by tiktoken.
 
     Side effects:
-        None
+        May load the encoding and evict the least recently used one.
     """
-    try:
-        return tiktoken.get_encoding(encoding_name)
-    except KeyError as e:
-        # Specific failure when encoding name is not found
-        raise ValueError(
-            f"Failed to load tiktoken encoding '{encoding_name}': {e}"
-        ) from e
-    except Exception as e:
-        # Any other error from tiktoken
-        raise ValueError(
-            f"Failed to load tiktoken encoding '{encoding_name}': {e}"
-        ) from e
+    return _ENCODER_REGISTRY.get(encoding_name)
+
+
+def peek_tiktoken_encoder(encoding_name: str) -> Optional[Encoding]:
+    """
+    Return the encoder for `encoding_name` only if it is loaded already.
+
+    Purpose:
+        Non-blocking counterpart of `get_tiktoken_encoder` for callers that
+        must not load vocabularies or wait on the registry lock (asyncio code).
+
+    Returns:
+        Optional[Encoding]: The encoder, or None if it is not loaded (or the
+        registry is busy).
+    """
+    return _ENCODER_REGISTRY.peek(encoding_name)
+
+
+def preload(encoding_names: Iterable[str]) -> None:
+    """
+    Load the given encodings into the registry ahead of the first request.
+
+    Args:
+        encoding_names (Iterable[str]): Encoding names to warm up.
+
+    Raises:
+        ValueError: If any encoding cannot be loaded.
+
+    Side effects:
+        Loads encoders; may evict others when more names than capacity are given.
+    """
+    for name in encoding_names:
+        get_tiktoken_encoder(name)
+
+
+def evict(encoding_name: Optional[str] = None) -> int:
+    """
+    Remove an encoder (or every encoder when no name is given) from the registry.
+
+    Args:
+        encoding_name (Optional[str]): Encoding to drop; None drops all.
+
+    Returns:
+        int: Number of encoders removed.
+    """
+    return _ENCODER_REGISTRY.evict(encoding_name)
+
+
+def set_encoder_cache_size(maxsize: int) -> None:
+    """
+    Change how many encoders the registry keeps alive.
+
+    Raises:
+        ValueError: If `maxsize` is lower than 1.
+    """
+    _ENCODER_REGISTRY.resize(maxsize)
+
+
+def encoder_cache_info() -> EncoderCacheInfo:
+    """
+    Return hit/miss/eviction/load-time counters of the encoder registry.
+    """
+    return _ENCODER_REGISTRY.info()
@@ -0,0 +1,559 @@
+"""
+ai_token_counter.tokenizers.estimator module.
+
+Purpose:
+    Fast token estimates with upper bounds, for admission control on
+    payloads too large to encode on the request path.
+
+    `estimate_tokens` evaluates a per-encoding linear model over cheap
+    features of the UTF-8 bytes: character-class counts (ASCII letters,
+    digits, spaces, line breaks, punctuation; 2-, 3- and 4-byte characters,
+    i.e. roughly Latin/Cyrillic, CJK, emoji), non-whitespace runs and
+    doubled spaces. All of them come from one `bytes.translate` and a few
+    C-level counts. Texts longer than `SAMPLE_THRESHOLD` characters are
+    measured on `SAMPLE_WINDOWS` evenly spaced windows and scaled, so the
+    cost does not grow with the input.
+
+Bounds:
+    `upper_bound` is a calibrated estimate, not a guarantee: it is
+    `estimate * upper_ratio + upper_margin`, with the ratio and margin
+    chosen at calibration so that no calibration sample exceeds it. Text
+    unlike the calibration corpus can exceed it, and so can a sampled input
+    whose unsampled parts differ from its windows. `hard_bound` holds for
+    every input: a byte-level BPE token covers at least one UTF-8 byte, so
+    tokens <= bytes (<= 4 per character when the byte length is not
+    measured). `upper_bound` never exceeds `hard_bound`. Admission control
+    that must never let an over-budget payload through should compare
+    `hard_bound`; `upper_bound` suits callers that can tolerate a rare miss
+    (or count exactly when it is close to the budget).
+
+Calibration:
+    The shipped coefficients are conservative priors. `calibrate` refits a
+    model from a local corpus against exact counts and stores it as JSON in
+    `default_model_dir()`, where `load_model` finds it.
+
+Example:
+    >>> estimate_tokens(payload, "o200k_base")
+    TokenEstimate(tokens=512034, upper_bound=563712, hard_bound=2097152, ...)
+"""
+
+from dataclasses import asdict, dataclass, replace
+from functools import lru_cache
+import json
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+MODEL_VERSION = 1
+
+# Texts longer than this many characters are measured on sample windows
+SAMPLE_THRESHOLD = 16 << 10
+
+# Number and length (characters) of the sample windows
+SAMPLE_WINDOWS = 16
+SAMPLE_WINDOW = 512
+
+# Features, in the order of `EstimatorModel.weights`
+FEATURES = (
+    "letters",
+    "digits",
+    "spaces",
+    "breaks",
+    "punctuation",
+    "chars2",
+    "chars3",
+    "chars4",
+    "words",
+    "double_spaces",
+)
+
+# Window lengths (characters) cut from the corpus by `calibrate`
+CALIBRATION_SIZES = (64, 256, 1 << 10, 4 << 10, 16 << 10, 64 << 10, 256 << 10)
+
+# Windows of each length taken from one corpus file
+CALIBRATION_WINDOWS = 8
+
+# Relative headroom added to the calibrated upper ratio
+UPPER_SAFETY = 0.02
+
+# Minimum constant term of the upper bound
+UPPER_MARGIN = 4.0
+
+# Samples with at least this many tokens set the calibrated upper ratio; the
+# constant term then absorbs the larger relative errors of short samples
+RATIO_MIN_TOKENS = 256
+
+# Strength of the pull towards the prior weights while fitting
+_RIDGE = 1e-3
+
+# Класс каждого байта: индекс признака (0..7) или 8 для байтов продолжения
+_CLASS_TABLE = bytearray([8]) * 256
+for _byte in range(128):
+    _char = chr(_byte)
+    if _char.isalpha():
+        _CLASS_TABLE[_byte] = 0
+    elif _char.isdigit():
+        _CLASS_TABLE[_byte] = 1
+    elif _char == " ":
+        _CLASS_TABLE[_byte] = 2
+    elif _char.isspace():
+        _CLASS_TABLE[_byte] = 3
+    else:
+        _CLASS_TABLE[_byte] = 4
+for _byte in range(0xC0, 0x100):
+    _CLASS_TABLE[_byte] = 5 if _byte < 0xE0 else 6 if _byte < 0xF0 else 7
+_CLASS_TABLE = bytes(_CLASS_TABLE)
+# Пробельные байты -> b" ", прочие -> b"x": слова считаются по переходам " x"
+_RUN_TABLE = bytes(
+    32 if byte < 128 and chr(byte).isspace() else 120 for byte in range(256)
+)
+
+
+@dataclass(frozen=True)
+class EstimatorModel:
+    """
+    Linear token model of one encoding.
+
+    Attributes:
+        encoding (str): Encoding name.
+        weights (Tuple[float, ...]): One weight per entry of `FEATURES`.
+        intercept (float): Constant term.
+        upper_ratio (float): Multiplier of the estimate in the upper bound.
+        upper_margin (float): Constant term of the upper bound.
+        samples (int): Calibration samples (0 for the shipped priors).
+    """
+
+    encoding: str
+    weights: Tuple[float, ...]
+    intercept: float = 0.0
+    upper_ratio: float = 1.5
+    upper_margin: float = UPPER_MARGIN
+    samples: int = 0
+
+    def predict(self, features: Sequence[float]) -> float:
+        """Return the estimated token count for a feature vector."""
+        return self.intercept + sum(
+            weight * value for weight, value in zip(self.weights, features)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the model as a JSON-serialisable dictionary."""
+        data = asdict(self)
+        data["version"] = MODEL_VERSION
+        data["features"] = list(FEATURES)
+        data["weights"] = list(self.weights)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EstimatorModel":
+        """
+        Build a model from `to_dict` output.
+
+        Raises:
+            ValueError: If the data has another version or feature set.
+        """
+        if data.get("version") != MODEL_VERSION or data.get("features") != list(
+            FEATURES
+        ):
+            raise ValueError("Unsupported estimator model format.")
+        return cls(
+            encoding=data["encoding"],
+            weights=tuple(float(weight) for weight in data["weights"]),
+            intercept=float(data["intercept"]),
+            upper_ratio=float(data["upper_ratio"]),
+            upper_margin=float(data["upper_margin"]),
+            samples=int(data["samples"]),
+        )
+
+
+# Априорные коэффициенты: 0.1 токена на лишний пробел в отступах, ~1 токен на
+# символ CJK, 2 на эмодзи и т.д.; калибровка заменяет их подогнанными
+_PRIOR_WEIGHTS = {
+    "cl100k_base": (0.06, 0.34, 0.0, 0.5, 0.6, 0.3, 0.9, 2.0, 1.0, 0.1),
+    "o200k_base": (0.05, 0.34, 0.0, 0.5, 0.6, 0.12, 0.7, 1.5, 1.0, 0.1),
+}
+# Старые кодировки (r50k, p50k, gpt2) хуже сжимают пробелы и не-латиницу
+_GENERIC_WEIGHTS = (0.08, 0.5, 0.0, 1.0, 0.7, 0.6, 1.5, 2.5, 1.0, 0.5)
+
+
+@dataclass(frozen=True)
+class TokenEstimate:
+    """
+    Result of `estimate_tokens`.
+
+    Attributes:
+        tokens (int): Estimated token count.
+        upper_bound (int): Calibrated estimate of an upper bound
+            (<= `hard_bound`); inputs unlike the calibration samples may
+            exceed it.
+        hard_bound (int): Bound that holds for every input; use it when
+            the bound must be guaranteed.
+        encoding (str): Encoding name.
+        sampled (bool): True if the features were measured on sample windows.
+    """
+
+    tokens: int
+    upper_bound: int
+    hard_bound: int
+    encoding: str
+    sampled: bool
+
+
+def prior_model(encoding_name: str) -> EstimatorModel:
+    """
+    Return the shipped (uncalibrated) model of an encoding.
+    """
+    return EstimatorModel(
+        encoding=encoding_name,
+        weights=_PRIOR_WEIGHTS.get(encoding_name, _GENERIC_WEIGHTS),
+    )
+
+
+def default_model_dir() -> Path:
+    """
+    Return the directory of calibrated models.
+
+    $AI_TOKEN_COUNTER_ESTIMATOR_DIR if set, else ai-token-counter/estimator
+    under $XDG_DATA_HOME (default ~/.local/share).
+    """
+    explicit = os.environ.get("AI_TOKEN_COUNTER_ESTIMATOR_DIR")
+    if explicit:
+        return Path(explicit)
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(
+        Path.home(), ".local", "share"
+    )
+    return Path(base) / "ai-token-counter" / "estimator"
+
+
+def model_path(
+    encoding_name: str, directory: Optional[Union[str, Path]] = None
+) -> Path:
+    """
+    Return the file path of an encoding's calibrated model.
+    """
+    if directory is None:
+        directory = default_model_dir()
+    return Path(directory) / f"{encoding_name}.json"
+
+
+@lru_cache(maxsize=None)
+def load_model(encoding_name: str, directory: Optional[str] = None) -> EstimatorModel:
+    """
+    Return the calibrated model of an encoding, or its prior if there is none.
+
+    Raises:
+        ValueError: If the stored model file is invalid.
+    """
+    path = model_path(encoding_name, directory)
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except FileNotFoundError:
+        return prior_model(encoding_name)
+    except ValueError as e:
+        raise ValueError(f"Invalid estimator model '{path}': {e}") from e
+    try:
+        return EstimatorModel.from_dict(data)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid estimator model '{path}': {e}") from e
+
+
+def save_model(
+    model: EstimatorModel, directory: Optional[Union[str, Path]] = None
+) -> Path:
+    """
+    Write `model` as JSON (atomically, via rename) and return its path.
+
+    Side effects:
+        Creates the model directory and clears the `load_model` cache.
+    """
+    path = model_path(model.encoding, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(model.to_dict(), handle, indent=2)
+    os.replace(tmp_path, path)
+    load_model.cache_clear()
+    return path
+
+
+def _byte_features(data: bytes) -> List[float]:
+    """
+    Return the feature vector of a UTF-8 byte string.
+    """
+    classes = data.translate(_CLASS_TABLE)
+    counts = [float(classes.count(code)) for code in range(8)]
+    runs = data.translate(_RUN_TABLE)
+    counts.append(float(runs.count(b" x") + runs.startswith(b"x")))
+    counts.append(float(data.count(b"  ")))
+    return counts
+
+
+def _encode(text: str) -> bytes:
+    # Одиночные суррогаты tiktoken заменяет на U+FFFD: тоже три байта
+    return text.encode("utf-8", "surrogatepass")
+
+
+def extract_features(text: str) -> Tuple[List[float], bool]:
+    """
+    Measure the model features of a text.
+
+    Returns:
+        Tuple[List[float], bool]: Features (see `FEATURES`) and whether they
+        were scaled up from sample windows.
+    """
+    if len(text) <= SAMPLE_THRESHOLD:
+        return _byte_features(_encode(text)), False
+    step = len(text) // SAMPLE_WINDOWS
+    sample = b"".join(
+        _encode(text[start : start + SAMPLE_WINDOW])
+        for start in range(0, step * SAMPLE_WINDOWS, step)
+    )
+    scale = len(text) / (SAMPLE_WINDOWS * SAMPLE_WINDOW)
+    return [value * scale for value in _byte_features(sample)], True
+
+
+def estimate_tokens(
+    text: str, encoding_name: str, model: Optional[EstimatorModel] = None
+) -> TokenEstimate:
+    """
+    Estimate the token count of a text without encoding it.
+
+    Purpose:
+        Constant-time (for large inputs) counterpart of
+        `count_tokens_tiktoken` for admission control; special tokens are
+        not checked.
+
+    Args:
+        text (str): The input text.
+        encoding_name (str): Name of the tiktoken encoding.
+        model (Optional[EstimatorModel]): Model to use; default `load_model`.
+
+    Returns:
+        TokenEstimate: Estimate, calibrated (not guaranteed) upper bound
+        and hard bound.
+
+    Raises:
+        TypeError: If `text` is not a str.
+        ValueError: If the stored model of the encoding is invalid.
+    """
+    if not isinstance(text, str):
+        raise TypeError(f"Unsupported text type: {type(text)}")
+    if model is None:
+        model = load_model(encoding_name)
+    features, sampled = extract_features(text)
+    if sampled:
+        # str.isascii() не просматривает строку: CPython хранит этот признак
+        hard_bound = len(text) if text.isascii() else 4 * len(text)
+    else:
+        # Длина в байтах: ASCII по одному, многобайтовые по ведущему байту
+        hard_bound = int(
+            sum(features[:5]) + sum(n * features[n + 3] for n in (2, 3, 4))
+        )
+    if not text:
+        return TokenEstimate(0, 0, 0, encoding_name, sampled)
+    estimate = max(model.predict(features), 1.0)
+    upper = math.ceil(estimate * model.upper_ratio + model.upper_margin)
+    return TokenEstimate(
+        tokens=min(round(estimate), hard_bound),
+        upper_bound=min(upper, hard_bound),
+        hard_bound=hard_bound,
+        encoding=encoding_name,
+        sampled=sampled,
+    )
+
+
+def fit_model(
+    encoding_name: str,
+    samples: Sequence[Tuple[str, int]],
+    prior: Optional[EstimatorModel] = None,
+) -> EstimatorModel:
+    """
+    Fit a model to (text, exact token count) samples.
+
+    Purpose:
+        Least squares on relative error (each sample is weighted by
+        1 / count), with a light pull towards `prior` so features absent
+        from the corpus keep their prior weights. The upper ratio is the
+        smallest one that bounds every sample of at least
+        `RATIO_MIN_TOKENS` tokens, plus `UPPER_SAFETY`; the upper margin is
+        then raised until the bound covers every sample.
+
+    Returns:
+        EstimatorModel: The fitted model.
+
+    Raises:
+        ValueError: If there are no samples with tokens.
+    """
+    if prior is None:
+        prior = prior_model(encoding_name)
+    rows = []
+    for text, count in samples:
+        if count > 0:
+            features, _ = extract_features(text)
+            rows.append((features, count))
+    if not rows:
+        raise ValueError("Calibration needs at least one non-empty sample.")
+
+    solution = _least_squares(rows, list(prior.weights) + [prior.intercept])
+    model = EstimatorModel(
+        encoding=encoding_name,
+        weights=tuple(solution[:-1]),
+        intercept=solution[-1],
+        samples=len(rows),
+    )
+    predicted = [(max(model.predict(features), 1.0), count) for features, count in rows]
+    # Отношение задают крупные выборки, запас покрывает мелкие
+    large = [pair for pair in predicted if pair[1] >= RATIO_MIN_TOKENS] or predicted
+    ratio = max(1.0, max(count / estimate for estimate, count in large))
+    ratio *= 1.0 + UPPER_SAFETY
+    margin = max(count - estimate * ratio for estimate, count in predicted)
+    return replace(
+        model, upper_ratio=ratio, upper_margin=max(UPPER_MARGIN, math.ceil(margin))
+    )
+
+
+def _least_squares(
+    rows: List[Tuple[List[float], int]], initial: List[float]
+) -> List[float]:
+    """
+    Return weights (intercept last) minimising the squared relative error,
+    regularised towards `initial`.
+    """
+    size = len(initial)
+    gram = [[0.0] * size for _ in range(size)]
+    moment = [0.0] * size
+    for features, count in rows:
+        vector = [value / count for value in features] + [1.0 / count]
+        for i, left in enumerate(vector):
+            moment[i] += left
+            for j, right in enumerate(vector):
+                gram[i][j] += left * right
+    for i in range(size):
+        ridge = _RIDGE * gram[i][i] + 1e-9
+        gram[i][i] += ridge
+        moment[i] += ridge * initial[i]
+    return _solve(gram, moment)
+
+
+def _solve(matrix: List[List[float]], vector: List[float]) -> List[float]:
+    """
+    Solve a small linear system by Gaussian elimination with partial pivoting.
+    """
+    size = len(vector)
+    rows = [row[:] + [value] for row, value in zip(matrix, vector)]
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda row, c=column: abs(rows[row][c]))
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        head = rows[column]
+        for row in rows[column + 1 :]:
+            factor = row[column] / head[column]
+            for k in range(column, size + 1):
+                row[k] -= factor * head[k]
+    solution = [0.0] * size
+    for column in reversed(range(size)):
+        head = rows[column]
+        tail = sum(head[k] * solution[k] for k in range(column + 1, size))
+        solution[column] = (head[size] - tail) / head[column]
+    return solution
+
+
+def relative_errors(
+    model: EstimatorModel, samples: Iterable[Tuple[str, int]]
+) -> Tuple[List[float], int]:
+    """
+    Return the relative errors of `model` on samples and the number of
+    samples whose count exceeds the upper bound.
+    """
+    errors = []
+    violations = 0
+    for text, count in samples:
+        if count <= 0:
+            continue
+        estimate = estimate_tokens(text, model.encoding, model)
+        errors.append((estimate.tokens - count) / count)
+        violations += count > estimate.upper_bound
+    return errors, violations
+
+
+def error_summary(errors: Sequence[float]) -> Dict[str, float]:
+    """
+    Summarise relative errors: mean absolute error and absolute percentiles.
+    """
+    if not errors:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0, "bias": 0.0}
+    magnitudes = sorted(abs(error) for error in errors)
+
+    def percentile(fraction: float) -> float:
+        return magnitudes[min(len(magnitudes) - 1, int(fraction * len(magnitudes)))]
+
+    return {
+        "mean": sum(magnitudes) / len(magnitudes),
+        "p50": percentile(0.5),
+        "p95": percentile(0.95),
+        "max": magnitudes[-1],
+        "bias": sum(errors) / len(errors),
+    }
+
+
+def corpus_samples(
+    texts: Iterable[str], sizes: Sequence[int] = CALIBRATION_SIZES
+) -> List[str]:
+    """
+    Cut calibration windows of every length in `sizes` from corpus texts.
+
+    Up to `CALIBRATION_WINDOWS` evenly spaced windows of each length are
+    taken per text; a text shorter than the largest length is also used whole.
+    """
+    windows = []
+    for text in texts:
+        for size in sizes:
+            if len(text) < size:
+                continue
+            count = min(CALIBRATION_WINDOWS, len(text) // size)
+            step = (len(text) - size) // max(count - 1, 1)
+            windows.extend(text[i * step : i * step + size] for i in range(count))
+        if text and len(text) < sizes[-1]:
+            windows.append(text)
+    return windows
+
+
+def calibrate(
+    encoding_names: Sequence[str],
+    texts: Sequence[str],
+    directory: Optional[Union[str, Path]] = None,
+) -> List[Tuple[EstimatorModel, Path, Dict[str, float]]]:
+    """
+    Refit and store the models of encodings against a local corpus.
+
+    Args:
+        encoding_names (Sequence[str]): Encodings to calibrate.
+        texts (Sequence[str]): Corpus texts; windows are cut with
+            `corpus_samples` and counted exactly.
+        directory (Optional[str | Path]): Model directory (default
+            `default_model_dir()`).
+
+    Returns:
+        List[Tuple[EstimatorModel, Path, Dict[str, float]]]: Per encoding,
+        the model, the file it was written to and `error_summary` of its
+        errors on the corpus.
+
+    Raises:
+        ValueError: If an encoding is unknown or the corpus has no tokens.
+
+    Side effects:
+        Writes one JSON file per encoding.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from ai_token_counter.tokenizer_factory import get_tiktoken_encoder
+
+    windows = corpus_samples(texts)
+    results = []
+    for encoding_name in encoding_names:
+        encoder = get_tiktoken_encoder(encoding_name)
+        samples = [(window, len(encoder.encode_ordinary(window))) for window in windows]
+        model = fit_model(encoding_name, samples)
+        errors, _ = relative_errors(model, samples)
+        results.append((model, save_model(model, directory), error_summary(errors)))
+    return results
@@ -5,8 +5,15 @@ Purpose:
     Provides token counting functionality for OpenAI-compatible models
     using the tiktoken library.
 
+    Two counting modes are available: the regular mode calls `Encoding.encode`
+    and measures the resulting id list, while the count-only mode walks the
+    pre-tokenizer pieces and sums per-piece BPE lengths, so memory stays flat
+    regardless of input size.
+
 Dependencies:
     tiktoken
+    regex
+    ai_token_counter.tokenizer_factory.get_tiktoken_encoder
 
 Example:
     >>> from ai_token_counter.tokenizers.openai import count_tokens_tiktoken
@@ -14,11 +21,190 @@ Example:
     2
 """
 
-import tiktoken
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+import regex
 from tiktoken import Encoding
 
+from ai_token_counter.tokenizer_factory import get_tiktoken_encoder
+
+# Inputs at least this many characters long are counted in count-only mode
+# unless the caller asks for a specific mode.
+COUNT_ONLY_THRESHOLD = 1 << 20
+
+
+@lru_cache(maxsize=None)
+def _compile_pattern(pat_str: str) -> "regex.Pattern[str]":
+    """
+    Compile (once) the pre-tokenizer regular expression of an encoding.
+    """
+    return regex.compile(pat_str)
+
+
+def get_pretokenizer_pattern(encoder: Encoding) -> "regex.Pattern[str]":
+    """
+    Return the compiled pre-tokenizer pattern used by `encoder`.
+
+    Purpose:
+        Expose the regex that splits text into pieces before BPE, so callers
+        can cut text only at piece boundaries.
+
+    Args:
+        encoder (Encoding): A tiktoken encoder.
+
+    Returns:
+        regex.Pattern[str]: The compiled pattern.
+    """
+    return _compile_pattern(encoder._pat_str)  # pylint: disable=protected-access
+
+
+def check_special_tokens(encoder: Encoding, text: str) -> None:
+    """
+    Reject text containing special tokens, as `Encoding.encode` does by default.
+
+    Raises:
+        ValueError: If `text` contains a special token of `encoder`.
+    """
+    for token in encoder.special_tokens_set:
+        if token in text:
+            raise ValueError(
+                f"Encountered text corresponding to disallowed special token {token!r}."
+            )
+
+
+def count_pieces(encoder: Encoding, text: str) -> int:
+    """
+    Count tokens by walking pre-tokenizer pieces without building an id list.
+
+    Purpose:
+        Split `text` with the encoding's pre-tokenizer regex and add up the
+        BPE length of every piece. Pieces that are a single vocabulary entry
+        are resolved with a dictionary lookup; only the rest go through BPE.
+
+    Args:
+        encoder (Encoding): A tiktoken encoder.
+        text (str): The input text; special tokens are not checked here.
+
+    Returns:
+        int: Number of ordinary tokens, equal to `len(encoder.encode_ordinary(text))`.
+
+    Side effects:
+        None
+    """
+    # pylint: disable=protected-access
+    ranks = encoder._mergeable_ranks
+    bpe = encoder._core_bpe.encode_single_piece
+    total = 0
+    for match in get_pretokenizer_pattern(encoder).finditer(text):
+        piece = match.group()
+        try:
+            data = piece.encode("utf-8")
+        except UnicodeEncodeError:
+            # Редкий случай одиночных суррогатов; быстрый путь остаётся встроенным
+            data = _piece_bytes(piece)
+        if data in ranks:
+            total += 1
+        else:
+            total += len(bpe(data))
+    return total
+
+
+def encode_piece(encoder: Encoding, piece: str) -> List[int]:
+    """
+    Return the token ids of one pre-tokenizer piece.
+
+    Args:
+        encoder (Encoding): A tiktoken encoder.
+        piece (str): One match of `get_pretokenizer_pattern(encoder)`.
+
+    Returns:
+        List[int]: The ids `Encoding.encode_ordinary` produces for the piece.
+    """
+    # pylint: disable=protected-access
+    data = _piece_bytes(piece)
+    rank = encoder._mergeable_ranks.get(data)
+    if rank is not None:
+        return [rank]
+    return encoder._core_bpe.encode_single_piece(data)
+
+
+def _piece_bytes(piece: str) -> bytes:
+    """
+    UTF-8 bytes of a piece, with the same surrogate fix-up as `Encoding.encode`.
+    """
+    try:
+        return piece.encode("utf-8")
+    except UnicodeEncodeError:
+        return (
+            piece.encode("utf-16", "surrogatepass")
+            .decode("utf-16", "replace")
+            .encode("utf-8")
+        )
+
+
+def count_with_encoder(
+    encoder: Encoding, text: str, count_only: Optional[bool] = None
+) -> int:
+    """
+    Count tokens in `text` with an already loaded encoder.
+
+    Args:
+        encoder (Encoding): A tiktoken encoder.
+        text (str): The input text to tokenize.
+        count_only (Optional[bool]): True forces the count-only mode, False
+            forces `Encoding.encode`; None picks count-only for inputs of at
+            least `COUNT_ONLY_THRESHOLD` characters.
+
+    Returns:
+        int: The number of tokens, identical in both modes.
+
+    Raises:
+        ValueError: If the text contains a special token.
+    """
+    if count_only is None:
+        count_only = len(text) >= COUNT_ONLY_THRESHOLD
+    if not count_only:
+        return len(encoder.encode(text))
+    check_special_tokens(encoder, text)
+    return count_pieces(encoder, text)
+
+
+def count_chunks(encoder: Encoding, chunks: Iterable[str]) -> int:
+    """
+    Count tokens over consecutive chunks of one text.
+
+    Purpose:
+        Sum per-chunk counts for chunks cut at safe points (see
+        `file_utils.iter_source_chunks`), which equals the count of the joined
+        text. Special tokens straddling a chunk boundary are still rejected.
+
+    Args:
+        encoder (Encoding): A tiktoken encoder.
+        chunks (Iterable[str]): Consecutive chunks of the input.
+
+    Returns:
+        int: The total number of tokens.
+
+    Raises:
+        ValueError: If the joined text contains a special token.
+    """
+    overlap = max((len(token) for token in encoder.special_tokens_set), default=1) - 1
+    total = 0
+    tail = ""
+    for chunk in chunks:
+        if overlap and tail:
+            check_special_tokens(encoder, tail + chunk[:overlap])
+        # Фрагменты ограничены по размеру, поэтому обычный encode здесь дешевле
+        total += count_with_encoder(encoder, chunk, count_only=False)
+        if overlap:
+            tail = (tail + chunk[-overlap:])[-overlap:]
+    return total
+
 
-def count_tokens_tiktoken(text: str, encoding_name: str) -> int:
+def count_tokens_tiktoken(
+    text: str, encoding_name: str, count_only: Optional[bool] = None
+) -> int:
     """
     Count the number of tokens in a text using a tiktoken encoding.
 
@@ -29,12 +215,16 @@ def count_tokens_tiktoken(text: str, encoding_name: str) -> int:
     Args:
         text (str): The input text to tokenize.
         encoding_name (str): Name of the tiktoken encoding (e.g., 'cl100k_base').
+        count_only (Optional[bool]): Select the count-only mode, which never
+            materialises the token-id list. None (default) enables it
+            automatically for inputs of `COUNT_ONLY_THRESHOLD` characters or more.
 
     Returns:
         int: The number of tokens produced by encoding the text.
 
     Raises:
-        KeyError: If the specified encoding_name is not recognized by tiktoken.
+        ValueError: If the specified encoding_name is not recognized by tiktoken,
+            or the text contains a special token.
         Exception: Propagates exceptions from the tiktoken library.
 
     Side effects:
@@ -43,8 +233,7 @@ def count_tokens_tiktoken(text: str, encoding_name: str) -> int:
     Assumptions:
         The input text is a UTF-8 encoded Python string.
     """
-    # Получить объект кодировщика по имени кодировки
-    encoder: Encoding = tiktoken.get_encoding(encoding_name)
-    # Закодировать текст в список идентификаторов токенов
-    token_ids: list[int] = encoder.encode(text)
-    return len(token_ids)
+    # Получить объект кодировщика из общего реестра
+    encoder: Encoding = get_tiktoken_encoder(encoding_name)
+    # Подсчитать токены выбранным способом
+    return count_with_encoder(encoder, text, count_only=count_only)
@@ -0,0 +1,213 @@
+"""
+Module: truncation.py
+
+Purpose:
+    Trim text to a token budget with a single encode.
+
+    `truncate_to_tokens` returns the longest prefix (side="end") or suffix
+    (side="start") of a text that fits in `max_tokens` tokens, together with
+    its exact token count. The text is encoded once; the byte length of the
+    kept tokens gives the cut, which is moved to a UTF-8 character and then to
+    a grapheme-cluster boundary so no character, emoji sequence or combining
+    mark is split. The kept text is re-encoded to report its exact count (a
+    cut inside a pre-tokenizer piece may tokenize differently); in the rare
+    case it no longer fits, the cut moves back by the excess and is retried.
+
+    `truncate_batch` does the same for many texts with one encoder and
+    tiktoken's threaded batch encoding.
+
+Example:
+    >>> truncate_to_tokens("Hello brave new world", 2, model_alias="gpt4o")
+    ('Hello brave', 2)
+    >>> truncate_to_tokens("Hello brave new world", 2, side="start", model_alias="gpt4o")
+    (' new world', 2)
+"""
+
+from typing import List, Mapping, Optional, Sequence, Tuple, Union
+
+import regex
+from tiktoken import Encoding
+
+from ai_token_counter.tokenizer_factory import (
+    get_tiktoken_encoder,
+    resolve_encoding_name,
+)
+from ai_token_counter.tokenizers.openai import check_special_tokens
+
+# Sides that can be cut: "end" keeps the prefix, "start" keeps the suffix
+SIDES = ("end", "start")
+
+# Default number of worker threads used by `truncate_batch`
+DEFAULT_NUM_THREADS = 8
+
+# Characters scanned back from a cut to find grapheme-cluster boundaries
+GRAPHEME_WINDOW = 64
+
+_GRAPHEME = regex.compile(r"\X")
+
+
+def truncate_to_tokens(
+    text: str,
+    max_tokens: int,
+    side: str = "end",
+    *,
+    model_alias: Optional[str] = None,
+    encoding_name: Optional[str] = None,
+    config: Optional[Mapping[str, str]] = None,
+) -> Tuple[str, int]:
+    """
+    Return the longest prefix or suffix of `text` that fits in `max_tokens`.
+
+    Args:
+        text (str): The input text.
+        max_tokens (int): Token budget (0 or more).
+        side (str): "end" removes text from the end (keeps a prefix), "start"
+            removes it from the start (keeps a suffix).
+        model_alias (Optional[str]): Case-insensitive alias for the AI model.
+        encoding_name (Optional[str]): Explicit name of the tiktoken encoding.
+        config (Optional[Mapping[str, str]]): Override mapping for model aliases.
+
+    Returns:
+        Tuple[str, int]: The kept text and its exact token count
+        (<= `max_tokens`); `text` itself when it already fits.
+
+    Raises:
+        ValueError: If no encoding is given or it is unknown, `side` or
+            `max_tokens` is invalid, or the text contains a special token.
+    """
+    encoder = _resolve_encoder(max_tokens, side, model_alias, encoding_name, config)
+    check_special_tokens(encoder, text)
+    return _truncate_ids(encoder, text, encoder.encode_ordinary(text), max_tokens, side)
+
+
+def truncate_batch(
+    texts: Sequence[str],
+    max_tokens: int,
+    side: str = "end",
+    *,
+    model_alias: Optional[str] = None,
+    encoding_name: Optional[str] = None,
+    config: Optional[Mapping[str, str]] = None,
+    num_threads: int = DEFAULT_NUM_THREADS,
+) -> Tuple[List[Union[Tuple[str, int], Exception]], str]:
+    """
+    Truncate many texts to the same budget with one encoder.
+
+    Args:
+        texts (Sequence[str]): The input texts.
+        max_tokens (int), side (str): As for `truncate_to_tokens`.
+        model_alias, encoding_name, config: Encoding selection, as for
+            `truncate_to_tokens`.
+        num_threads (int): Threads used by tiktoken's batch encoder.
+
+    Returns:
+        Tuple[List[Tuple[str, int] | Exception], str]: Per-text results in
+        input order (an invalid text holds its TypeError or ValueError) and
+        the encoding name.
+
+    Raises:
+        ValueError: If the encoding, `side`, `max_tokens` or `num_threads` is
+            invalid.
+    """
+    if num_threads < 1:
+        raise ValueError("`num_threads` must be at least 1.")
+    encoder = _resolve_encoder(max_tokens, side, model_alias, encoding_name, config)
+    results: List[Union[Tuple[str, int], Exception, str]] = list(texts)
+    valid: List[int] = []
+    for index, text in enumerate(results):
+        try:
+            if not isinstance(text, str):
+                raise TypeError(f"Unsupported text type: {type(text)}")
+            check_special_tokens(encoder, text)
+        except (TypeError, ValueError) as err:
+            results[index] = err
+            continue
+        valid.append(index)
+    encoded = encoder.encode_ordinary_batch(
+        [results[index] for index in valid], num_threads=num_threads
+    )
+    for index, token_ids in zip(valid, encoded):
+        results[index] = _truncate_ids(
+            encoder, results[index], token_ids, max_tokens, side
+        )
+    return results, encoder.name
+
+
+def _resolve_encoder(
+    max_tokens: int,
+    side: str,
+    model_alias: Optional[str],
+    encoding_name: Optional[str],
+    config: Optional[Mapping[str, str]],
+) -> Encoding:
+    """
+    Validate the common arguments and return the encoder.
+    """
+    if model_alias is None and encoding_name is None:
+        raise ValueError("One of `model_alias` or `encoding_name` must be specified.")
+    if side not in SIDES:
+        raise ValueError(f"`side` must be one of {SIDES}, not {side!r}.")
+    if max_tokens < 0:
+        raise ValueError("`max_tokens` must not be negative.")
+    encoding = resolve_encoding_name(
+        model_alias=model_alias, encoding_name=encoding_name, user_config=config
+    )
+    return get_tiktoken_encoder(encoding)
+
+
+def _truncate_ids(
+    encoder: Encoding, text: str, token_ids: List[int], max_tokens: int, side: str
+) -> Tuple[str, int]:
+    """
+    Cut `text` given its token ids; see `truncate_to_tokens`.
+    """
+    if len(token_ids) <= max_tokens:
+        return text, len(token_ids)
+    # tiktoken заменяет одиночные суррогаты на U+FFFD: тоже три байта
+    data = text.encode("utf-8", "surrogatepass")
+    keep = max_tokens
+    while keep > 0:
+        if side == "end":
+            cut = len(encoder.decode_bytes(token_ids[:keep]))
+            while cut > 0 and data[cut] & 0xC0 == 0x80:
+                cut -= 1
+            offset = len(data[:cut].decode("utf-8", "surrogatepass"))
+            kept = text[: _grapheme_floor(text, offset)]
+        else:
+            cut = len(data) - len(encoder.decode_bytes(token_ids[-keep:]))
+            while cut < len(data) and data[cut] & 0xC0 == 0x80:
+                cut += 1
+            offset = len(text) - len(data[cut:].decode("utf-8", "surrogatepass"))
+            kept = text[_grapheme_ceil(text, offset) :]
+        count = len(encoder.encode_ordinary(kept))
+        if count <= max_tokens:
+            return kept, count
+        keep -= count - max_tokens
+    return "", 0
+
+
+def _grapheme_floor(text: str, offset: int) -> int:
+    """
+    Return the last grapheme-cluster boundary at or before `offset`.
+    """
+    if offset <= 0 or offset >= len(text):
+        return offset
+    start = max(0, offset - GRAPHEME_WINDOW)
+    boundary = start
+    for match in _GRAPHEME.finditer(text, start, offset + 1):
+        if match.end() > offset:
+            break
+        boundary = match.end()
+    return boundary
+
+
+def _grapheme_ceil(text: str, offset: int) -> int:
+    """
+    Return the first grapheme-cluster boundary at or after `offset`.
+    """
+    if offset <= 0 or offset >= len(text):
+        return offset
+    for match in _GRAPHEME.finditer(text, max(0, offset - GRAPHEME_WINDOW)):
+        if match.start() >= offset:
+            return match.start()
+    return len(text)
@@ -0,0 +1,227 @@
+"""
+Module: vocab_store.py
+
+Purpose:
+    Offline store of pre-packed BPE vocabularies.
+
+    `export_vocab` writes an encoding (ranks, special tokens, pre-tokenizer
+    pattern) into a compact binary file; `load_encoding` memory-maps such a
+    file and builds a `tiktoken.Encoding` from it without base64 parsing,
+    hash checks or network access. `tokenizer_factory` consults the store
+    directory before falling back to tiktoken's own loader.
+
+File format (little-endian):
+    magic   8 bytes   b"ATCVOCAB"
+    version uint32
+    hlen    uint32    length of the JSON header
+    header  hlen      {"name", "pat_str", "special_tokens", "count", "blob_size"}
+    padding           to a multiple of 4 bytes
+    offsets uint32 x (count + 1)   start of each token in the blob
+    ranks   uint32 x count
+    blob    blob_size bytes        token byte strings, concatenated
+"""
+
+from array import array
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import tiktoken
+from tiktoken import Encoding
+
+MAGIC = b"ATCVOCAB"
+FORMAT_VERSION = 1
+
+# File name suffix of stored vocabularies: <encoding name><VOCAB_SUFFIX>
+VOCAB_SUFFIX = ".atcv"
+
+_PREFIX = struct.Struct("<8sII")
+
+# Допустимые имена кодировок: имя попадает в путь файла и приходит в том
+# числе из запросов демона, поэтому разделители каталогов и ".." запрещены.
+_NAME_RE = re.compile(r"[A-Za-z0-9_.-]+")
+
+
+def default_vocab_dir() -> Path:
+    """
+    Return the vocabulary store directory.
+
+    $AI_TOKEN_COUNTER_VOCAB_DIR if set, else ai-token-counter/vocab under
+    $XDG_DATA_HOME (default ~/.local/share).
+    """
+    explicit = os.environ.get("AI_TOKEN_COUNTER_VOCAB_DIR")
+    if explicit:
+        return Path(explicit)
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(
+        Path.home(), ".local", "share"
+    )
+    return Path(base) / "ai-token-counter" / "vocab"
+
+
+def vocab_path(
+    encoding_name: str, directory: Optional[Union[str, Path]] = None
+) -> Path:
+    """
+    Return the store file path of an encoding.
+
+    Raises:
+        ValueError: If `encoding_name` is not a plain name of letters, digits,
+            '_', '.' and '-' (or contains '..'), so it cannot leave `directory`.
+    """
+    if not _NAME_RE.fullmatch(encoding_name) or ".." in encoding_name:
+        raise ValueError(f"Invalid encoding name: {encoding_name!r}")
+    if directory is None:
+        directory = default_vocab_dir()
+    return Path(directory) / f"{encoding_name}{VOCAB_SUFFIX}"
+
+
+def write_encoding(encoder: Encoding, path: Union[str, Path]) -> Path:
+    """
+    Write `encoder` to `path` in the store format (atomically, via rename).
+
+    Returns:
+        Path: The written file.
+    """
+    # pylint: disable=protected-access
+    path = Path(path)
+    items = sorted(encoder._mergeable_ranks.items(), key=lambda item: item[1])
+    offsets = array("I", [0])
+    ranks = array("I")
+    for token, rank in items:
+        offsets.append(offsets[-1] + len(token))
+        ranks.append(rank)
+    header = json.dumps(
+        {
+            "name": encoder.name,
+            "pat_str": encoder._pat_str,
+            "special_tokens": encoder._special_tokens,
+            "count": len(items),
+            "blob_size": offsets[-1],
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    if sys.byteorder != "little":
+        offsets.byteswap()
+        ranks.byteswap()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as handle:
+        handle.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+        handle.write(header)
+        handle.write(b"\0" * (-(_PREFIX.size + len(header)) % 4))
+        offsets.tofile(handle)
+        ranks.tofile(handle)
+        handle.write(b"".join(token for token, _ in items))
+    os.replace(tmp_path, path)
+    return path
+
+
+def export_vocab(
+    encoding_names: List[str], directory: Optional[Union[str, Path]] = None
+) -> List[Path]:
+    """
+    Export tiktoken encodings into the vocabulary store.
+
+    Purpose:
+        Load each encoding through tiktoken (which may download it) and write
+        it to `directory`, so that later loads need neither parsing nor network.
+
+    Args:
+        encoding_names (List[str]): Encodings to export (e.g. 'cl100k_base').
+        directory (Optional[str | Path]): Store directory; None uses the default.
+
+    Returns:
+        List[Path]: Written files, in input order.
+
+    Raises:
+        ValueError: If an encoding cannot be loaded through tiktoken.
+        OSError: If a file cannot be written.
+    """
+    paths = []
+    for name in encoding_names:
+        try:
+            encoder = tiktoken.get_encoding(name)
+        except Exception as e:
+            raise ValueError(f"Failed to load tiktoken encoding '{name}': {e}") from e
+        paths.append(write_encoding(encoder, vocab_path(name, directory)))
+    return paths
+
+
+def list_vocab(directory: Optional[Union[str, Path]] = None) -> List[str]:
+    """
+    Return the names of the encodings present in the store, sorted.
+    """
+    if directory is None:
+        directory = default_vocab_dir()
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    return sorted(
+        path.name[: -len(VOCAB_SUFFIX)] for path in directory.glob(f"*{VOCAB_SUFFIX}")
+    )
+
+
+def load_encoding(path: Union[str, Path]) -> Encoding:
+    """
+    Build a tiktoken Encoding from a store file.
+
+    Args:
+        path (str | Path): File written by `write_encoding`.
+
+    Returns:
+        Encoding: The encoder.
+
+    Raises:
+        ValueError: If the file is not a valid store file of this version.
+        OSError: If the file cannot be read.
+    """
+    with open(path, "rb") as handle, mmap.mmap(
+        handle.fileno(), 0, access=mmap.ACCESS_READ
+    ) as data:
+        header, ranks = _read_store(data, str(path))
+    return Encoding(
+        header["name"],
+        pat_str=header["pat_str"],
+        mergeable_ranks=ranks,
+        special_tokens=header["special_tokens"],
+    )
+
+
+def _read_store(data: mmap.mmap, src: str) -> tuple:
+    """
+    Parse a mapped store file into its header and the rank dictionary.
+    """
+    if len(data) < _PREFIX.size:
+        raise ValueError(f"Not a vocabulary store file: {src}")
+    magic, version, header_len = _PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"Not a vocabulary store file: {src}")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported vocabulary store version {version}: {src}")
+    start = _PREFIX.size
+    try:
+        header = json.loads(data[start : start + header_len])
+        count, blob_size = header["count"], header["blob_size"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Corrupt vocabulary store header in {src}: {e}") from e
+    start += header_len + (-(start + header_len) % 4)
+    blob_start = start + 4 * (2 * count + 1)
+    if len(data) != blob_start + blob_size:
+        raise ValueError(f"Truncated or corrupt vocabulary store file: {src}")
+
+    numbers = array("I")
+    numbers.frombytes(data[start:blob_start])
+    if sys.byteorder != "little":
+        numbers.byteswap()
+    blob = data[blob_start:]
+    ranks: Dict[bytes, int] = {
+        blob[numbers[index] : numbers[index + 1]]: numbers[count + 1 + index]
+        for index in range(count)
+    }
+    return header, ranks
@@ -0,0 +1,16 @@
+"""
+Package: benchmarks
+
+Purpose:
+    Performance benchmarks for ai_token_counter (not installed with the package).
+
+    - corpora.py: deterministic synthetic corpora (prose, code, CJK, emoji,
+      whitespace) of any size, written to disk once and reused.
+    - runner.py: times `count_tokens`, `count_tokens_tiktoken` and the CLI for
+      every configured encoding and writes the results as JSON.
+    - compare.py: compares two result files and flags regressions.
+
+Usage:
+    python -m benchmarks run --sizes 1K,1M,64M -o results.json
+    python -m benchmarks compare baseline.json results.json --threshold 0.1
+"""
@@ -0,0 +1,109 @@
+"""
+Entry point for `python -m benchmarks` (subcommands: run, compare, estimate).
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+from typing import Optional, Sequence
+
+from benchmarks.compare import DEFAULT_THRESHOLD, compare_results, format_rows
+from benchmarks.corpora import CORPUS_KINDS, parse_size
+
+
+def _split(value: str) -> list:
+    return [item for item in value.split(",") if item]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Run benchmarks or compare result files.
+
+    Returns:
+        int: Exit code; `compare` returns 1 when a regression is found.
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmark matrix.")
+    run.add_argument("--sizes", default="1K,64K,1M", help="e.g. 1K,1M,64M,1G")
+    run.add_argument("--corpora", default=",".join(CORPUS_KINDS))
+    run.add_argument("--encodings", default="", help="Default: every configured one.")
+    run.add_argument("--targets", default="api,tiktoken,cli")
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument(
+        "--corpus-dir",
+        default=str(Path(tempfile.gettempdir()) / "ai-token-counter-corpora"),
+    )
+    run.add_argument(
+        "-o", "--output", default="-", help="JSON output file ('-': stdout)."
+    )
+
+    estimate = commands.add_parser(
+        "estimate", help="Speed and error of the token estimator."
+    )
+    estimate.add_argument("--sizes", default="1K,64K,1M")
+    estimate.add_argument("--corpora", default=",".join(CORPUS_KINDS))
+    estimate.add_argument(
+        "--encodings", default="", help="Default: every configured one."
+    )
+    estimate.add_argument("--repeat", type=int, default=3)
+    estimate.add_argument(
+        "--calibrate",
+        action="store_true",
+        help="Fit the models on held-out corpora before measuring.",
+    )
+    estimate.add_argument(
+        "-o", "--output", default="-", help="JSON output file ('-': stdout)."
+    )
+
+    compare = commands.add_parser("compare", help="Flag regressions between two runs.")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        with open(args.current, encoding="utf-8") as handle:
+            current = json.load(handle)
+        rows = compare_results(baseline, current, args.threshold)
+        print(format_rows(rows))
+        return 1 if any(row["regression"] for row in rows) else 0
+
+    # Импорт здесь: `compare` не должен загружать tiktoken
+    # pylint: disable=import-outside-toplevel
+    if args.command == "estimate":
+        from benchmarks.estimator import run_estimator_benchmark
+
+        report = run_estimator_benchmark(
+            sizes=[parse_size(size) for size in _split(args.sizes)],
+            kinds=_split(args.corpora),
+            encodings=_split(args.encodings) or None,
+            repeat=args.repeat,
+            calibrate=args.calibrate,
+        )
+    else:
+        from benchmarks.runner import run_benchmarks
+
+        report = run_benchmarks(
+            corpus_dir=Path(args.corpus_dir),
+            sizes=[parse_size(size) for size in _split(args.sizes)],
+            kinds=_split(args.corpora),
+            encodings=_split(args.encodings) or None,
+            targets=_split(args.targets),
+            repeat=args.repeat,
+        )
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
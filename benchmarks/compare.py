@@ -0,0 +1,79 @@
+"""
+Module: benchmarks/compare.py
+
+Purpose:
+    Compare two benchmark result files and flag regressions.
+
+    Results are matched on (encoding, corpus, size, target); a combination
+    regresses when its median time grows by more than the threshold.
+"""
+
+from typing import Any, Dict, List, Mapping, Tuple
+
+# Default relative slowdown reported as a regression (10 %)
+DEFAULT_THRESHOLD = 0.10
+
+Key = Tuple[str, str, str, str]
+
+
+def _key(result: Mapping[str, Any]) -> Key:
+    return (result["encoding"], result["corpus"], result["size"], result["target"])
+
+
+def compare_results(
+    baseline: Mapping[str, Any],
+    current: Mapping[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """
+    Compare the median times of matching results.
+
+    Args:
+        baseline (Mapping): Result document from `runner.run_benchmarks`.
+        current (Mapping): Result document to check against the baseline.
+        threshold (float): Relative slowdown (0.1 = 10 %) counted as a regression.
+
+    Returns:
+        List[Dict[str, Any]]: One row per common combination with baseline,
+        current, change (relative) and regression (bool).
+    """
+    before = {_key(result): result for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        key = _key(result)
+        if key not in before:
+            continue
+        old = before[key]["median"]
+        new = result["median"]
+        change = (new - old) / old if old > 0 else 0.0
+        rows.append(
+            {
+                "encoding": key[0],
+                "corpus": key[1],
+                "size": key[2],
+                "target": key[3],
+                "baseline": old,
+                "current": new,
+                "change": change,
+                "regression": change > threshold,
+            }
+        )
+    return rows
+
+
+def format_rows(rows: List[Mapping[str, Any]]) -> str:
+    """
+    Render comparison rows as an aligned text table.
+    """
+    lines = [
+        f"{'encoding':<12} {'corpus':<10} {'size':>6} {'target':<8} "
+        f"{'baseline':>10} {'current':>10} {'change':>8}"
+    ]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(
+            f"{row['encoding']:<12} {row['corpus']:<10} {row['size']:>6} "
+            f"{row['target']:<8} {row['baseline']:>10.4f} {row['current']:>10.4f} "
+            f"{row['change']:>+8.1%}{flag}"
+        )
+    return "\n".join(lines)
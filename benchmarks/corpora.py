@@ -0,0 +1,174 @@
+"""
+Module: benchmarks/corpora.py
+
+Purpose:
+    Deterministic synthetic corpora for the benchmarks.
+
+    Every corpus kind is produced by a seeded generator, so the same kind,
+    size and seed always give byte-identical text. Corpora are written in
+    blocks, so multi-gigabyte files never sit in memory.
+"""
+
+import os
+import random
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Tuple, Union
+
+# Size of the text blocks produced by the generators, in characters (approx.)
+BLOCK_CHARS = 1 << 16
+
+_WORDS = (
+    "the of and to in is was for on that with as by at from it an be this are "
+    "which or have had not but were their one all there been has more when will "
+    "would who so no time model token counter request response stream encoding "
+    "latency throughput context window prompt completion document"
+).split()
+
+_CODE_LINES = (
+    "def {name}(self, {arg}: int = {num}) -> Optional[str]:",
+    "    if {arg} is None or {arg} < {num}:",
+    "        return self._{name}.get({arg!r}, None)",
+    '    logger.debug("{name}: %s", {arg})',
+    "    for index, item in enumerate(self.{name}s):",
+    "        result[{num}] = item.{arg} + 0x{num:04x}",
+    "}} else if ({arg} != {num}) {{ {name}({arg}, &buf[{num}]); }}",
+    "    # TODO({name}): handle {arg} overflow past {num}",
+    "",
+)
+
+_CJK = (
+    "的一是不了人我在有他这中大来上国个到说们为子和你地出道也时年得就那要下以生会自着去之过家学对"
+    "可她里后小么心多天而能好都然没日于起还发成事只作当想看文无开手十用主行方又如前所本见经头面"
+    "日本語のテキストとひらがなカタカナ한국어문장입니다"
+)
+
+_EMOJI = "😀😂🥲😍🤖🎉🔥✨👍🏽👨‍👩‍👧‍👦🇺🇦🇯🇵❤️‍🔥🧑🏿‍💻🚀🌍"
+
+
+def _prose(rng: random.Random) -> str:
+    words = rng.choices(_WORDS, k=rng.randint(8, 24))
+    sentence = " ".join(words).capitalize()
+    return sentence + rng.choice((". ", ". ", "? ", "! ", ".\n\n"))
+
+
+def _code(rng: random.Random) -> str:
+    line = rng.choice(_CODE_LINES)
+    return (
+        line.format(
+            name=rng.choice(_WORDS),
+            arg=rng.choice(_WORDS)[:4] + "_" + str(rng.randint(0, 9)),
+            num=rng.randint(0, 4096),
+        )
+        + "\n"
+    )
+
+
+def _cjk(rng: random.Random) -> str:
+    text = "".join(rng.choices(_CJK, k=rng.randint(10, 40)))
+    return text + rng.choice(("。", "，", "！", "？\n"))
+
+
+def _emoji(rng: random.Random) -> str:
+    parts = rng.choices(_EMOJI, k=rng.randint(1, 6))
+    return "".join(parts) + rng.choice((" ", " ", "", "\n")) + rng.choice(_WORDS) + " "
+
+
+def _whitespace(rng: random.Random) -> str:
+    return (
+        rng.choice(_WORDS)
+        + " " * rng.randint(1, 40)
+        + "\t" * rng.randint(0, 3)
+        + "\n" * rng.randint(0, 4)
+        + " " * rng.randint(0, 12)
+    )
+
+
+GENERATORS: Dict[str, Callable[[random.Random], str]] = {
+    "prose": _prose,
+    "code": _code,
+    "cjk": _cjk,
+    "emoji": _emoji,
+    "whitespace": _whitespace,
+}
+
+CORPUS_KINDS: Tuple[str, ...] = tuple(GENERATORS)
+
+
+def parse_size(text: str) -> int:
+    """
+    Parse a size such as "512", "1K", "64M" or "1G" (binary units) into bytes.
+    """
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    text = text.strip().upper().removesuffix("B")
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def format_size(size: int) -> str:
+    """
+    Format a byte count with the largest exact binary unit ("1K", "64M", "1G").
+    """
+    for unit, factor in (("G", 1 << 30), ("M", 1 << 20), ("K", 1 << 10)):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{unit}"
+    return str(size)
+
+
+def iter_corpus(kind: str, size: int, seed: int = 0) -> Iterator[bytes]:
+    """
+    Yield UTF-8 blocks of a corpus totalling exactly `size` bytes.
+
+    The final block is cut back to a character boundary, so the total may be
+    a few bytes short of `size` but the output is always valid UTF-8.
+
+    Raises:
+        ValueError: If `kind` is unknown.
+    """
+    if kind not in GENERATORS:
+        raise ValueError(f"Unknown corpus kind: {kind} (choose from {CORPUS_KINDS})")
+    generate = GENERATORS[kind]
+    rng = random.Random(f"{kind}:{seed}")
+    remaining = size
+    while remaining > 0:
+        parts = []
+        length = 0
+        while length < BLOCK_CHARS:
+            part = generate(rng)
+            parts.append(part)
+            length += len(part)
+        block = "".join(parts).encode("utf-8")
+        if len(block) >= remaining:
+            yield block[:remaining].decode("utf-8", "ignore").encode("utf-8")
+            return
+        remaining -= len(block)
+        yield block
+
+
+def generate_text(kind: str, size: int, seed: int = 0) -> str:
+    """
+    Return a corpus of about `size` UTF-8 bytes as a string.
+    """
+    return b"".join(iter_corpus(kind, size, seed)).decode("utf-8")
+
+
+def ensure_corpus(
+    kind: str, size: int, directory: Union[str, Path], seed: int = 0
+) -> Path:
+    """
+    Write a corpus file into `directory` unless it already exists.
+
+    Returns:
+        Path: <directory>/<kind>-<size>-<seed>.txt
+    """
+    directory = Path(directory)
+    path = directory / f"{kind}-{format_size(size)}-{seed}.txt"
+    if path.exists():
+        return path
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as handle:
+        for block in iter_corpus(kind, size, seed):
+            handle.write(block)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,119 @@
+"""
+Module: benchmarks/estimator.py
+
+Purpose:
+    Compare `tokenizers.estimator.estimate_tokens` with exact counting:
+    speed on whole corpora and the relative error distribution on windows of
+    many lengths cut from them (see `estimator.corpus_samples`).
+
+    With `calibrate=True` each encoding is first fitted on corpora generated
+    with another seed, so the errors are measured on held-out text; otherwise
+    the stored (or prior) models are used as they are.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from ai_token_counter.tokenizer_factory import get_tiktoken_encoder
+from ai_token_counter.tokenizers.estimator import (
+    corpus_samples,
+    error_summary,
+    estimate_tokens,
+    fit_model,
+    load_model,
+    relative_errors,
+)
+from ai_token_counter.tokenizers.openai import count_with_encoder
+from benchmarks.corpora import CORPUS_KINDS, format_size, generate_text
+from benchmarks.runner import (
+    DEFAULT_SIZES,
+    RESULT_FORMAT_VERSION,
+    _metadata,
+    _time_calls,
+    configured_encodings,
+)
+
+# Seed of the corpora used to fit models when `calibrate` is set
+CALIBRATION_SEED = 1
+
+
+def run_estimator_benchmark(
+    *,
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    kinds: Sequence[str] = CORPUS_KINDS,
+    encodings: Optional[Iterable[str]] = None,
+    repeat: int = 3,
+    calibrate: bool = False,
+) -> Dict[str, Any]:
+    """
+    Time exact counting against the estimator and measure estimate errors.
+
+    Args:
+        sizes (Sequence[int]): Corpus sizes in bytes.
+        kinds (Sequence[str]): Corpus kinds (see `corpora.CORPUS_KINDS`).
+        encodings (Optional[Iterable[str]]): Encodings; None uses every
+            configured encoding.
+        repeat (int): Timed runs per combination.
+        calibrate (bool): Fit models on held-out corpora first.
+
+    Returns:
+        Dict[str, Any]: {"version", "meta", "results": [...]}; each result has
+        encoding, corpus, size, tokens, estimate, upper_bound, exact_best,
+        estimate_best, speedup, samples, errors (`error_summary`) and
+        violations (windows whose count exceeds the upper bound).
+    """
+    if repeat < 1:
+        raise ValueError("`repeat` must be at least 1.")
+    encodings = list(encodings) if encodings is not None else configured_encodings()
+    texts = {
+        (kind, size): generate_text(kind, size) for kind in kinds for size in sizes
+    }
+    results = []
+    for encoding in encodings:
+        encoder = get_tiktoken_encoder(encoding)
+        model = load_model(encoding)
+        if calibrate:
+            held_out = [
+                generate_text(kind, max(sizes), CALIBRATION_SEED) for kind in kinds
+            ]
+            model = fit_model(
+                encoding,
+                [
+                    (window, len(encoder.encode_ordinary(window)))
+                    for window in corpus_samples(held_out)
+                ],
+            )
+        for (kind, size), text in texts.items():
+            exact = _time_calls(
+                lambda text=text: count_with_encoder(encoder, text), repeat
+            )
+            estimate = estimate_tokens(text, encoding, model)
+            timing = _time_calls(
+                lambda text=text: estimate_tokens(text, encoding, model).tokens,
+                repeat,
+            )
+            windows = corpus_samples([text])
+            errors, violations = relative_errors(
+                model,
+                [(window, len(encoder.encode_ordinary(window))) for window in windows],
+            )
+            results.append(
+                {
+                    "encoding": encoding,
+                    "corpus": kind,
+                    "size": format_size(size),
+                    "tokens": exact["tokens"],
+                    "estimate": estimate.tokens,
+                    "upper_bound": estimate.upper_bound,
+                    "exact_best": exact["best"],
+                    "estimate_best": timing["best"],
+                    "speedup": exact["best"] / timing["best"],
+                    "samples": len(errors),
+                    "errors": error_summary(errors),
+                    "violations": violations,
+                }
+            )
+    return {
+        "version": RESULT_FORMAT_VERSION,
+        "meta": {**_metadata(repeat), "calibrated": calibrate},
+        "results": results,
+    }
@@ -0,0 +1,172 @@
+"""
+Module: benchmarks/runner.py
+
+Purpose:
+    Time the counting entry points on synthetic corpora and collect the
+    results as JSON-serialisable dictionaries.
+
+Targets:
+    api       counter.count_tokens(path, encoding_name=...) on a corpus file
+    tiktoken  tokenizers.openai.count_tokens_tiktoken(text, ...) on text in memory
+    cli       `python -m ai_token_counter --file path --encoding ...` end to end
+"""
+
+import datetime
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from ai_token_counter.counter import count_tokens
+from ai_token_counter.tokenizer_config import TOKENIZER_CONFIG
+from ai_token_counter.tokenizer_factory import get_tiktoken_encoder
+from ai_token_counter.tokenizers.openai import count_tokens_tiktoken
+from benchmarks.corpora import CORPUS_KINDS, ensure_corpus, format_size
+
+TARGETS = ("api", "tiktoken", "cli")
+
+DEFAULT_SIZES = (1 << 10, 64 << 10, 1 << 20)
+
+# In-memory targets skip corpora larger than this (the text would not fit
+# comfortably); file-based targets stream and have no limit.
+MAX_IN_MEMORY_SIZE = 256 << 20
+
+RESULT_FORMAT_VERSION = 1
+
+
+def configured_encodings() -> List[str]:
+    """
+    Return every encoding referenced by the default alias configuration.
+    """
+    return sorted(set(TOKENIZER_CONFIG.values()))
+
+
+def _time_calls(call: Callable[[], int], repeat: int) -> Dict[str, Any]:
+    """
+    Run `call` `repeat` times and summarise the wall times.
+    """
+    times = []
+    tokens = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        tokens = call()
+        times.append(time.perf_counter() - started)
+    return {
+        "tokens": tokens,
+        "times": times,
+        "best": min(times),
+        "median": statistics.median(times),
+    }
+
+
+def _make_call(target: str, path: Path, encoding: str) -> Callable[[], int]:
+    """
+    Build the zero-argument callable timed for one target.
+    """
+    if target == "api":
+        return lambda: count_tokens(str(path), encoding_name=encoding)[0]
+    if target == "tiktoken":
+        text = path.read_text(encoding="utf-8")
+        return lambda: count_tokens_tiktoken(text, encoding)
+    if target == "cli":
+        command = [
+            sys.executable,
+            "-m",
+            "ai_token_counter",
+            "--file",
+            str(path),
+            "--encoding",
+            encoding,
+        ]
+
+        def run_cli() -> int:
+            done = subprocess.run(command, capture_output=True, text=True, check=True)
+            return int(done.stdout.strip())
+
+        return run_cli
+    raise ValueError(f"Unknown benchmark target: {target} (choose from {TARGETS})")
+
+
+def run_benchmarks(
+    *,
+    corpus_dir: Path,
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    kinds: Sequence[str] = CORPUS_KINDS,
+    encodings: Optional[Iterable[str]] = None,
+    targets: Sequence[str] = TARGETS,
+    repeat: int = 3,
+) -> Dict[str, Any]:
+    """
+    Run every (encoding, corpus kind, size, target) combination.
+
+    Args:
+        corpus_dir (Path): Directory where corpora are generated and reused.
+        sizes (Sequence[int]): Corpus sizes in bytes.
+        kinds (Sequence[str]): Corpus kinds (see `corpora.CORPUS_KINDS`).
+        encodings (Optional[Iterable[str]]): Encodings; None uses every
+            configured encoding.
+        targets (Sequence[str]): Subset of `TARGETS`.
+        repeat (int): Timed runs per combination.
+
+    Returns:
+        Dict[str, Any]: {"version", "meta", "results": [...]}; each result has
+        encoding, corpus, size, target, tokens, times, best, median, mb_per_s.
+    """
+    if repeat < 1:
+        raise ValueError("`repeat` must be at least 1.")
+    encodings = list(encodings) if encodings is not None else configured_encodings()
+    results = []
+    for encoding in encodings:
+        # Загрузка словаря не входит в замеры API (CLI платит за неё сам)
+        get_tiktoken_encoder(encoding)
+        for kind in kinds:
+            for size in sizes:
+                path = ensure_corpus(kind, size, corpus_dir)
+                for target in targets:
+                    if target == "tiktoken" and size > MAX_IN_MEMORY_SIZE:
+                        continue
+                    timing = _time_calls(_make_call(target, path, encoding), repeat)
+                    results.append(
+                        {
+                            "encoding": encoding,
+                            "corpus": kind,
+                            "size": format_size(size),
+                            "target": target,
+                            **timing,
+                            "mb_per_s": path.stat().st_size
+                            / (1 << 20)
+                            / timing["best"],
+                        }
+                    )
+    return {
+        "version": RESULT_FORMAT_VERSION,
+        "meta": _metadata(repeat),
+        "results": results,
+    }
+
+
+def _metadata(repeat: int) -> Dict[str, Any]:
+    """
+    Describe the machine and software the benchmarks ran on.
+    """
+    # pylint: disable=import-outside-toplevel
+    from importlib import metadata
+
+    def version(package: str) -> Optional[str]:
+        try:
+            return metadata.version(package)
+        except metadata.PackageNotFoundError:
+            return None
+
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "tiktoken": version("tiktoken"),
+        "ai_token_counter": version("ai-token-counter"),
+        "repeat": repeat,
+    }
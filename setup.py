@@ -12,14 +12,19 @@ setup(
     version="1.0.0",
     author="Alex Pro",
     description="A token counter for AI models utility",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     include_package_data=True,
     install_requires=[
         "tiktoken>=0.4.0",
+        "regex>=2022.1.18",
         "pytest>=7.0.0",
         "black>=23.9.1",
         "pylint>=2.17.5",
     ],
+    extras_require={
+        "analysis": ["numpy>=1.22"],
+        "zstd": ["zstandard>=0.18"],
+    },
     entry_points={
         "console_scripts": [
             "ai-token-counter = ai_token_counter.main:main",
@@ -0,0 +1,182 @@
+"""
+tests/test_aio.py
+
+Purpose:
+    Unit tests for ai_token_counter.aio (asyncio counting API).
+Dependencies:
+    pytest
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ai_token_counter import aio
+from ai_token_counter.counter import count_tokens_batch
+from ai_token_counter.tokenizer_factory import preload
+from ai_token_counter.tokenizers.openai import count_tokens_tiktoken
+
+ENCODING = "cl100k_base"
+SMALL = "Hello async world, привет 😀"
+LARGE = "The event loop must not block on big prompts. " * 2000
+
+
+@pytest.fixture(autouse=True)
+def _restore_settings():
+    saved = dict(aio._SETTINGS)
+    yield
+    aio.configure(**saved)
+
+
+class _AsyncStream:
+    """Асинхронный поток, отдающий байты маленькими кусками."""
+
+    def __init__(self, data, step):
+        self._data = data
+        self._step = step
+
+    async def read(self, size):
+        await asyncio.sleep(0)
+        block, self._data = self._data[: self._step], self._data[self._step :]
+        return block
+
+
+def test_small_text_is_counted_inline(monkeypatch):
+    """
+    Короткий текст с загруженным кодировщиком считается без исполнителя.
+    """
+    preload([ENCODING])
+
+    async def forbidden(*args, **kwargs):
+        raise AssertionError("executor used for a small text")
+
+    monkeypatch.setattr(aio, "_run", forbidden)
+    assert asyncio.run(aio.count_text(SMALL, encoding_name=ENCODING)) == (
+        count_tokens_tiktoken(SMALL, ENCODING),
+        ENCODING,
+    )
+
+
+def test_large_text_path_and_async_stream(tmp_path):
+    """
+    Большой текст, файл и асинхронный поток дают те же числа, что и sync API.
+    """
+    expected = count_tokens_tiktoken(LARGE, ENCODING)
+    path = tmp_path / "big.txt"
+    path.write_text(LARGE, encoding="utf-8")
+    data = (LARGE + SMALL).encode("utf-8")
+
+    async def scenario():
+        return (
+            await aio.count_text(LARGE, model_alias="gpt4"),
+            await aio.count_tokens(path, encoding_name=ENCODING),
+            await aio.count_tokens(_AsyncStream(data, 1001), encoding_name=ENCODING),
+        )
+
+    text_result, path_result, stream_result = asyncio.run(scenario())
+    assert text_result == path_result == (expected, ENCODING)
+    assert stream_result == (count_tokens_tiktoken(LARGE + SMALL, ENCODING), ENCODING)
+
+
+def test_async_stream_byte_at_a_time():
+    """
+    Чтение по одному байту не обрывает поток на середине символа,
+    а CRLF переводится так же, как при чтении файла.
+    """
+    text = "é" * 500
+    stream = _AsyncStream(text.encode("utf-8"), 1)
+    assert asyncio.run(aio.count_tokens(stream, encoding_name=ENCODING)) == (
+        count_tokens_tiktoken(text, ENCODING),
+        ENCODING,
+    )
+    crlf = "line one\r\nline two\r" * 100
+    stream = _AsyncStream(crlf.encode("utf-8"), 7)
+    expected = crlf.replace("\r\n", "\n").replace("\r", "\n")
+    assert asyncio.run(aio.count_tokens(stream, encoding_name=ENCODING)) == (
+        count_tokens_tiktoken(expected, ENCODING),
+        ENCODING,
+    )
+
+
+def test_async_stream_rejects_special_tokens():
+    """
+    Спецтокен в асинхронном потоке вызывает ValueError.
+    """
+    stream = _AsyncStream(b"text <|endoftext|> more", 4)
+    with pytest.raises(ValueError):
+        asyncio.run(aio.count_tokens(stream, encoding_name=ENCODING))
+
+
+def test_count_many_matches_batch():
+    """
+    count_many совпадает с count_tokens_batch, ошибки остаются на местах.
+    """
+    aio.configure(inline_threshold=64)
+    items = [SMALL, LARGE, "", 42, "bad <|endoftext|>"] + [SMALL * 3] * 20
+    results, encoding = asyncio.run(aio.count_many(items, encoding_name=ENCODING))
+    expected, _ = count_tokens_batch(items, encoding_name=ENCODING)
+    assert encoding == ENCODING
+    assert results[:3] == expected[:3] and results[5:] == expected[5:]
+    assert isinstance(results[3], TypeError)
+    assert isinstance(results[4], ValueError)
+
+
+def test_count_many_sources(tmp_path):
+    """
+    count_many с sources=True считает файлы и сообщает об отсутствующих.
+    """
+    path = tmp_path / "a.txt"
+    path.write_text(SMALL, encoding="utf-8")
+    results, _ = asyncio.run(
+        aio.count_many(
+            [path, tmp_path / "missing.txt"], sources=True, model_alias="gpt4"
+        )
+    )
+    assert results[0] == count_tokens_tiktoken(SMALL, ENCODING)
+    assert isinstance(results[1], FileNotFoundError)
+
+
+def test_backpressure_limits_jobs_in_flight(monkeypatch):
+    """
+    Одновременно выполняется не больше max_pending заданий.
+    """
+    aio.configure(max_pending=2, max_workers=4, inline_threshold=0)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow_count(encoder, text, count_only=None):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.pop()
+        return len(text)
+
+    monkeypatch.setattr(aio, "count_with_encoder", slow_count)
+
+    async def scenario():
+        return await asyncio.gather(
+            *(aio.count_text(SMALL, encoding_name=ENCODING) for _ in range(8))
+        )
+
+    results = asyncio.run(scenario())
+    assert [tokens for tokens, _ in results] == [len(SMALL)] * 8
+    assert max(peak) <= 2
+
+
+def test_configure_validation():
+    """
+    Неверные настройки вызывают ValueError.
+    """
+    with pytest.raises(ValueError):
+        aio.configure(max_workers=0)
+    with pytest.raises(ValueError):
+        aio.configure(max_pending=0)
+    with pytest.raises(ValueError):
+        aio.configure(inline_threshold=-1)
+    with pytest.raises(ValueError):
+        asyncio.run(aio.count_text(SMALL))
@@ -0,0 +1,104 @@
+"""
+tests/test_alias_index.py
+
+Purpose:
+    Unit tests for ai_token_counter.alias_index and the memoised alias
+    resolution in ai_token_counter.tokenizer_factory.
+Dependencies:
+    pytest
+"""
+
+import pytest
+
+from ai_token_counter.alias_index import AliasIndex
+from ai_token_counter.tokenizer_factory import (
+    get_alias_index,
+    merge_configs,
+    resolve_encoding_name,
+)
+from ai_token_counter.tokenizer_config import TOKENIZER_CONFIG
+
+
+@pytest.mark.parametrize(
+    "alias, expected",
+    [
+        ("gpt-4o", "o200k_base"),
+        ("GPT-4O", "o200k_base"),
+        ("gpt-4o-2024-08-06", "o200k_base"),
+        ("gpt-4o-mini", "o200k_base"),
+        ("gpt-4-0613", "cl100k_base"),
+        ("gpt-4-turbo-preview", "cl100k_base"),
+        ("gpt-3.5-turbo-16k", "cl100k_base"),
+        ("gpt-4.1", "o200k_base"),
+        ("gpt-4.1-mini-2025-04-14", "o200k_base"),
+        ("gpt-4@latest", "cl100k_base"),
+        ("gpt4o:2024", "o200k_base"),
+    ],
+)
+def test_versioned_aliases(alias, expected):
+    """
+    Версионные имена сопоставляются с самым длинным известным псевдонимом.
+    """
+    assert resolve_encoding_name(model_alias=alias) == expected
+
+
+@pytest.mark.parametrize(
+    "alias",
+    ["gpt-4x", "gpt", "gpt-", "unknown-gpt-4", "gpt-5", "gpt-4-vision", "gpt-4-"],
+)
+def test_prefix_needs_separator(alias):
+    """
+    Префикс засчитывается только перед разделителем и суффиксом версии.
+    """
+    with pytest.raises(ValueError):
+        resolve_encoding_name(model_alias=alias)
+
+
+@pytest.mark.parametrize("alias", ["gpt-4.1", "gpt-4.1-mini", "gpt-4.5-preview"])
+def test_dotted_versions_are_other_models(alias):
+    """
+    "gpt-4.1" — другая модель, а не версия "gpt-4", и не наследует её кодировку.
+    """
+    index = AliasIndex({"gpt-4": "cl100k_base"})
+    assert index.lookup(alias) is None
+    assert index.match_prefix(alias) == (None, None)
+
+
+def test_exact_match_beats_prefix():
+    """
+    Точное совпадение важнее префикса, а пользовательский конфиг — дефолтов.
+    """
+    index = AliasIndex({"m": "a", "m-1": "b"}, {"M-1-X": "c"})
+    assert index.lookup("m-1") == "b"
+    assert index.lookup("m-1-x") == "c"
+    assert index.lookup("m-1-2024-05-13") == "b"
+    assert index.lookup("m-2") == "a"
+    assert index.lookup("m-1-y") is None
+    assert index.match_prefix("m-1@latest") == ("m-1", "b")
+    assert index.lookup("n") is None
+
+
+def test_index_matches_merge_configs():
+    """
+    Индекс содержит то же, что и merge_configs.
+    """
+    user = {"Custom-Model": "o200k_base", "GPT-4": "o200k_base"}
+    assert dict(get_alias_index(user).aliases) == merge_configs(TOKENIZER_CONFIG, user)
+    assert resolve_encoding_name(model_alias="custom-model-v2", user_config=user) == (
+        "o200k_base"
+    )
+
+
+def test_index_is_memoised_by_content():
+    """
+    Равные пользовательские конфиги используют один скомпилированный индекс.
+    """
+    assert get_alias_index() is get_alias_index(None)
+    assert get_alias_index({"x": "cl100k_base"}) is get_alias_index(
+        {"x": "cl100k_base"}
+    )
+    assert get_alias_index({"x": "cl100k_base"}) is not get_alias_index(
+        {"x": "o200k_base"}
+    )
+    with pytest.raises(TypeError):
+        get_alias_index().aliases["new"] = "cl100k_base"
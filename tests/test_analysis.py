@@ -0,0 +1,107 @@
+"""
+tests/test_analysis.py
+
+Purpose:
+    Tests for ai_token_counter.analysis: histograms match exact encoding,
+    totals across chunks and files, and top-token reporting.
+Dependencies:
+    pytest, numpy
+"""
+
+from collections import Counter
+
+import pytest
+
+from ai_token_counter.analysis import analyze_sources, top_tokens
+from ai_token_counter.tokenizer_factory import get_tiktoken_encoder
+
+np = pytest.importorskip("numpy")
+
+TEXT = "Hello world, hello tokens! Ünïcödé и кириллица 中文.\n" * 50
+
+
+def _write(path, text):
+    path.write_bytes(text.encode("utf-8"))
+    return str(path)
+
+
+def test_histogram_matches_encoding(tmp_path):
+    """
+    Гистограмма по кускам совпадает с кодированием всего текста сразу.
+    """
+    encoder = get_tiktoken_encoder("cl100k_base")
+    paths = [_write(tmp_path / "a.txt", TEXT), _write(tmp_path / "b.txt", "x y z")]
+    result = analyze_sources(paths, encoding_name="cl100k_base", block_size=100)
+    expected = np.zeros(encoder.n_vocab, dtype=np.int64)
+    for text in (TEXT, "x y z"):
+        np.add.at(expected, encoder.encode_ordinary(text), 1)
+    assert np.array_equal(result.histogram, expected)
+    assert result.tokens == int(expected.sum())
+    assert result.bytes == len(TEXT.encode("utf-8")) + 5
+    assert result.tokens_per_byte == pytest.approx(result.tokens / result.bytes)
+    assert [stats.tokens for stats in result.files] == [
+        len(encoder.encode_ordinary(TEXT)),
+        3,
+    ]
+    assert result.files[1].bytes == 5
+
+
+WHITESPACE_TEXT = "".join(
+    f"{i:>9}{' ' * (i % 7)}!\t  \n   {i * 7919}" for i in range(300)
+)
+JOINING_TEXT = "🎉中Aß don't camelCaseWord 12345678 'quoted'  " * 40
+
+
+@pytest.mark.parametrize("encoding", ["cl100k_base", "o200k_base"])
+@pytest.mark.parametrize("block_size", [1, 7, 64])
+@pytest.mark.parametrize(
+    "text", [WHITESPACE_TEXT, JOINING_TEXT], ids=["whitespace", "joining"]
+)
+def test_small_blocks_match_whole_encoding(tmp_path, encoding, block_size, text):
+    """
+    При мелких блоках гистограмма совпадает с кодированием файла целиком,
+    в том числе на сериях пробелов, цифр и склеиваемых кусков.
+    """
+    encoder = get_tiktoken_encoder(encoding)
+    path = _write(tmp_path / "a.txt", text)
+    result = analyze_sources([path], encoding_name=encoding, block_size=block_size)
+    expected = np.zeros(encoder.n_vocab, dtype=np.int64)
+    np.add.at(expected, encoder.encode_ordinary(text), 1)
+    assert np.array_equal(result.histogram, expected)
+
+
+def test_top_tokens(tmp_path):
+    """
+    Самые частые токены идут первыми и декодируются.
+    """
+    encoder = get_tiktoken_encoder("cl100k_base")
+    text = "the cat" + " the" * 30 + " cat" * 10 + " dog" * 5
+    result = analyze_sources(
+        [_write(tmp_path / "a.txt", text)], encoding_name="cl100k_base", top=3
+    )
+    counts = Counter(encoder.encode_ordinary(text))
+    expected = sorted(counts, key=lambda token: (-counts[token], token))[:3]
+    assert [stat.token for stat in result.top] == expected
+    assert [stat.count for stat in result.top] == [counts[t] for t in expected]
+    assert result.top[0].text == encoder.decode([expected[0]])
+    assert result.top[0].share == pytest.approx(counts[expected[0]] / result.tokens)
+    assert not top_tokens(encoder, np.zeros(encoder.n_vocab, dtype=np.int64), 5)
+
+
+def test_to_dict_and_validation(tmp_path):
+    """
+    Словарь результата не содержит гистограмму; ошибки входа отклоняются.
+    """
+    paths = [_write(tmp_path / "a.txt", TEXT), _write(tmp_path / "empty.txt", "")]
+    data = analyze_sources(paths, encoding_name="cl100k_base").to_dict()
+    assert "histogram" not in data
+    assert data["files"][1]["tokens"] == 0
+    assert data["distribution"]["tokens"]["max"] == data["files"][0]["tokens"]
+    with pytest.raises(ValueError):
+        analyze_sources(paths)
+    with pytest.raises(ValueError):
+        analyze_sources(paths, encoding_name="cl100k_base", top=-1)
+    with pytest.raises(ValueError):
+        analyze_sources(
+            [_write(tmp_path / "s.txt", "<|endoftext|>")], encoding_name="cl100k_base"
+        )
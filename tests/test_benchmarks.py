@@ -0,0 +1,101 @@
+"""
+tests/test_benchmarks.py
+
+Purpose:
+    Smoke tests for the benchmarks package: deterministic corpora, a tiny
+    benchmark run, regression detection in `compare` and the estimator
+    benchmark.
+Dependencies:
+    pytest
+"""
+
+import json
+
+import pytest
+
+from benchmarks.__main__ import main as benchmarks_main
+from benchmarks.compare import compare_results
+from benchmarks.corpora import (
+    CORPUS_KINDS,
+    ensure_corpus,
+    format_size,
+    generate_text,
+    parse_size,
+)
+from benchmarks.estimator import run_estimator_benchmark
+from benchmarks.runner import run_benchmarks
+
+
+@pytest.mark.parametrize("kind", CORPUS_KINDS)
+def test_corpora_are_deterministic(kind):
+    """
+    Один и тот же вид, размер и seed дают одинаковый текст нужного размера.
+    """
+    text = generate_text(kind, 5000)
+    assert text == generate_text(kind, 5000)
+    assert text != generate_text(kind, 5000, seed=1)
+    assert 4990 < len(text.encode("utf-8")) <= 5000
+
+
+def test_sizes():
+    """
+    Размеры разбираются и форматируются в двоичных единицах.
+    """
+    assert parse_size("1K") == 1024
+    assert parse_size("64mb") == 64 << 20
+    assert parse_size("1G") == 1 << 30
+    assert parse_size("1000") == 1000
+    assert format_size(64 << 20) == "64M"
+    assert format_size(1000) == "1000"
+
+
+def test_run_and_compare(tmp_path, capsys):
+    """
+    Небольшой прогон пишет JSON, а compare находит замедление.
+    """
+    report = run_benchmarks(
+        corpus_dir=tmp_path,
+        sizes=[2048],
+        kinds=["prose", "cjk"],
+        encodings=["cl100k_base"],
+        targets=["api", "tiktoken"],
+        repeat=1,
+    )
+    assert len(report["results"]) == 4
+    by_target = {(r["corpus"], r["target"]): r["tokens"] for r in report["results"]}
+    assert by_target[("prose", "api")] == by_target[("prose", "tiktoken")]
+    assert ensure_corpus("prose", 2048, tmp_path).stat().st_size <= 2048
+
+    slower = json.loads(json.dumps(report))
+    for result in slower["results"]:
+        result["median"] = result["median"] * 2
+    rows = compare_results(report, slower, threshold=0.5)
+    assert rows and all(row["regression"] for row in rows)
+    assert not any(row["regression"] for row in compare_results(slower, report))
+
+    baseline = tmp_path / "baseline.json"
+    current = tmp_path / "current.json"
+    baseline.write_text(json.dumps(report), encoding="utf-8")
+    current.write_text(json.dumps(slower), encoding="utf-8")
+    assert benchmarks_main(["compare", str(baseline), str(current)]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+    assert benchmarks_main(["compare", str(current), str(baseline)]) == 0
+
+
+def test_estimator_benchmark():
+    """
+    Бенчмарк оценщика сообщает ускорение и распределение ошибок.
+    """
+    report = run_estimator_benchmark(
+        sizes=[4096],
+        kinds=["prose", "cjk"],
+        encodings=["cl100k_base"],
+        repeat=1,
+        calibrate=True,
+    )
+    assert report["meta"]["calibrated"]
+    assert len(report["results"]) == 2
+    for result in report["results"]:
+        assert result["speedup"] > 0 and result["samples"] > 0
+        assert set(result["errors"]) == {"mean", "p50", "p95", "max", "bias"}
+        assert result["upper_bound"] >= result["tokens"] or result["violations"]
@@ -0,0 +1,203 @@
+"""
+tests/test_cache.py
+
+Purpose:
+    Unit tests for ai_token_counter.cache and the cached counting path of
+    ai_token_counter.counter.
+Dependencies:
+    pytest
+"""
+
+import io
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from ai_token_counter import counter
+from ai_token_counter.cache import TokenCountCache, hash_text
+from ai_token_counter.counter import count_tokens, count_tokens_files
+
+TEXT = "Hello world, cached tokens are counted once.\n" * 50
+
+
+def _forbid_counting(monkeypatch):
+    """Сделать любой повторный BPE-проход ошибкой теста."""
+
+    def fail(*args, **kwargs):
+        raise AssertionError("BPE pass on a cache hit")
+
+    monkeypatch.setattr(counter, "count_with_encoder", fail)
+    monkeypatch.setattr(counter, "count_chunks", fail)
+
+
+def test_hash_text_ignores_chunking():
+    """
+    Хэш не зависит от разбиения текста на фрагменты.
+    """
+    assert hash_text(TEXT) == hash_text([TEXT[:7], TEXT[7:100], TEXT[100:]])
+    assert hash_text(TEXT) != hash_text(TEXT + " ")
+
+
+def test_get_put_and_lru_eviction(tmp_path):
+    """
+    Записи читаются по (хэш, кодировка); старые вытесняются при переполнении.
+    """
+    with TokenCountCache(tmp_path / "c.sqlite3", max_entries=2) as cache:
+        cache.put("a", "cl100k_base", 1)
+        assert cache.get("a", "cl100k_base") == 1
+        assert cache.get("a", "o200k_base") is None
+        cache.put("b", "cl100k_base", 2)
+        cache.get("a", "cl100k_base")
+        for index in range(300):
+            cache.put(f"x{index}", "cl100k_base", index)
+        assert len(cache) <= 2
+        assert cache.get("x299", "cl100k_base") == 299
+
+
+def test_file_lookups_refresh_lru(tmp_path):
+    """
+    Найденный файл считается недавно использованным и не вытесняется первым.
+    """
+    with TokenCountCache(tmp_path / "c.sqlite3", max_entries=2) as cache:
+        cache.remember_file("/a", 1, 1, "da")
+        cache.remember_file("/b", 1, 1, "db")
+        assert cache.lookup_file("/a", 1, 1) == "da"
+        assert cache.lookup_file("/a", 2, 1) is None
+        for index in range(300):
+            cache.remember_file("/c", 1, index, "dc")
+            assert cache.lookup_file("/a", 1, 1) == "da"
+        assert cache.lookup_file("/b", 1, 1) is None
+        assert cache.lookup_file("/c", 1, 299) == "dc"
+
+
+def test_cache_is_persistent(tmp_path):
+    """
+    Кэш переживает закрытие и повторное открытие базы.
+    """
+    path = tmp_path / "c.sqlite3"
+    with TokenCountCache(path) as cache:
+        cache.put("a", "cl100k_base", 7)
+    with TokenCountCache(path) as cache:
+        assert cache.get("a", "cl100k_base") == 7
+
+
+def test_count_tokens_hit_skips_bpe(tmp_path, monkeypatch):
+    """
+    Повторный подсчёт того же содержимого под другим путём не кодирует текст.
+    """
+    first = tmp_path / "a.txt"
+    second = tmp_path / "b.txt"
+    first.write_text(TEXT, encoding="utf-8")
+    second.write_text(TEXT, encoding="utf-8")
+    with TokenCountCache(tmp_path / "c.sqlite3") as cache:
+        expected = count_tokens(str(first), encoding_name="cl100k_base")
+        assert (
+            count_tokens(str(first), encoding_name="cl100k_base", cache=cache)
+            == expected
+        )
+        _forbid_counting(monkeypatch)
+        assert count_tokens(str(second), model_alias="gpt4", cache=cache) == expected
+        assert (
+            count_tokens(io.StringIO(TEXT), model_alias="gpt4", cache=cache) == expected
+        )
+
+
+def test_unchanged_file_is_not_hashed(tmp_path, monkeypatch):
+    """
+    Файл с прежними размером и mtime не хэшируется повторно.
+    """
+    path = tmp_path / "a.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    with TokenCountCache(tmp_path / "c.sqlite3") as cache:
+        expected = count_tokens(str(path), encoding_name="cl100k_base", cache=cache)
+        monkeypatch.setattr(counter, "hash_text", None)
+        assert (
+            count_tokens(str(path), encoding_name="cl100k_base", cache=cache)
+            == expected
+        )
+
+
+def test_database_errors_are_io_errors(tmp_path):
+    """
+    Сбой SQLite после открытия кэша — IOError, и CLI печатает ошибку
+    без трассировки.
+    """
+    db_path = tmp_path / "c.sqlite3"
+    with TokenCountCache(db_path) as cache:
+        with sqlite3.connect(db_path) as other:
+            other.execute("DROP TABLE counts")
+            other.execute("DROP TABLE files")
+        with pytest.raises(IOError):
+            cache.get("a", "cl100k_base")
+        with pytest.raises(IOError):
+            cache.put("a", "cl100k_base", 1)
+        with pytest.raises(IOError):
+            cache.lookup_file("/a", 1, 1)
+        with pytest.raises(IOError):
+            cache.remember_file("/a", 1, 1, "d")
+        with pytest.raises(IOError):
+            len(cache)
+
+    path = tmp_path / "a.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    db_path.unlink()
+    with sqlite3.connect(db_path) as other:
+        # Таблица без столбца tokens: открытие проходит, чтение падает
+        other.execute("CREATE TABLE counts (digest, encoding, last_used)")
+    proc = subprocess.run(
+        [sys.executable, "-m", "ai_token_counter", "-f", str(path), "-m", "gpt4"]
+        + ["--cache", str(db_path)],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert proc.returncode == 1
+    assert proc.stderr.startswith("Error:")
+    assert "Traceback" not in proc.stderr
+
+
+def test_modified_file_is_recounted(tmp_path):
+    """
+    Изменённый файл (другой mtime) пересчитывается.
+    """
+    path = tmp_path / "a.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    with TokenCountCache(tmp_path / "c.sqlite3") as cache:
+        before, _ = count_tokens(str(path), encoding_name="cl100k_base", cache=cache)
+        path.write_text(TEXT + TEXT, encoding="utf-8")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        after, _ = count_tokens(str(path), encoding_name="cl100k_base", cache=cache)
+    assert after == 2 * before
+
+
+def test_cached_missing_file(tmp_path):
+    """
+    Отсутствующий файл даёт FileNotFoundError и с кэшем.
+    """
+    with TokenCountCache(tmp_path / "c.sqlite3") as cache:
+        with pytest.raises(FileNotFoundError):
+            count_tokens(
+                str(tmp_path / "none.txt"), encoding_name="cl100k_base", cache=cache
+            )
+
+
+def test_count_tokens_files_with_cache(tmp_path):
+    """
+    Пул процессов пользуется тем же файлом кэша.
+    """
+    paths = []
+    for index in range(4):
+        path = tmp_path / f"{index}.txt"
+        path.write_text(TEXT * (index + 1), encoding="utf-8")
+        paths.append(str(path))
+    expected, _ = count_tokens_files(paths, encoding_name="cl100k_base")
+    with TokenCountCache(tmp_path / "c.sqlite3") as cache:
+        results, _ = count_tokens_files(
+            paths, encoding_name="cl100k_base", jobs=2, cache=cache
+        )
+        assert results == expected
+        assert len(cache) == 4
@@ -0,0 +1,80 @@
+"""
+tests/test_chat.py
+
+Purpose:
+    Unit tests for chat-message token accounting in ai_token_counter.chat.
+Dependencies:
+    pytest
+"""
+
+import pytest
+
+from ai_token_counter.chat import count_chat_tokens, count_chat_tokens_batch
+from ai_token_counter.tokenizers.openai import count_tokens_tiktoken
+
+MESSAGES = [
+    {"role": "system", "content": "You are helpful."},
+    {"role": "user", "name": "alice", "content": "Hello world"},
+    {"role": "user", "content": [{"type": "text", "text": "Test input"}]},
+]
+
+
+def _expected(messages, encoding, per_message, per_name, priming):
+    total = priming
+    for message in messages:
+        total += per_message
+        for key, value in message.items():
+            if isinstance(value, list):
+                value = "".join(part["text"] for part in value)
+            total += count_tokens_tiktoken(value, encoding)
+            if key == "name":
+                total += per_name
+    return total
+
+
+def test_count_chat_tokens_default_overhead():
+    """
+    Подсчёт учитывает накладные расходы на сообщение, имя и начало ответа.
+    """
+    count, encoding = count_chat_tokens(MESSAGES, model_alias="gpt-4o")
+    assert encoding == "o200k_base"
+    assert count == _expected(MESSAGES, "o200k_base", 3, 1, 3)
+
+
+def test_count_chat_tokens_legacy_overhead():
+    """
+    Для gpt-3.5-turbo-0301 действует собственная таблица накладных расходов.
+    """
+    count, encoding = count_chat_tokens(MESSAGES, model_alias="GPT-3.5-Turbo-0301")
+    assert encoding == "cl100k_base"
+    assert count == _expected(MESSAGES, "cl100k_base", 4, -1, 3)
+
+
+def test_count_chat_tokens_batch_maps_back_and_isolates_errors():
+    """
+    Пакетный подсчёт сопоставляет результаты диалогам и изолирует ошибки.
+    """
+    conversations = [
+        MESSAGES,
+        [],
+        [{"role": "user", "content": [{"type": "image_url", "image_url": {}}]}],
+        [{"role": "user", "content": "<|endoftext|>"}],
+        MESSAGES[:1],
+    ]
+    results, encoding = count_chat_tokens_batch(conversations, model_alias="gpt4")
+    assert encoding == "cl100k_base"
+    assert results[0] == count_chat_tokens(MESSAGES, model_alias="gpt4")[0]
+    assert results[1] == 3
+    assert isinstance(results[2], ValueError)
+    assert isinstance(results[3], ValueError)
+    assert results[4] == _expected(MESSAGES[:1], "cl100k_base", 3, 1, 3)
+
+
+def test_count_chat_tokens_errors():
+    """
+    Некорректные сообщения вызывают TypeError, отсутствие модели — ValueError.
+    """
+    with pytest.raises(TypeError):
+        count_chat_tokens(["not a message"], model_alias="gpt4")
+    with pytest.raises(ValueError):
+        count_chat_tokens(MESSAGES)
@@ -0,0 +1,132 @@
+"""
+tests/test_chunker.py
+
+Purpose:
+    Unit tests for ai_token_counter.chunker and the `chunk` subcommand.
+Dependencies:
+    pytest
+"""
+
+import io
+import json
+import subprocess
+import sys
+
+import pytest
+import tiktoken
+
+from ai_token_counter.chunker import iter_token_chunks
+from ai_token_counter.tokenizers.openai import count_tokens_tiktoken
+
+ENCODING = "cl100k_base"
+TEXT = (
+    "Retrieval needs chunks of bounded size. Каждый фрагмент считается.\n"
+    "    code_block = [x for x in range(10)]  # 😀 emoji\n\n"
+    "日本語の文も含まれます。"
+) * 40
+
+
+def _chunks(text, max_tokens, overlap, **kwargs):
+    return list(
+        iter_token_chunks(
+            io.StringIO(text), max_tokens, overlap, encoding_name=ENCODING, **kwargs
+        )
+    )
+
+
+@pytest.mark.parametrize("max_tokens, overlap", [(4, 0), (16, 0), (50, 10), (200, 199)])
+def test_chunks_cover_text_within_limits(max_tokens, overlap):
+    """
+    Фрагменты не длиннее лимита, счёт точный, смещения указывают на текст,
+    перекрытие не больше заданного и весь текст покрыт.
+    """
+    chunks = _chunks(TEXT, max_tokens, overlap, block_size=256)
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    covered = 0
+    for previous, chunk in zip([None] + chunks, chunks):
+        assert 0 < chunk.tokens <= max_tokens
+        assert chunk.tokens == count_tokens_tiktoken(chunk.text, ENCODING)
+        assert TEXT[chunk.start : chunk.end] == chunk.text
+        assert chunk.start <= covered < chunk.end
+        if previous is not None:
+            shared = TEXT[chunk.start : previous.end]
+            assert count_tokens_tiktoken(shared, ENCODING) <= overlap
+        covered = chunk.end
+    assert covered == len(TEXT)
+    if overlap == 0:
+        assert "".join(chunk.text for chunk in chunks) == TEXT
+
+
+def test_oversized_piece_is_split():
+    """
+    Слово длиннее лимита делится по токенам на границах символов.
+    """
+    text = "x" + "ab" * 500 + " end"
+    chunks = _chunks(text, 8, 0)
+    assert "".join(chunk.text for chunk in chunks) == text
+    assert all(chunk.tokens <= 8 for chunk in chunks)
+
+
+WHITESPACE_TEXT = "".join(
+    f"!{' ' * (i % 9)}{'x' if i % 3 else i}\t \n{' ' * (i % 4)}" for i in range(200)
+)
+
+
+@pytest.mark.parametrize("encoding", ["cl100k_base", "o200k_base"])
+@pytest.mark.parametrize("max_tokens, overlap", [(1, 0), (3, 0), (5, 2), (16, 4)])
+@pytest.mark.parametrize(
+    "text",
+    [WHITESPACE_TEXT, "!    " * 50, "q" + "ab" * 300 + "   "],
+    ids=["whitespace", "runs", "oversized"],
+)
+def test_chunk_tokens_match_own_encoding(encoding, max_tokens, overlap, text):
+    """
+    Заявленное число токенов равно кодированию текста фрагмента отдельно,
+    даже если фрагмент обрывает серию пробелов или часть длинного куска.
+    """
+    enc = tiktoken.get_encoding(encoding)
+    chunks = list(
+        iter_token_chunks(
+            io.StringIO(text), max_tokens, overlap, encoding_name=encoding
+        )
+    )
+    assert chunks
+    for chunk in chunks:
+        assert len(enc.encode_ordinary(chunk.text)) == chunk.tokens
+
+
+def test_invalid_arguments_and_special_tokens():
+    """
+    Неверные лимиты и спецтокены вызывают ValueError.
+    """
+    with pytest.raises(ValueError):
+        _chunks(TEXT, 0, 0)
+    with pytest.raises(ValueError):
+        _chunks(TEXT, 10, 10)
+    with pytest.raises(ValueError):
+        list(iter_token_chunks(io.StringIO(TEXT), 10))
+    with pytest.raises(ValueError):
+        _chunks("a <|endoftext|> b", 10, 0)
+    assert _chunks("", 10, 0) == []
+
+
+def test_chunk_subcommand_writes_jsonl(tmp_path):
+    """
+    Подкоманда chunk пишет JSONL с источником, текстом, счётом и смещениями.
+    """
+    source = tmp_path / "doc.txt"
+    source.write_text(TEXT, encoding="utf-8")
+    output = tmp_path / "chunks.jsonl"
+    proc = subprocess.run(
+        [sys.executable, "-m", "ai_token_counter", "chunk", "-f", str(source)]
+        + ["--encoding", ENCODING, "--max-tokens", "64", "--overlap", "8"]
+        + ["-o", str(output)],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert proc.returncode == 0, proc.stderr
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert records and all(record["source"] == str(source) for record in records)
+    assert all(record["tokens"] <= 64 for record in records)
+    assert records[-1]["end"] == len(TEXT)
@@ -10,6 +10,7 @@ Tests:
     - Error on missing mandatory arguments
 """
 
+import json
 import subprocess
 import sys
 import os
@@ -72,3 +73,201 @@ def test_unknown_alias(tmp_path):
     code, out, err = run_cli(["--file", str(file_path), "--model", "unknownmodel"])
     assert code != 0
     assert "unknown model alias" in err.lower() or "error" in err.lower()
+
+
+def test_count_multiple_files_and_directory(tmp_path):
+    # Several files, a directory walked recursively and a glob pattern
+    (tmp_path / "a.txt").write_text("Hello world", encoding="utf-8")
+    nested = tmp_path / "docs" / "deep"
+    nested.mkdir(parents=True)
+    (nested / "b.txt").write_text("Test input", encoding="utf-8")
+    (tmp_path / "docs" / "c.md").write_text("Hello", encoding="utf-8")
+
+    code, out, err = run_cli(
+        [
+            "--file",
+            str(tmp_path / "a.txt"),
+            str(tmp_path / "docs"),
+            "--file",
+            str(tmp_path / "**" / "*.md"),
+            "--encoding",
+            "cl100k_base",
+            "--jobs",
+            "2",
+        ]
+    )
+    assert code == 0
+    assert err == ""
+    lines = [line.split("\t") for line in out.splitlines()]
+    paths = [path for _, path in lines[:-1]]
+    assert paths == [
+        str(tmp_path / "a.txt"),
+        str(tmp_path / "docs" / "c.md"),
+        str(nested / "b.txt"),
+    ]
+    assert lines[-1][1] == "total"
+    assert int(lines[-1][0]) == sum(int(count) for count, _ in lines[:-1])
+
+
+def test_count_multiple_files_reports_failures(tmp_path):
+    # A missing file is reported, the others are still counted
+    (tmp_path / "a.txt").write_text("Hello world", encoding="utf-8")
+    code, out, err = run_cli(
+        [
+            "--file",
+            str(tmp_path / "a.txt"),
+            str(tmp_path / "missing.txt"),
+            "--model",
+            "gpt35",
+        ]
+    )
+    assert code == 1
+    assert "missing.txt" in err
+    assert out.splitlines()[-1].endswith("\ttotal")
+
+
+def test_glob_without_matches(tmp_path):
+    code, out, err = run_cli(
+        ["--file", str(tmp_path / "*.none"), "--encoding", "cl100k_base"]
+    )
+    assert code != 0
+    assert "No files match pattern" in err
+
+
+def test_jsonl_mode(tmp_path):
+    # Per-field totals and per-record output for a JSONL log
+    log = tmp_path / "log.jsonl"
+    log.write_text(
+        '{"prompt": "Hello world", "id": "x"}\n\n{"prompt": "Test input"}\n',
+        encoding="utf-8",
+    )
+    code, out, err = run_cli(
+        ["--file", str(log), "--jsonl", "--field", "prompt", "--model", "gpt35"]
+    )
+    assert code == 0
+    assert err == ""
+    field_line, total_line = out.splitlines()
+    assert field_line.endswith("\tprompt")
+    assert total_line == field_line.split("\t")[0] + "\ttotal"
+
+    code, jobs_out, err = run_cli(
+        ["--file", str(log), "--jsonl", "--field", "prompt", "--model", "gpt35"]
+        + ["--jobs", "2"]
+    )
+    assert code == 0
+    assert jobs_out == out
+
+    code, out, err = run_cli(
+        ["--file", str(log), "--jsonl", "--per-record", "--model", "gpt35"]
+    )
+    assert code == 0
+    lines = [line for line in out.splitlines()]
+    assert len(lines) == 2
+    assert '"line": 3' in lines[1]
+
+
+def test_field_requires_jsonl():
+    code, out, err = run_cli(["--file", "x.txt", "--field", "a", "--model", "gpt35"])
+    assert code != 0
+    assert "--jsonl" in err
+
+
+def test_cache_flag(tmp_path):
+    file_path = tmp_path / "sample.txt"
+    file_path.write_text("Hello world", encoding="utf-8")
+    cache_path = tmp_path / "counts.sqlite3"
+    args = ["--file", str(file_path), "--model", "gpt4", "--cache", str(cache_path)]
+    first = run_cli(args)
+    second = run_cli(args)
+    assert first == second == (0, "2", "")
+    assert cache_path.exists()
+
+
+def test_follow_flag_validation(tmp_path):
+    file_path = tmp_path / "log.txt"
+    file_path.write_text("Hello world", encoding="utf-8")
+    code, _, err = run_cli(
+        ["--file", str(file_path), "--model", "gpt4", "--checkpoint", "x.json"]
+    )
+    assert code == 2 and "--checkpoint requires --follow" in err
+    code, _, err = run_cli(["--file", "-", "--model", "gpt4", "--follow"])
+    assert code == 2 and "stdin" in err
+
+
+def test_calibrate_command(tmp_path):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "a.txt").write_text("Hello brave new world. " * 200, encoding="utf-8")
+    (corpus / "b.bin").write_bytes(b"\xff\xfe binary")
+    models = tmp_path / "models"
+    code, out, err = run_cli(
+        [
+            "calibrate",
+            "-f",
+            str(corpus),
+            "--encoding",
+            "cl100k_base",
+            "--dir",
+            str(models),
+        ]
+    )
+    assert code == 0
+    assert out.startswith("cl100k_base: ") and "Skipped" in err
+    assert (models / "cl100k_base.json").exists()
+
+
+def test_corpus_command(tmp_path):
+    for index in range(3):
+        (tmp_path / f"doc{index}.txt").write_text(
+            "Hello brave new world. " * 100, encoding="utf-8"
+        )
+    code, out, err = run_cli(
+        ["corpus", "-f", str(tmp_path), "--encoding", "cl100k_base", "--json"]
+    )
+    assert code == 0 and "round 1" in err
+    result = json.loads(out)
+    assert result["exact"] and result["tokens"] == result["low"] == result["high"]
+    code, _, err = run_cli(
+        ["corpus", "-f", str(tmp_path), "--model", "gpt4", "--precision", "0"]
+    )
+    assert code == 2 and "--precision" in err
+
+
+def test_analyze_command(tmp_path):
+    (tmp_path / "a.txt").write_text("hello hello world\n", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("world\n", encoding="utf-8")
+    code, out, _ = run_cli(
+        ["analyze", "-f", str(tmp_path), "--encoding", "cl100k_base", "--per-file"]
+    )
+    assert code == 0 and "tokens/byte" in out and "a.txt:" in out
+    code, out, _ = run_cli(
+        ["analyze", "-f", str(tmp_path), "--encoding", "cl100k_base", "--json"]
+    )
+    result = json.loads(out)
+    assert code == 0 and "files" not in result and result["top"]
+    code, _, err = run_cli(["analyze", "-f", str(tmp_path), "--top", "3"])
+    assert code == 2 and "--encoding" in err
+
+
+def test_export_command(tmp_path):
+    (tmp_path / "a.txt").write_text("hello world\n" * 10, encoding="utf-8")
+    prefix = tmp_path / "out" / "shard"
+    code, out, _ = run_cli(
+        [
+            "export",
+            "-f",
+            str(tmp_path / "a.txt"),
+            "--encoding",
+            "cl100k_base",
+            "-o",
+            str(prefix),
+            "--shard-tokens",
+            "8",
+            "--eot",
+        ]
+    )
+    index = json.loads((tmp_path / "out" / "shard.index.json").read_text("utf-8"))
+    assert code == 0 and f"{index['tokens']} tokens" in out
+    assert (tmp_path / "out" / "shard-00000.bin").stat().st_size == 8 * 4
+    code, _, err = run_cli(["export", "-f", "a", "--encoding", "cl100k_base"])
+    assert code == 2 and "--output" in err
@@ -6,7 +6,21 @@ Tests for the counter module.
 import io
 import pytest
 from pathlib import Path
-from ai_token_counter.counter import count_tokens
+from ai_token_counter import counter
+from ai_token_counter.counter import (
+    count_tokens,
+    count_tokens_batch,
+    count_tokens_files,
+)
+from ai_token_counter.file_utils import iter_source_chunks
+from ai_token_counter.tokenizer_factory import get_tiktoken_encoder
+from ai_token_counter.tokenizers.openai import count_chunks, get_pretokenizer_pattern
+
+MIXED_TEXT = (
+    "Hello   world\n\n\n  indented\tline  \r\n"
+    "numbers 1234567,89;[1,2,3,4,5,6,7,8,9] punctuation!!! ...\n"
+    "中文字符没有空格的长句子中文字符没有空格的长句子 emoji 🎉🎉 it's we'll   \n"
+)
 
 
 def test_count_tokens_file(tmp_path):
@@ -36,3 +50,121 @@ def test_count_tokens_no_alias_and_no_encoding():
     """При отсутствии model_alias и encoding_name должен быть ValueError."""
     with pytest.raises(ValueError):
         count_tokens(source="does_not_matter", model_alias=None, encoding_name=None)
+
+
+def test_count_tokens_batch_texts_in_order():
+    """Пакетный подсчёт возвращает результаты в порядке входа."""
+    texts = ["Hello world", "", "Test input", "Hello world " * 50]
+    results, encoding = count_tokens_batch(texts, model_alias="gpt35", num_threads=2)
+    assert encoding == "cl100k_base"
+    expected = [count_tokens(io.StringIO(t), model_alias="gpt35")[0] for t in texts]
+    assert results == expected
+
+
+def test_count_tokens_batch_item_errors_do_not_abort(tmp_path):
+    """Ошибка отдельного элемента не прерывает весь пакет."""
+    good = tmp_path / "good.txt"
+    good.write_text("Hello world", encoding="utf-8")
+    bad = tmp_path / "bad.txt"
+    bad.write_bytes(b"\xff\xfe")
+    special = tmp_path / "special.txt"
+    special.write_text("a <|endoftext|> b", encoding="utf-8")
+
+    results, _ = count_tokens_batch(
+        [str(good), str(tmp_path / "missing.txt"), str(bad), str(special), 42],
+        encoding_name="cl100k_base",
+        sources=True,
+    )
+    assert results[0] == 2
+    assert isinstance(results[1], FileNotFoundError)
+    assert isinstance(results[2], UnicodeDecodeError)
+    assert isinstance(results[3], ValueError)
+    assert isinstance(results[4], TypeError)
+
+
+def test_count_tokens_batch_requires_encoding():
+    """Без model_alias и encoding_name пакет целиком отклоняется."""
+    with pytest.raises(ValueError):
+        count_tokens_batch(["text"])
+
+
+@pytest.mark.parametrize("encoding_name", ["cl100k_base", "o200k_base"])
+@pytest.mark.parametrize("chunk_size", [1, 7, 50, 333])
+def test_chunked_count_matches_whole_encode(encoding_name, chunk_size):
+    """Сумма по фрагментам совпадает с подсчётом всего текста."""
+    text = MIXED_TEXT * 20
+    encoder = get_tiktoken_encoder(encoding_name)
+    chunks = iter_source_chunks(
+        io.StringIO(text),
+        chunk_size=chunk_size,
+        boundary_pattern=get_pretokenizer_pattern(encoder),
+    )
+    assert count_chunks(encoder, chunks) == len(encoder.encode(text))
+
+
+# Числовые колонки, выровненные пробелами, и пробельные серии без букв:
+# разрез допускается только по запасному шаблону претокенизатора
+COLUMNS_TEXT = "".join(
+    f"{index * 7919 % 100000:>8}{index % 997:>6}  \r\n" for index in range(300)
+)
+WHITESPACE_TEXT = "\r  2" * 200 + "1 \t 22  \n\n 333   4444 !!  ?\n" * 50
+JOINING_TEXT = "中Aß 🎉中Aß''s x's 's\tAB'll " * 50
+
+
+@pytest.mark.parametrize("encoding_name", ["cl100k_base", "o200k_base"])
+@pytest.mark.parametrize("chunk_size", [1, 7, 64])
+@pytest.mark.parametrize(
+    "text",
+    [COLUMNS_TEXT, WHITESPACE_TEXT, JOINING_TEXT],
+    ids=["columns", "whitespace", "joining"],
+)
+def test_fallback_cuts_are_exact(encoding_name, chunk_size, text):
+    """Разрезы без буквы перед пробелом не меняют претокенизацию и счёт."""
+    encoder = get_tiktoken_encoder(encoding_name)
+    pattern = get_pretokenizer_pattern(encoder)
+    chunks = list(
+        iter_source_chunks(
+            io.StringIO(text), chunk_size=chunk_size, boundary_pattern=pattern
+        )
+    )
+    assert len(chunks) > 1
+    pieces = [piece for chunk in chunks for piece in pattern.findall(chunk)]
+    assert pieces == pattern.findall(text)
+    assert count_chunks(encoder, chunks) == len(encoder.encode_ordinary(text))
+
+
+def test_chunked_count_rejects_split_special_token():
+    """Специальный токен на границе фрагментов всё равно отвергается."""
+    encoder = get_tiktoken_encoder("cl100k_base")
+    with pytest.raises(ValueError):
+        count_chunks(encoder, ["text <|endo", "ftext|> more"])
+
+
+def test_count_tokens_streams_large_files(tmp_path, monkeypatch):
+    """Файлы выше порога считаются потоково с тем же результатом."""
+    text = MIXED_TEXT * 50
+    file_path = tmp_path / "big.txt"
+    file_path.write_text(text, encoding="utf-8")
+    expected, _ = count_tokens(source=str(file_path), model_alias="gpt35")
+
+    monkeypatch.setattr(counter, "is_large_source", lambda source: True)
+    monkeypatch.setattr(counter, "read_source", None)
+    count, encoding = count_tokens(source=str(file_path), model_alias="gpt35")
+    assert (count, encoding) == (expected, "cl100k_base")
+
+
+def test_count_tokens_files_process_pool(tmp_path):
+    """Пул процессов даёт те же результаты, что и последовательный подсчёт."""
+    paths = []
+    for index in range(5):
+        file_path = tmp_path / f"f{index}.txt"
+        file_path.write_text(MIXED_TEXT * (index + 1), encoding="utf-8")
+        paths.append(str(file_path))
+    paths.append(str(tmp_path / "missing.txt"))
+
+    sequential, encoding = count_tokens_files(paths, model_alias="gpt4o")
+    pooled, _ = count_tokens_files(paths, model_alias="gpt4o", jobs=3)
+    assert encoding == "o200k_base"
+    assert pooled[:-1] == sequential[:-1]
+    assert sequential[0] == count_tokens(paths[0], model_alias="gpt4o")[0]
+    assert isinstance(pooled[-1], FileNotFoundError)
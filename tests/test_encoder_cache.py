@@ -0,0 +1,109 @@
+"""
+tests/test_encoder_cache.py
+
+Purpose:
+    Unit tests for the process-wide encoder registry in
+    ai_token_counter.tokenizer_factory.
+Dependencies:
+    pytest
+"""
+
+import pytest
+import tiktoken
+
+from ai_token_counter import tokenizer_factory
+from ai_token_counter.tokenizer_factory import (
+    EncoderRegistry,
+    encoder_cache_info,
+    evict,
+    get_tiktoken_encoder,
+    preload,
+)
+from ai_token_counter.tokenizers.openai import count_tokens_tiktoken
+
+
+@pytest.fixture(autouse=True)
+def _clean_registry():
+    """Каждый тест начинается с пустого реестра и нулевых счётчиков."""
+    evict()
+    tokenizer_factory._ENCODER_REGISTRY.reset_stats()
+    yield
+    evict()
+
+
+def test_second_lookup_is_a_hit():
+    """
+    Повторный запрос той же кодировки не должен обращаться к загрузчику.
+    """
+    first = get_tiktoken_encoder("cl100k_base")
+    second = get_tiktoken_encoder("cl100k_base")
+    assert first is second
+    info = encoder_cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+    assert info.currsize == 1
+    assert info.load_time >= 0.0
+
+
+def test_count_tokens_tiktoken_uses_registry(monkeypatch):
+    """
+    count_tokens_tiktoken должен идти через реестр, а не через tiktoken.get_encoding.
+    """
+    preload(["cl100k_base"])
+
+    def _fail(name):
+        raise AssertionError(f"loader called for {name}")
+
+    monkeypatch.setattr(tiktoken, "get_encoding", _fail)
+    assert count_tokens_tiktoken("Hello world", "cl100k_base") > 0
+    assert encoder_cache_info().hits >= 1
+
+
+def test_lru_eviction(monkeypatch):
+    """
+    При превышении ёмкости вытесняется наименее недавно использованный кодировщик.
+    """
+    loaded = []
+
+    def _fake_load(name):
+        loaded.append(name)
+        return object()
+
+    monkeypatch.setattr(tokenizer_factory, "_load_encoder", _fake_load)
+    registry = EncoderRegistry(maxsize=2)
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")  # "b" становится самым старым
+    registry.get("c")
+    registry.get("a")
+    registry.get("b")
+    assert loaded == ["a", "b", "c", "b"]
+    assert registry.info().evictions == 2
+
+
+def test_explicit_evict():
+    """
+    evict() удаляет кодировщик, следующий запрос снова является промахом.
+    """
+    get_tiktoken_encoder("cl100k_base")
+    assert evict("cl100k_base") == 1
+    assert evict("cl100k_base") == 0
+    get_tiktoken_encoder("cl100k_base")
+    assert encoder_cache_info().misses == 2
+
+
+def test_invalid_size():
+    """
+    Ёмкость реестра меньше единицы недопустима.
+    """
+    with pytest.raises(ValueError):
+        EncoderRegistry(maxsize=0)
+
+
+def test_failed_load_is_not_cached():
+    """
+    Ошибка загрузки не должна оставлять запись в реестре.
+    """
+    with pytest.raises(ValueError):
+        get_tiktoken_encoder("invalid_encoding_name")
+    assert encoder_cache_info().currsize == 0
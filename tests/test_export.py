@@ -0,0 +1,128 @@
+"""
+tests/test_export.py
+
+Purpose:
+    Tests for ai_token_counter.export: shards hold exactly the encoded
+    documents, split at fixed token counts, in input order with correct
+    offsets, in-process and on a process pool.
+Dependencies:
+    pytest
+"""
+
+import sys
+from array import array
+
+import pytest
+
+from ai_token_counter.file_utils import read_source
+from ai_token_counter.export import (
+    ExportIndex,
+    ExportOptions,
+    export_tokens,
+    shard_dtype,
+)
+from ai_token_counter.tokenizer_factory import get_tiktoken_encoder
+
+DOCUMENTS = [
+    "Hello world, this is the first document.\n" * 20,
+    "Ünïcödé и кириллица 中文 second one.\r\n" * 15,
+    "",
+    "def f(x):\n    return x * 2\n" * 30,
+]
+
+
+def _write(tmp_path, documents):
+    paths = []
+    for number, text in enumerate(documents):
+        path = tmp_path / "in" / f"doc{number}.txt"
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(text.encode("utf-8"))
+        paths.append(str(path))
+    return paths
+
+
+def _read_stream(prefix, index):
+    ids = array("H" if index.dtype == "uint16" else "I")
+    for shard in index.shards:
+        ids.frombytes((prefix.parent / shard["path"]).read_bytes())
+    if sys.byteorder == "big":
+        ids.byteswap()
+    return ids.tolist()
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_export_round_trip(tmp_path, jobs):
+    """
+    Поток шардов совпадает с кодированием документов, смещения верны.
+    """
+    encoder = get_tiktoken_encoder("cl100k_base")
+    expected = [
+        encoder.encode_ordinary(text.replace("\r\n", "\n")) + [encoder.eot_token]
+        for text in DOCUMENTS
+    ]
+    prefix = tmp_path / "out" / "train"
+    options = ExportOptions(shard_tokens=100, jobs=jobs, append_eot=True)
+    index = export_tokens(
+        _write(tmp_path, DOCUMENTS),
+        prefix,
+        encoding_name="cl100k_base",
+        options=options,
+    )
+    assert index.dtype == "uint32" and index.eot_token == encoder.eot_token
+    assert index.tokens == sum(map(len, expected))
+    assert [shard["tokens"] for shard in index.shards[:-1]] == [100] * (
+        len(index.shards) - 1
+    )
+    assert 0 < index.shards[-1]["tokens"] <= 100
+    stream = _read_stream(prefix, index)
+    for document, ids in zip(index.documents, expected):
+        assert document["tokens"] == len(ids)
+        assert stream[document["offset"] : document["offset"] + len(ids)] == ids
+    assert ExportIndex.load(tmp_path / "out" / "train.index.json") == index
+
+
+@pytest.mark.parametrize("encoding_name", ["cl100k_base", "o200k_base"])
+def test_export_small_blocks_match_whole_encode(tmp_path, encoding_name):
+    """
+    Мелкие блоки чтения не меняют идентификаторы токенов документа.
+    """
+    encoder = get_tiktoken_encoder(encoding_name)
+    numeric = "".join(
+        f"{index * 7919 % 100000:>8}{index % 997:>6}  \r\n" for index in range(500)
+    )
+    paths = _write(tmp_path, [numeric, "\r  2 中Aß 'll" * 300])
+    prefix = tmp_path / "out" / "small"
+    options = ExportOptions(shard_tokens=1000, block_size=64)
+    index = export_tokens(paths, prefix, encoding_name=encoding_name, options=options)
+    stream = _read_stream(prefix, index)
+    for document, path in zip(index.documents, paths):
+        expected = encoder.encode_ordinary(read_source(path))
+        offset = document["offset"]
+        assert stream[offset : offset + document["tokens"]] == expected
+
+
+def test_export_empty_and_validation(tmp_path):
+    """
+    Пустой корпус даёт пустой индекс; неверные входы отклоняются.
+    """
+    paths = _write(tmp_path, ["", ""])
+    index = export_tokens(paths, tmp_path / "empty", encoding_name="cl100k_base")
+    assert index.tokens == 0 and not index.shards and len(index.documents) == 2
+    with pytest.raises(ValueError):
+        export_tokens(paths, tmp_path / "x")
+    with pytest.raises(ValueError):
+        export_tokens(
+            paths,
+            tmp_path / "x",
+            encoding_name="cl100k_base",
+            options=ExportOptions(shard_tokens=0),
+        )
+    with pytest.raises(ValueError):
+        export_tokens(
+            _write(tmp_path, ["<|endoftext|>"]),
+            tmp_path / "x",
+            encoding_name="cl100k_base",
+        )
+    assert shard_dtype(50257) == "uint16"
+    assert shard_dtype(1 << 16) == "uint16"
+    assert shard_dtype(100277) == "uint32"
@@ -3,9 +3,20 @@
 Tests for the file_utils module.
 """
 
+import bz2
+import gzip
 import io
+import lzma
 import pytest
-from ai_token_counter.file_utils import read_source
+from ai_token_counter.file_utils import (
+    ChunkSplitter,
+    detect_compression,
+    expand_sources,
+    MappedSource,
+    is_large_source,
+    iter_source_chunks,
+    read_source,
+)
 
 
 def test_read_source_from_path(tmp_path):
@@ -29,3 +40,186 @@ def test_read_source_invalid_type():
     """Передача неподдерживаемого типа source вызывает TypeError."""
     with pytest.raises(TypeError):
         read_source(12345)
+
+
+def test_iter_source_chunks_reassembles(tmp_path):
+    """Фрагменты в сумме дают исходный текст и не превышают разумного размера."""
+    text = "Привет мир! Hello world. " * 200
+    file_path = tmp_path / "data.txt"
+    file_path.write_text(text, encoding="utf-8")
+
+    chunks = list(iter_source_chunks(str(file_path), chunk_size=100))
+    assert "".join(chunks) == text
+    assert len(chunks) > 1
+    assert all(len(chunk) < 300 for chunk in chunks)
+    # Каждый фрагмент, кроме последнего, заканчивается буквой перед пробелом
+    for chunk in chunks[:-1]:
+        assert chunk[-1].isalpha()
+
+
+def test_iter_source_chunks_from_stream():
+    """Потоковое чтение работает и для объектов TextIO."""
+    text = "word " * 1000
+    chunks = list(iter_source_chunks(io.StringIO(text), chunk_size=64))
+    assert "".join(chunks) == text
+
+
+def test_chunk_splitter_without_safe_point_keeps_buffering():
+    """Без безопасной точки разреза текст накапливается до flush()."""
+    splitter = ChunkSplitter(chunk_size=4)
+    assert splitter.feed("1,2,3,4,5") == ""
+    assert splitter.feed("6,7") == ""
+    assert splitter.flush() == "1,2,3,4,56,7"
+
+
+def test_iter_source_chunks_invalid_utf8_offset(tmp_path):
+    """Ошибка декодирования сообщает абсолютное смещение в байтах."""
+    bad_file = tmp_path / "bad.txt"
+    bad_file.write_bytes(b"a" * 100 + b"\xff" + b"b" * 10)
+    with pytest.raises(UnicodeDecodeError) as excinfo:
+        list(iter_source_chunks(str(bad_file), chunk_size=16))
+    assert "byte offset 100" in str(excinfo.value)
+
+
+def test_is_large_source(tmp_path):
+    """stdin всегда читается потоково, файлы — начиная с порога размера."""
+    file_path = tmp_path / "data.txt"
+    file_path.write_text("x" * 10, encoding="utf-8")
+    assert is_large_source("-")
+    assert is_large_source(str(file_path), threshold=10)
+    assert not is_large_source(str(file_path), threshold=11)
+    assert not is_large_source(str(tmp_path / "missing.txt"))
+    assert not is_large_source(io.StringIO("x"))
+
+
+def test_iter_source_chunks_matches_read_source_newlines(tmp_path):
+    """Потоковое чтение переводит переводы строк так же, как read_source."""
+    file_path = tmp_path / "crlf.txt"
+    file_path.write_bytes(b"line one\r\nline two\rline three\n" * 20)
+    chunks = list(iter_source_chunks(str(file_path), chunk_size=9))
+    assert "".join(chunks) == read_source(str(file_path))
+
+
+def test_mapped_source_windows_match_read_source(tmp_path):
+    """Окна MappedSource не режут символы UTF-8 и пары CRLF."""
+    file_path = tmp_path / "mapped.txt"
+    # Многобайтовые символы и CRLF гарантированно попадают на границы окон
+    file_path.write_bytes(("ж€😀x\r\n" * 5000).encode("utf-8"))
+    with MappedSource(file_path, window_size=1) as source:
+        windows = list(source.iter_text())
+        assert len(windows) > 1
+        assert "".join(windows) == read_source(str(file_path))
+        assert read_source(source) == "".join(windows)
+
+
+def test_mapped_source_invalid_utf8_offset(tmp_path):
+    """MappedSource сообщает абсолютное смещение ошибки декодирования."""
+    bad_file = tmp_path / "bad.txt"
+    bad_file.write_bytes(b"a" * 70000 + b"\xff")
+    with MappedSource(bad_file, window_size=4096) as source:
+        with pytest.raises(UnicodeDecodeError) as excinfo:
+            list(iter_source_chunks(source))
+    assert "byte offset 70000" in str(excinfo.value)
+
+
+def test_mapped_source_empty_and_missing(tmp_path):
+    """Пустой файл даёт пустой текст, отсутствующий — FileNotFoundError."""
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    with MappedSource(empty) as source:
+        assert list(source.iter_text()) == []
+    with pytest.raises(FileNotFoundError):
+        MappedSource(tmp_path / "missing.txt").open()
+
+
+def test_expand_sources(tmp_path):
+    """Каталоги обходятся рекурсивно, шаблоны раскрываются, повторы удаляются."""
+    (tmp_path / "b.txt").write_text("b", encoding="utf-8")
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    (sub / "a.txt").write_text("a", encoding="utf-8")
+    (sub / "c.log").write_text("c", encoding="utf-8")
+
+    result = expand_sources(
+        ["-", str(tmp_path), str(tmp_path / "**" / "*.txt"), "plain.txt"]
+    )
+    assert result == [
+        "-",
+        str(tmp_path / "b.txt"),
+        str(sub / "a.txt"),
+        str(sub / "c.log"),
+        "plain.txt",
+    ]
+    with pytest.raises(FileNotFoundError):
+        expand_sources([str(tmp_path / "*.none")])
+
+
+COMPRESSORS = {"gzip": gzip.compress, "bz2": bz2.compress, "xz": lzma.compress}
+
+
+@pytest.mark.parametrize("kind", sorted(COMPRESSORS))
+def test_compressed_sources(tmp_path, kind):
+    """Сжатые файлы распознаются по сигнатуре и читаются потоково."""
+    text = "Сжатый текст, line one\r\nline two é 中\n" * 3000
+    path = tmp_path / "log.data"
+    path.write_bytes(COMPRESSORS[kind](text.encode("utf-8")))
+    expected = text.replace("\r\n", "\n")
+    assert detect_compression(path) == kind
+    assert is_large_source(str(path))
+    assert read_source(str(path)) == expected
+    chunks = list(iter_source_chunks(str(path), chunk_size=1000))
+    assert len(chunks) > 1 and "".join(chunks) == expected
+    # Досрочно закрытый поток останавливает распаковку
+    stream = iter_source_chunks(str(path), chunk_size=1000)
+    next(stream)
+    stream.close()
+
+
+def test_text_starting_like_bz2_is_plain(tmp_path):
+    """Текст, начинающийся с "BZh", читается как обычный текст."""
+    text = "BZhang Wei wrote this.\nBZh91AY plain too\n"
+    path = tmp_path / "names.txt"
+    path.write_text(text, encoding="utf-8")
+    assert detect_compression(path) is None
+    assert not is_large_source(str(path))
+    assert read_source(str(path)) == text
+    assert "".join(iter_source_chunks(str(path), chunk_size=8)) == text
+
+
+def test_compressed_errors(tmp_path):
+    """Повреждённые и усечённые архивы дают IOError, неверный UTF-8 — смещение."""
+    data = gzip.compress(b"hello world " * 1000)
+    truncated = tmp_path / "cut.gz"
+    truncated.write_bytes(data[: len(data) // 2])
+    with pytest.raises(IOError):
+        read_source(str(truncated))
+    corrupt = tmp_path / "bad.xz"
+    corrupt.write_bytes(b"\xfd7zXZ\x00" + b"garbage" * 10)
+    with pytest.raises(IOError):
+        list(iter_source_chunks(str(corrupt)))
+    invalid = tmp_path / "bad.bz2"
+    invalid.write_bytes(bz2.compress(b"ok" * 10 + b"\xff"))
+    with pytest.raises(UnicodeDecodeError, match="offset 20"):
+        read_source(str(invalid))
+    plain = tmp_path / "plain.txt"
+    plain.write_text("BZ", encoding="utf-8")
+    assert detect_compression(plain) is None
+    empty = tmp_path / "empty.bz2"
+    empty.write_bytes(bz2.compress(b""))
+    assert detect_compression(empty) == "bz2" and read_source(str(empty)) == ""
+    assert detect_compression(tmp_path / "missing") is None
+
+
+def test_zstd_source(tmp_path):
+    """zstd читается при наличии zstandard, иначе понятная IOError."""
+    path = tmp_path / "log.zst"
+    try:
+        import zstandard  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        path.write_bytes(b"\x28\xb5\x2f\xfd" + b"\x00" * 16)
+        assert detect_compression(path) == "zstd"
+        with pytest.raises(IOError, match="zstd"):
+            read_source(str(path))
+        return
+    path.write_bytes(zstandard.ZstdCompressor().compress(b"zstd text"))
+    assert read_source(str(path)) == "zstd text"
@@ -0,0 +1,183 @@
+"""
+tests/test_follow.py
+
+Purpose:
+    Unit tests for ai_token_counter.follow (follow mode with checkpoints).
+Dependencies:
+    pytest
+"""
+
+import json
+import os
+
+import pytest
+
+from ai_token_counter.counter import count_tokens
+from ai_token_counter.tokenizers.openai import count_tokens_tiktoken
+from ai_token_counter.follow import (
+    FileFollower,
+    follow_files,
+    load_checkpoint,
+    save_checkpoint,
+)
+
+ENCODING = "cl100k_base"
+PARTS = [
+    "first line of the log\r",
+    "\nsecond line ",
+    "привет мир 😀",
+    "\r\n",
+    "tail without newline",
+    "   and more words " * 200,
+]
+
+
+def _append(path, data):
+    with open(path, "ab") as handle:
+        handle.write(data)
+
+
+def _full_count(path):
+    return count_tokens(path, encoding_name=ENCODING)[0]
+
+
+def _settled_count(data):
+    """Счёт уже декодируемой части: без обрезанного символа и висящего CR."""
+    text = data.decode("utf-8", "ignore").removesuffix("\r")
+    return count_tokens_tiktoken(
+        text.replace("\r\n", "\n").replace("\r", "\n"), ENCODING
+    )
+
+
+def test_appended_data_matches_full_count(tmp_path):
+    """
+    После каждого дописывания счёт равен полному пересчёту файла,
+    в том числе при разрезанном UTF-8 символе и CRLF.
+    """
+    path = tmp_path / "log.txt"
+    path.write_bytes(b"")
+    follower = FileFollower(path, ENCODING, chunk_size=32)
+    assert follower.poll() is False and follower.tokens == 0
+    data = "".join(PARTS).encode("utf-8")
+    cuts = [0, 7, 22, 23, 47, 50, 51, 57, 60, 61, 300, len(data)]
+    for start, end in zip(cuts, cuts[1:]):
+        _append(path, data[start:end])
+        assert follower.poll() is True
+        assert follower.tokens == _settled_count(data[:end])
+    assert follower.tokens == _full_count(path)
+    assert follower.offset == len(data)
+
+
+@pytest.mark.parametrize("encoding", ["cl100k_base", "o200k_base"])
+def test_whitespace_and_digit_appends_match_full_count(tmp_path, encoding):
+    """
+    Числовой лог с выравниванием пробелами, дописываемый частями,
+    считается так же, как весь файл целиком.
+    """
+    rows = "".join(
+        f"{index * 7919 % 100000:>8}{index % 997:>6}  \r\n" for index in range(400)
+    )
+    data = (rows + "\r  2" * 300 + " 中Aß 'll" * 50).encode("utf-8")
+    path = tmp_path / "metrics.log"
+    path.write_bytes(b"")
+    follower = FileFollower(path, encoding, chunk_size=16)
+    for start in range(0, len(data), 37):
+        _append(path, data[start : start + 37])
+        follower.poll()
+    assert follower.tokens == count_tokens(path, encoding_name=encoding)[0]
+
+
+def test_checkpoint_resume(tmp_path):
+    """
+    Перезапуск по контрольной точке продолжает с сохранённого смещения.
+    """
+    path = tmp_path / "log.txt"
+    path.write_text("".join(PARTS[:3]), encoding="utf-8")
+    _append(path, "😀".encode("utf-8")[:2])
+    checkpoint = tmp_path / "state.json"
+    first = FileFollower(path, ENCODING, chunk_size=16)
+    first.poll()
+    save_checkpoint(checkpoint, [first])
+
+    state = load_checkpoint(checkpoint)[str(path)]
+    assert state["offset"] == path.stat().st_size - 2
+    resumed = FileFollower(path, ENCODING, state, chunk_size=16)
+    assert resumed.offset == state["offset"]
+    _append(path, "😀".encode("utf-8")[2:] + "".join(PARTS[3:]).encode("utf-8"))
+    resumed.poll()
+    assert resumed.tokens == _full_count(path)
+
+    # Контрольная точка другой кодировки не используется
+    other = FileFollower(path, "o200k_base", state)
+    assert other.offset == 0
+
+
+def test_truncated_file_restarts(tmp_path):
+    """
+    Усечённый или заменённый файл считается заново.
+    """
+    path = tmp_path / "log.txt"
+    path.write_text("a long line of words " * 10, encoding="utf-8")
+    follower = FileFollower(path, ENCODING)
+    follower.poll()
+    path.write_text("short", encoding="utf-8")
+    assert follower.poll() is True
+    assert follower.tokens == _full_count(path)
+
+
+def test_rotation_waits_for_new_file(tmp_path):
+    """
+    Пока файл переименован и не создан заново, счёт сохраняется;
+    новый файл считается с начала. Файл, которого не было, — ошибка.
+    """
+    path = tmp_path / "log.txt"
+    path.write_text("a long line of words " * 10, encoding="utf-8")
+    follower = FileFollower(path, ENCODING)
+    follower.poll()
+    before = follower.tokens
+    path.rename(tmp_path / "log.txt.1")
+    assert follower.poll() is False
+    assert follower.poll() is False
+    assert follower.tokens == before
+    path.write_text("fresh log", encoding="utf-8")
+    assert follower.poll() is True
+    assert follower.tokens == _full_count(path)
+    with pytest.raises(FileNotFoundError):
+        FileFollower(tmp_path / "missing.txt", ENCODING).poll()
+
+
+def test_follow_files_reports_and_saves(tmp_path):
+    """
+    follow_files сообщает о каждом файле и сохраняет контрольную точку.
+    """
+    paths = [tmp_path / "a.log", tmp_path / "b.log"]
+    for path in paths:
+        path.write_text("hello world\n", encoding="utf-8")
+    checkpoint = tmp_path / "state.json"
+    seen = []
+    follow_files(
+        paths,
+        encoding_name=ENCODING,
+        checkpoint=checkpoint,
+        interval=0.01,
+        on_update=lambda follower: seen.append((follower.path, follower.tokens)),
+        should_stop=lambda: True,
+    )
+    assert seen == [(str(path), _full_count(path)) for path in paths]
+    assert set(json.loads(checkpoint.read_text())["files"]) == {
+        str(path) for path in paths
+    }
+
+
+def test_invalid_checkpoint(tmp_path):
+    """
+    Повреждённая контрольная точка — ValueError, отсутствующая — пустая.
+    """
+    assert load_checkpoint(tmp_path / "missing.json") == {}
+    bad = tmp_path / "bad.json"
+    bad.write_text("{not json", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_checkpoint(bad)
+    missing = tmp_path / "gone.log"
+    with pytest.raises(FileNotFoundError):
+        FileFollower(os.fspath(missing), ENCODING).poll()
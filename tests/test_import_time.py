@@ -0,0 +1,79 @@
+"""
+tests/test_import_time.py
+
+Purpose:
+    Regression tests for the CLI start-up path: `--help`, usage errors and
+    the daemon client must not import tiktoken, regex or sqlite3, and
+    importing the entry point must stay within a time budget. Import times
+    are measured with `python -X importtime`.
+Dependencies:
+    pytest
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+# Budget for the cumulative import of ai_token_counter.main, in microseconds
+# (about 10 ms on a developer machine; the margin absorbs slow CI runners)
+IMPORT_BUDGET_US = 60_000
+
+HEAVY_MODULES = {
+    "tiktoken",
+    "regex",
+    "sqlite3",
+    "ai_token_counter.counter",
+    "ai_token_counter.tokenizer_factory",
+}
+
+
+def import_times(args):
+    """
+    Запустить интерпретатор с -X importtime и вернуть код выхода и
+    словарь «модуль -> накопленное время импорта (мкс)».
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return proc.returncode, times
+
+
+@pytest.mark.parametrize(
+    "args, expected_code",
+    [
+        (["-m", "ai_token_counter", "--help"], 0),
+        (["-m", "ai_token_counter"], 2),
+        (["-m", "ai_token_counter", "serve", "--help"], 0),
+        (["-c", "import ai_token_counter.client"], 0),
+    ],
+)
+def test_fast_paths_skip_heavy_imports(args, expected_code):
+    """
+    Справка, ошибки аргументов и клиент демона не загружают tiktoken.
+    """
+    code, times = import_times(args)
+    assert code == expected_code
+    assert "ai_token_counter" in times
+    assert not HEAVY_MODULES & set(times)
+
+
+def test_entry_point_import_budget():
+    """
+    Импорт точки входа укладывается в бюджет (лучший из трёх запусков).
+    """
+    best = min(
+        import_times(["-c", "import ai_token_counter.main"])[1]["ai_token_counter.main"]
+        for _ in range(3)
+    )
+    assert best < IMPORT_BUDGET_US
@@ -0,0 +1,78 @@
+"""
+tests/test_incremental.py
+
+Purpose:
+    Unit tests for ai_token_counter.incremental.IncrementalCounter.
+Dependencies:
+    pytest
+"""
+
+import random
+
+import pytest
+
+from ai_token_counter.incremental import IncrementalCounter
+from ai_token_counter.tokenizers.openai import count_tokens_tiktoken
+
+TEXT = (
+    "The quick brown fox jumps over the lazy dog.\n"
+    "    def count(self):  return 42  # код\n"
+    "日本語のテキスト 😀😀 and   spaces\t\tand tabs.\n"
+) * 20
+
+
+def test_initial_count_matches_full_count():
+    """
+    Начальный подсчёт совпадает с полным и документ делится на сегменты.
+    """
+    doc = IncrementalCounter(TEXT, encoding_name="cl100k_base", segment_size=64)
+    assert doc.total == count_tokens_tiktoken(TEXT, "cl100k_base")
+    assert doc.text == TEXT and len(doc) == len(TEXT)
+    assert doc.segment_count > 10
+
+
+@pytest.mark.parametrize("encoding", ["cl100k_base", "o200k_base"])
+def test_random_edits_match_full_recount(encoding):
+    """
+    После любой последовательности правок итог равен полному пересчёту.
+    """
+    rng = random.Random(7)
+    doc = IncrementalCounter(TEXT, encoding_name=encoding, segment_size=48)
+    text = TEXT
+    fragments = [" ", "  ", "\n", "x", "fox ", "ё", "😀", "\t", "42", ".", "dog\n "]
+    for _ in range(300):
+        offset = rng.randint(0, len(text))
+        deleted = rng.randint(0, min(6, len(text) - offset))
+        inserted = "".join(rng.choices(fragments, k=rng.randint(0, 3)))
+        text = text[:offset] + inserted + text[offset + deleted :]
+        assert doc.edit(offset, deleted, inserted) == count_tokens_tiktoken(
+            text, encoding
+        )
+    assert doc.text == text
+
+
+def test_edits_on_empty_document():
+    """
+    Правки пустого документа и удаление всего текста.
+    """
+    doc = IncrementalCounter(model_alias="gpt4")
+    assert doc.total == 0 and doc.segment_count == 0
+    doc.edit(0, 0, "Hello world")
+    assert doc.total == count_tokens_tiktoken("Hello world", "cl100k_base")
+    assert doc.edit(0, len(doc), "") == 0 and doc.text == ""
+
+
+def test_invalid_edits_and_special_tokens():
+    """
+    Правка вне документа или со спецтокеном отклоняется без изменений.
+    """
+    doc = IncrementalCounter("Hello world", encoding_name="cl100k_base")
+    with pytest.raises(ValueError):
+        doc.edit(5, 100, "")
+    with pytest.raises(ValueError):
+        doc.edit(-1, 0, "x")
+    with pytest.raises(ValueError):
+        doc.edit(5, 0, "<|endoftext|>")
+    assert doc.text == "Hello world"
+    with pytest.raises(ValueError):
+        IncrementalCounter("text")
@@ -0,0 +1,133 @@
+"""
+tests/test_jsonl.py
+
+Purpose:
+    Unit tests for JSONL record counting in ai_token_counter.jsonl.
+Dependencies:
+    pytest
+"""
+
+import io
+import json
+
+import pytest
+
+from ai_token_counter.jsonl import (
+    JsonlTotals,
+    count_jsonl_tokens,
+    extract_texts,
+    parse_field_path,
+)
+from ai_token_counter.tokenizers.openai import count_tokens_tiktoken
+
+RECORD = {
+    "request_id": "r-1",
+    "messages": [
+        {"role": "system", "content": "You are helpful."},
+        {"role": "user", "content": "Hello world"},
+    ],
+    "meta/data": {"a~b": "escaped key"},
+    "temperature": 0.2,
+}
+
+
+def test_parse_field_path():
+    """
+    JSON pointer и точечная запись разбираются в одинаковые сегменты.
+    """
+    assert parse_field_path("/messages/0/content") == ("messages", "0", "content")
+    assert parse_field_path("messages.0.content") == ("messages", "0", "content")
+    assert parse_field_path("/meta~1data/a~0b") == ("meta/data", "a~b")
+    assert parse_field_path("") == ()
+
+
+def test_extract_texts():
+    """
+    Выбор полей поддерживает индексы, '*' и вложенные объекты.
+    """
+    assert extract_texts(RECORD, ("messages", "1", "content")) == ["Hello world"]
+    assert extract_texts(RECORD, ("messages", "*", "content")) == [
+        "You are helpful.",
+        "Hello world",
+    ]
+    assert extract_texts(RECORD, ("meta/data",)) == ["escaped key"]
+    assert extract_texts(RECORD, ("messages", "9", "content")) == []
+    assert extract_texts(RECORD, ("temperature",)) == []
+
+
+def test_count_jsonl_tokens_per_record_and_errors():
+    """
+    Подсчёт идёт по записям, ошибочные строки не прерывают поток.
+    """
+    lines = [json.dumps(RECORD), "", "{not json", json.dumps({"messages": []})] * 300
+    source = io.StringIO("\n".join(lines))
+    results = list(
+        count_jsonl_tokens(
+            source,
+            ["messages.*.content", "/request_id"],
+            encoding_name="cl100k_base",
+            batch_size=7,
+            jobs=3,
+        )
+    )
+    content = count_tokens_tiktoken("You are helpful.", "cl100k_base")
+    content += count_tokens_tiktoken("Hello world", "cl100k_base")
+    request_id = count_tokens_tiktoken("r-1", "cl100k_base")
+
+    assert len(results) == 900
+    assert [result.line for result in results[:3]] == [1, 3, 4]
+    assert results[0].fields == {
+        "messages.*.content": content,
+        "/request_id": request_id,
+    }
+    assert results[0].tokens == content + request_id
+    assert results[1].error is not None
+    assert results[2].tokens == 0
+
+    totals = JsonlTotals()
+    for result in results:
+        totals.add(result)
+    assert totals.records == 600
+    assert totals.failed == 300
+    assert totals.fields["messages.*.content"] == 300 * content
+
+
+def test_overlapping_fields_count_once_in_total():
+    """
+    Строка, выбранная пересекающимися путями, входит в каждое поле,
+    но в итог записи — один раз.
+    """
+    fields = ["messages", "messages.0.content", "/messages/*/content"]
+    (result,) = count_jsonl_tokens(
+        io.StringIO(json.dumps(RECORD)), fields, encoding_name="cl100k_base"
+    )
+    system = count_tokens_tiktoken("You are helpful.", "cl100k_base")
+    user = count_tokens_tiktoken("Hello world", "cl100k_base")
+    roles = count_tokens_tiktoken("system", "cl100k_base")
+    roles += count_tokens_tiktoken("user", "cl100k_base")
+    assert result.fields == {
+        "messages": system + user + roles,
+        "messages.0.content": system,
+        "/messages/*/content": system + user,
+    }
+    assert result.tokens == system + user + roles
+
+
+def test_count_jsonl_tokens_all_strings_by_default():
+    """
+    Без списка полей считаются все строковые значения записи.
+    """
+    source = io.StringIO(json.dumps({"a": "Hello world", "b": [1, "Test input"]}))
+    (result,) = count_jsonl_tokens(source, model_alias="gpt35")
+    expected = count_tokens_tiktoken("Hello world", "cl100k_base")
+    expected += count_tokens_tiktoken("Test input", "cl100k_base")
+    assert result.tokens == expected
+    assert result.fields == {}
+
+
+def test_count_jsonl_tokens_requires_encoding():
+    """
+    Без model_alias и encoding_name должен быть ValueError.
+    """
+    with pytest.raises(ValueError):
+        list(count_jsonl_tokens(io.StringIO("{}")))
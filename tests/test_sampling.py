@@ -0,0 +1,144 @@
+"""
+tests/test_sampling.py
+
+Purpose:
+    Tests for ai_token_counter.sampling: exact partition of files into
+    aligned units, full counts of small corpora and confidence intervals of
+    sampled ones.
+Dependencies:
+    pytest
+"""
+
+import gzip
+import math
+
+import pytest
+
+from ai_token_counter.counter import count_tokens
+from ai_token_counter.sampling import (
+    ALIGN_WINDOW,
+    SamplingOptions,
+    _align,
+    _count_unit,
+    estimate_corpus,
+    file_size_class,
+)
+from ai_token_counter.tokenizer_factory import get_tiktoken_encoder
+
+RANGE = 8 << 10
+
+PROSE = (
+    "Ünïcödé prose, with punctuation!\r\nAnd CRLF lines; numbers 12345 too.\n"
+    "Текст на русском языке и 中文 mixed in. "
+)
+CODE = "def f(x):\n    return x * 2  # double\n\n"
+
+
+def _write(path, text):
+    path.write_bytes(text.encode("utf-8"))
+    return str(path)
+
+
+def _exact(paths):
+    return sum(count_tokens(path, encoding_name="cl100k_base")[0] for path in paths)
+
+
+@pytest.mark.parametrize("text", [PROSE * 800, CODE * 1500, "word " * 9000])
+def test_units_partition_file(tmp_path, text):
+    """
+    Выровненные единицы разбивают файл, и их сумма равна точному подсчёту.
+    """
+    path = _write(tmp_path / "doc.txt", text)
+    size = len(text.encode("utf-8"))
+    encoder = get_tiktoken_encoder("cl100k_base")
+    units = [
+        _count_unit(encoder, path, size, index, RANGE)
+        for index in range(math.ceil(size / RANGE))
+    ]
+    assert sum(length for length, _ in units) == size
+    assert sum(tokens for _, tokens in units) == _exact([path])
+
+
+def test_align_fallback(tmp_path):
+    """
+    Без безопасной точки граница сдвигается только до начала символа.
+    """
+    data = ("中" * (3 * ALIGN_WINDOW)).encode("utf-8")
+    path = tmp_path / "cjk.txt"
+    path.write_bytes(data)
+    with open(path, "rb") as handle:
+        assert _align(handle, 100, len(data)) == 102
+        assert _align(handle, 0, len(data)) == 0
+        assert _align(handle, len(data) + 5, len(data)) == len(data)
+    with open(_write(tmp_path / "ab.txt", "ab cd"), "rb") as handle:
+        assert _align(handle, 1, 5) == 2
+
+
+def test_small_corpus_is_counted_exactly(tmp_path):
+    """
+    Небольшой корпус считается целиком: оценка точна, интервал нулевой.
+    """
+    paths = [
+        _write(tmp_path / "a.txt", PROSE * 10),
+        _write(tmp_path / "b.py", CODE * 50),
+        _write(tmp_path / "empty.md", ""),
+    ]
+    result = estimate_corpus(paths, encoding_name="cl100k_base")
+    assert result.exact and result.rounds == 1
+    assert result.tokens == result.low == result.high == _exact(paths)
+    assert result.files == 3 and len(result.strata) == 2
+
+
+def test_sampled_corpus_interval(tmp_path):
+    """
+    Выборочная оценка большого корпуса попадает в свой интервал.
+    """
+    paths = [
+        _write(tmp_path / f"doc{index}.txt", (PROSE * (40 + 60 * index))[index:])
+        for index in range(12)
+    ]
+    paths += [_write(tmp_path / f"src{index}.py", CODE * 2000) for index in range(4)]
+    options = SamplingOptions(precision=0.02, range_size=RANGE, seed=7, threads=2)
+    rounds = []
+    result = estimate_corpus(
+        paths, encoding_name="cl100k_base", options=options, on_round=rounds.append
+    )
+    assert not result.exact
+    assert result.relative_error <= 0.02
+    assert result.sampled_bytes < result.bytes
+    assert result.low <= _exact(paths) <= result.high
+    assert [estimate.rounds for estimate in rounds] == list(range(1, result.rounds + 1))
+    assert {stratum.extension for stratum in result.strata} == {".txt", ".py"}
+
+    budget = SamplingOptions(precision=1e-6, range_size=RANGE, max_bytes=1, seed=7)
+    limited = estimate_corpus(paths, encoding_name="cl100k_base", options=budget)
+    assert limited.rounds == 1
+
+
+def test_validation(tmp_path):
+    """
+    Неверные параметры и stdin отклоняются.
+    """
+    path = _write(tmp_path / "a.txt", "text")
+    with pytest.raises(ValueError):
+        estimate_corpus(["-"], encoding_name="cl100k_base")
+    with pytest.raises(ValueError):
+        estimate_corpus([path])
+    with pytest.raises(ValueError):
+        estimate_corpus(
+            [path], encoding_name="cl100k_base", options=SamplingOptions(precision=0)
+        )
+    with pytest.raises(ValueError):
+        estimate_corpus(
+            [path],
+            encoding_name="cl100k_base",
+            options=SamplingOptions(range_size=ALIGN_WINDOW),
+        )
+    with pytest.raises(FileNotFoundError):
+        estimate_corpus([str(tmp_path / "missing")], encoding_name="cl100k_base")
+    packed = tmp_path / "a.txt.gz"
+    packed.write_bytes(gzip.compress(b"text"))
+    with pytest.raises(ValueError):
+        estimate_corpus([str(packed)], encoding_name="cl100k_base")
+    assert file_size_class(10) == "<64K"
+    assert file_size_class(1 << 30) == ">=256M"
@@ -0,0 +1,256 @@
+"""
+tests/test_server.py
+
+Purpose:
+    Tests for the counting daemon (ai_token_counter.server) and its client
+    (ai_token_counter.client), including the in-process fallback.
+Dependencies:
+    pytest
+"""
+
+import http.client
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from ai_token_counter import client, server
+from ai_token_counter.counter import count_tokens
+from ai_token_counter.server import CountingDaemon, handle_request
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "getuid"), reason="Unix domain sockets required"
+)
+
+
+@pytest.fixture
+def socket_path():
+    """Короткий путь сокета: длина пути AF_UNIX ограничена ~100 байтами."""
+    with tempfile.TemporaryDirectory(prefix="atc") as directory:
+        yield os.path.join(directory, "d.sock")
+
+
+def test_handle_request():
+    """
+    Запросы с текстом, путём и ошибками обрабатываются без исключений.
+    """
+    assert handle_request({"text": "Hello world", "model": "gpt4"}) == {
+        "tokens": 2,
+        "encoding": "cl100k_base",
+    }
+    assert handle_request({"op": "ping"})["ok"] is True
+    assert handle_request({"text": "x", "model": "nope"})["type"] == "ValueError"
+    assert (
+        handle_request({"path": "/no/such/file", "encoding": "cl100k_base"})["type"]
+        == "FileNotFoundError"
+    )
+    assert handle_request(["not", "an", "object"])["type"] == "TypeError"
+    assert handle_request({"model": "gpt4"})["type"] == "ValueError"
+
+
+def test_path_requests_are_bounded(tmp_path, monkeypatch):
+    """
+    По пути считаются только обычные файлы, потоково и не больше лимита;
+    без разрешения путь отклоняется.
+    """
+    file_path = tmp_path / "a.txt"
+    file_path.write_text("Hello world " * 100, encoding="utf-8")
+    request = {"path": str(file_path), "encoding": "cl100k_base"}
+    assert (
+        handle_request(request)["tokens"]
+        == count_tokens(str(file_path), encoding_name="cl100k_base")[0]
+    )
+    assert "only accepted" in handle_request(request, allow_paths=False)["error"]
+    assert "regular file" in handle_request({**request, "path": str(tmp_path)})["error"]
+    if os.path.exists("/dev/zero"):
+        assert (
+            "regular file" in handle_request({**request, "path": "/dev/zero"})["error"]
+        )
+    monkeypatch.setattr(server, "MAX_PATH_CHARS", 100)
+    assert "more than 100" in handle_request(request)["error"]
+
+
+def test_unix_socket_roundtrip(tmp_path, socket_path):
+    """
+    Клиент получает от демона те же результаты, что и подсчёт в процессе.
+    """
+    file_path = tmp_path / "a.txt"
+    file_path.write_text("Hello world from a file", encoding="utf-8")
+    with CountingDaemon(socket_path, preload_encodings=["cl100k_base"]):
+        assert oct(os.stat(socket_path).st_mode & 0o777) == "0o600"
+        with client.DaemonClient(socket_path) as connection:
+            assert connection.count(str(file_path), encoding_name="cl100k_base") == (
+                count_tokens(str(file_path), encoding_name="cl100k_base")
+            )
+            assert connection.count(io.StringIO("Hello world"), "gpt4") == (
+                2,
+                "cl100k_base",
+            )
+            with pytest.raises(FileNotFoundError):
+                connection.count(str(tmp_path / "missing.txt"), "gpt4")
+            with pytest.raises(ValueError):
+                connection.count(io.StringIO("x"), "unknown-model")
+    assert not os.path.exists(socket_path)
+
+
+def test_oversized_line_closes_connection(socket_path, monkeypatch):
+    """
+    Слишком длинная строка получает одну ошибку и закрывает соединение;
+    клиент считает такой текст у себя.
+    """
+    monkeypatch.setattr(server, "MAX_REQUEST_BYTES", 64)
+    monkeypatch.setattr(client, "MAX_REQUEST_BYTES", 64)
+    good = json.dumps({"text": "Hello world", "model": "gpt4"}).encode() + b"\n"
+    with CountingDaemon(socket_path, preload_encodings=[]):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as raw:
+            raw.connect(socket_path)
+            raw.sendall(b'{"text": "' + b"x" * 200 + b'", "model": "gpt4"}\n' + good)
+            with raw.makefile("rb") as reader:
+                assert json.loads(reader.readline())["error"] == "Request too large"
+                assert reader.readline() == b""
+        text = "Hello world " * 20
+        with client.DaemonClient(socket_path) as connection:
+            assert connection.count(io.StringIO(text), "gpt4") == count_tokens(
+                io.StringIO(text), "gpt4"
+            )
+            assert connection.count(io.StringIO("Hello world"), "gpt4")[0] == 2
+
+
+def test_second_daemon_refused(socket_path):
+    """
+    Второй демон на том же сокете не запускается; устаревший сокет заменяется.
+    """
+    with CountingDaemon(socket_path, preload_encodings=[]):
+        with pytest.raises(ValueError):
+            CountingDaemon(socket_path, preload_encodings=[])
+    open(socket_path, "w", encoding="utf-8").close()
+    with CountingDaemon(socket_path, preload_encodings=[]):
+        assert client.count_tokens(
+            io.StringIO("Hello world"), "gpt4", None, socket_path
+        )
+
+
+@pytest.mark.parametrize(
+    "length, status", [(None, 411), ("abc", 400), ("-1", 400), ("999999999999", 413)]
+)
+def test_http_content_length_checked(length, status):
+    """
+    Отсутствующий, нечисловой, отрицательный или слишком большой
+    Content-Length отклоняется ответом, а не падением обработчика.
+    """
+    with CountingDaemon(http_port=0, preload_encodings=[]) as daemon:
+        connection = http.client.HTTPConnection(*daemon.http_address[:2], timeout=10)
+        connection.putrequest("POST", "/count")
+        connection.putheader("Content-Type", "application/json")
+        if length is not None:
+            connection.putheader("Content-Length", length)
+        connection.endheaders()
+        response = connection.getresponse()
+        assert response.status == status
+        assert "error" in json.load(response)
+        connection.close()
+
+
+def test_http_roundtrip():
+    """
+    HTTP-интерфейс отвечает на POST /count и GET /health.
+    """
+    with CountingDaemon(http_port=0, preload_encodings=[]) as daemon:
+        host, port = daemon.http_address[:2]
+        request = urllib.request.Request(
+            f"http://{host}:{port}/count",
+            data=json.dumps({"text": "Hello world", "model": "gpt4"}).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=10) as response:
+            assert json.load(response) == {"tokens": 2, "encoding": "cl100k_base"}
+        plain = urllib.request.Request(
+            f"http://{host}:{port}/count",
+            data=json.dumps({"text": "Hello world", "model": "gpt4"}).encode(),
+            headers={"Content-Type": "text/plain"},
+            method="POST",
+        )
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(plain, timeout=10)
+        assert excinfo.value.code == 415
+        by_path = urllib.request.Request(
+            f"http://{host}:{port}/count",
+            data=json.dumps({"path": "/etc/hostname", "model": "gpt4"}).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(by_path, timeout=10)
+        assert excinfo.value.code == 400
+        with urllib.request.urlopen(
+            f"http://{host}:{port}/health", timeout=10
+        ) as response:
+            assert json.load(response)["ok"] is True
+        bad = urllib.request.Request(
+            f"http://{host}:{port}/count",
+            data=b"{not json",
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(bad, timeout=10)
+        assert excinfo.value.code == 400
+
+
+def test_fallback_without_daemon(socket_path):
+    """
+    Без демона клиент считает в своём процессе.
+    """
+    with pytest.raises(client.DaemonUnavailable):
+        client.DaemonClient(socket_path)
+    assert client.count_tokens(
+        io.StringIO("Hello world"), encoding_name="cl100k_base", socket_path=socket_path
+    ) == (2, "cl100k_base")
+
+
+def test_cli_serve_and_daemon_client(tmp_path, socket_path):
+    """
+    `serve` запускает демона, а `--daemon` считает через него.
+    """
+    file_path = tmp_path / "a.txt"
+    file_path.write_text("Hello world", encoding="utf-8")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "ai_token_counter", "serve", "--socket", socket_path],
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        for _ in range(200):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.05)
+        cmd = [sys.executable, "-m", "ai_token_counter", "--daemon", socket_path]
+        single = subprocess.run(
+            cmd + ["-f", str(file_path), "-m", "gpt4"],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        assert (single.returncode, single.stdout.strip()) == (0, "2")
+        many = subprocess.run(
+            cmd + ["-f", str(file_path), str(tmp_path / "none.txt"), "-m", "gpt4"],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        assert many.returncode == 1
+        assert many.stdout.splitlines() == [f"2\t{file_path}", "2\ttotal"]
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    assert server.returncode == 0
+    assert not os.path.exists(socket_path)
@@ -0,0 +1,144 @@
+"""
+tests/test_stats.py
+
+Purpose:
+    Unit tests for ai_token_counter.stats and the `--stats` CLI flag.
+Dependencies:
+    pytest
+"""
+
+import gzip
+import io
+import json
+import subprocess
+import sys
+import threading
+
+from ai_token_counter import stats
+from ai_token_counter.cache import TokenCountCache
+from ai_token_counter.counter import count_tokens
+from ai_token_counter.tokenizer_factory import get_tiktoken_encoder
+
+TEXT = "Hello world, stats are collected per stage.\n" * 20
+
+
+def test_no_hooks_uses_null_recorder():
+    """
+    Без хуков замеры не создаются.
+    """
+    assert stats.recorder("any.txt") is stats.NULL_RECORDER
+
+
+def test_collect_text_file(tmp_path):
+    """
+    Подсчёт файла сообщает этапы, размер, токены и скорость.
+    """
+    path = tmp_path / "doc.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    with stats.collect() as collected:
+        tokens, encoding = count_tokens(path, encoding_name="cl100k_base")
+    assert len(collected) == 1
+    result = collected[0]
+    assert (result.tokens, result.encoding) == (tokens, encoding)
+    assert result.bytes == len(TEXT.encode("utf-8"))
+    assert {"read", "resolve", "load", "encode"} <= set(result.stages)
+    assert result.wall_time > 0 and result.tokens_per_s > 0
+    assert stats.recorder(path) is stats.NULL_RECORDER
+
+
+def test_collect_stream_measures_bytes():
+    """
+    Для файлового объекта размер считается по прочитанному тексту.
+    """
+    with stats.collect() as collected:
+        count_tokens(io.StringIO("héllo"), encoding_name="cl100k_base")
+    assert collected[0].bytes == len("héllo".encode("utf-8"))
+
+
+def test_collect_cached_count(tmp_path):
+    """
+    Подсчёт через кэш сообщает этапы hash и cache.
+    """
+    path = tmp_path / "doc.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    with TokenCountCache(tmp_path / "c.sqlite3") as cache, stats.collect() as collected:
+        count_tokens(path, encoding_name="cl100k_base", cache=cache)
+        count_tokens(path, encoding_name="cl100k_base", cache=cache)
+    assert {"hash", "cache", "encode"} <= set(collected[0].stages)
+    assert "encode" not in collected[1].stages
+    assert collected[0].tokens == collected[1].tokens
+
+
+def test_compressed_file_reports_decoded_bytes(tmp_path):
+    """
+    Для сжатого файла размер — объём распакованного текста, и при чтении
+    дважды (хэш, затем подсчёт) он не удваивается.
+    """
+    path = tmp_path / "doc.txt.gz"
+    path.write_bytes(gzip.compress(TEXT.encode("utf-8")))
+    with TokenCountCache(tmp_path / "c.sqlite3") as cache, stats.collect() as collected:
+        count_tokens(path, encoding_name="cl100k_base")
+        count_tokens(path, encoding_name="cl100k_base", cache=cache)
+    assert [result.bytes for result in collected] == [len(TEXT.encode("utf-8"))] * 2
+
+
+def test_encoder_lookups_are_per_thread():
+    """
+    Обращения к реестру кодировщиков из других потоков не попадают в замер.
+    """
+    get_tiktoken_encoder("cl100k_base")
+    recorder = stats.StatsRecorder("-")
+    others = [
+        threading.Thread(target=get_tiktoken_encoder, args=("cl100k_base",))
+        for _ in range(20)
+    ]
+    for thread in others:
+        thread.start()
+    get_tiktoken_encoder("cl100k_base")
+    for thread in others:
+        thread.join()
+    recorder.finish(0, "cl100k_base")
+    assert recorder.stats.encoder_cache_hits == 1
+    assert recorder.stats.encoder_cache_misses == 0
+
+
+def test_hook_add_remove_and_merge():
+    """
+    Хуки вызываются до удаления; merge суммирует замеры.
+    """
+    seen = []
+    stats.add_hook(seen.append)
+    try:
+        count_tokens(io.StringIO("a b"), encoding_name="cl100k_base")
+    finally:
+        stats.remove_hook(seen.append)
+    count_tokens(io.StringIO("a b"), encoding_name="cl100k_base")
+    assert len(seen) == 1
+
+    total = stats.CountStats(counts=0)
+    total.merge(seen[0])
+    total.merge(seen[0])
+    assert total.counts == 2 and total.tokens == 2 * seen[0].tokens
+    data = total.to_dict()
+    assert {"bytes_per_s", "tokens_per_s", "stages"} <= set(data)
+    assert "tokens:" in stats.format_stats(total)
+
+
+def test_cli_stats_json(tmp_path):
+    """
+    --stats=json печатает сводку в stderr, stdout содержит только число.
+    """
+    path = tmp_path / "doc.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    proc = subprocess.run(
+        [sys.executable, "-m", "ai_token_counter", "-f", str(path)]
+        + ["--encoding", "cl100k_base", "--stats=json"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert proc.returncode == 0
+    summary = json.loads(proc.stderr)
+    assert summary["tokens"] == int(proc.stdout)
+    assert summary["bytes"] == path.stat().st_size
+    assert "encode" in summary["stages"]
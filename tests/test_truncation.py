@@ -0,0 +1,88 @@
+"""
+tests/test_truncation.py
+
+Purpose:
+    Unit tests for ai_token_counter.truncation.
+Dependencies:
+    pytest
+"""
+
+import pytest
+import tiktoken
+
+from ai_token_counter.truncation import truncate_batch, truncate_to_tokens
+from ai_token_counter.tokenizers.openai import count_tokens_tiktoken
+
+ENCODING = "cl100k_base"
+TEXTS = [
+    "The quick brown fox jumps over the lazy dog. " * 10,
+    "日本語のテキストを数える。" * 8,
+    "family 👨‍👩‍👧‍👦 flags 🇺🇦🇯🇵 and é accents " * 6,
+    "    def f(x):\n        return x  # комментарий\n" * 5,
+]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+@pytest.mark.parametrize("side", ["end", "start"])
+@pytest.mark.parametrize("budget", [0, 1, 3, 17, 40])
+def test_fits_budget_with_exact_count(text, side, budget):
+    """
+    Результат — префикс/суффикс, укладывается в бюджет и посчитан точно.
+    """
+    kept, count = truncate_to_tokens(text, budget, side, encoding_name=ENCODING)
+    assert count == count_tokens_tiktoken(kept, ENCODING) <= budget
+    assert text.startswith(kept) if side == "end" else text.endswith(kept)
+    # Графемы не разрезаются: ни ZWJ, ни комбинирующий акцент на краю
+    edge = kept[-1:] if side == "end" else kept[:1]
+    assert edge not in ("‍", "́")
+    # Без длинных кластеров (эмодзи-последовательностей) бюджет почти исчерпан
+    if budget >= 3 and "\u200d" not in text:
+        assert count >= budget - 3
+
+
+def test_prefix_matches_token_boundary():
+    """
+    Для обычного текста срез совпадает с декодированными первыми токенами.
+    """
+    text = TEXTS[0]
+    encoder = tiktoken.get_encoding(ENCODING)
+    tokens = encoder.encode(text)
+    assert truncate_to_tokens(text, 10, encoding_name=ENCODING) == (
+        encoder.decode(tokens[:10]),
+        10,
+    )
+    assert truncate_to_tokens(text, 10, "start", encoding_name=ENCODING) == (
+        encoder.decode(tokens[-10:]),
+        10,
+    )
+    assert truncate_to_tokens("short", 100, model_alias="gpt4") == (
+        "short",
+        count_tokens_tiktoken("short", ENCODING),
+    )
+
+
+def test_batch_matches_single_and_reports_errors():
+    """
+    Пакетная форма совпадает с поштучной; ошибки остаются на своих местах.
+    """
+    items = TEXTS + ["<|endoftext|>", 42]
+    results, encoding = truncate_batch(items, 12, encoding_name=ENCODING)
+    assert encoding == ENCODING
+    for text, result in zip(TEXTS, results):
+        assert result == truncate_to_tokens(text, 12, encoding_name=ENCODING)
+    assert isinstance(results[-2], ValueError)
+    assert isinstance(results[-1], TypeError)
+
+
+def test_invalid_arguments():
+    """
+    Неверные аргументы вызывают ValueError.
+    """
+    with pytest.raises(ValueError):
+        truncate_to_tokens("x", 1, "middle", encoding_name=ENCODING)
+    with pytest.raises(ValueError):
+        truncate_to_tokens("x", -1, encoding_name=ENCODING)
+    with pytest.raises(ValueError):
+        truncate_to_tokens("x", 1)
+    with pytest.raises(ValueError):
+        truncate_to_tokens("a <|endoftext|>", 1, encoding_name=ENCODING)
@@ -0,0 +1,127 @@
+"""
+tests/test_vocab_store.py
+
+Purpose:
+    Tests for the offline vocabulary store (ai_token_counter.vocab_store)
+    and its use by the encoder registry.
+Dependencies:
+    pytest
+"""
+
+import subprocess
+import sys
+
+import pytest
+import tiktoken
+
+from ai_token_counter import tokenizer_factory
+from ai_token_counter.tokenizer_factory import evict, get_tiktoken_encoder
+from ai_token_counter.vocab_store import (
+    export_vocab,
+    list_vocab,
+    load_encoding,
+    vocab_path,
+)
+
+TEXT = "Hello   world\n\n  Ünïcödé текст 中文字符 🎉 it's 1234567 <|endoftext|>"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Временный каталог хранилища словарей и чистый реестр кодировщиков."""
+    monkeypatch.setenv("AI_TOKEN_COUNTER_VOCAB_DIR", str(tmp_path))
+    evict()
+    yield tmp_path
+    evict()
+
+
+@pytest.mark.parametrize("encoding_name", ["cl100k_base", "o200k_base"])
+def test_roundtrip(tmp_path, encoding_name):
+    """
+    Кодировщик из хранилища кодирует так же, как исходный.
+    """
+    original = tiktoken.get_encoding(encoding_name)
+    (path,) = export_vocab([encoding_name], tmp_path)
+    loaded = load_encoding(path)
+    assert loaded.name == encoding_name
+    assert loaded.n_vocab == original.n_vocab
+    assert loaded.special_tokens_set == original.special_tokens_set
+    assert loaded.encode(TEXT, allowed_special="all") == original.encode(
+        TEXT, allowed_special="all"
+    )
+
+
+def test_registry_uses_store_without_tiktoken_loader(store, monkeypatch):
+    """
+    Реестр берёт кодировку из хранилища и не обращается к загрузчику tiktoken.
+    """
+    export_vocab(["cl100k_base"])
+    assert list_vocab() == ["cl100k_base"]
+
+    def offline(name):
+        raise RuntimeError(f"network access for {name}")
+
+    monkeypatch.setattr(tokenizer_factory.tiktoken, "get_encoding", offline)
+    encoder = get_tiktoken_encoder("cl100k_base")
+    assert len(encoder.encode("Hello world")) == 2
+
+
+@pytest.mark.parametrize(
+    "damage", [lambda data: data[:-3], lambda data: b"NOTVOCAB" + data[8:]]
+)
+def test_corrupt_store_file(store, damage):
+    """
+    Повреждённый файл хранилища даёт понятную ошибку ValueError.
+    """
+    (path,) = export_vocab(["cl100k_base"])
+    path.write_bytes(damage(path.read_bytes()))
+    with pytest.raises(ValueError, match="cl100k_base"):
+        get_tiktoken_encoder("cl100k_base")
+
+
+@pytest.mark.parametrize(
+    "name", ["../cl100k_base", "a/b", "a\\b", "..", "x..y", "", "name with space"]
+)
+def test_invalid_encoding_name_rejected(store, name):
+    """
+    Имена с разделителями путей, ".." и посторонними символами отклоняются
+    до обращения к файловой системе, в том числе через реестр кодировщиков.
+    """
+    with pytest.raises(ValueError, match="Invalid encoding name"):
+        vocab_path(name, store)
+    with pytest.raises(ValueError, match="Invalid encoding name"):
+        get_tiktoken_encoder(name)
+    assert vocab_path("cl100k_base", store) == store / "cl100k_base.atcv"
+
+
+def test_cli_export_and_list(tmp_path):
+    """
+    `vocab export` пишет файлы, `vocab list` их перечисляет.
+    """
+    cmd = [sys.executable, "-m", "ai_token_counter", "vocab"]
+    exported = subprocess.run(
+        cmd + ["export", "--dir", str(tmp_path), "cl100k_base", "o200k_base"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert exported.returncode == 0
+    assert exported.stdout.split() == [
+        str(vocab_path("cl100k_base", tmp_path)),
+        str(vocab_path("o200k_base", tmp_path)),
+    ]
+    listed = subprocess.run(
+        cmd + ["list", "--dir", str(tmp_path)],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert listed.stdout.split() == ["cl100k_base", "o200k_base"]
+    failed = subprocess.run(
+        cmd + ["export", "--dir", str(tmp_path), "no_such_encoding"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert failed.returncode == 1
+    assert failed.stderr.startswith("Error:")
@@ -0,0 +1,158 @@
+"""
+tests/tokenizers/test_estimator.py
+
+Purpose:
+    Unit tests for ai_token_counter.tokenizers.estimator: feature extraction,
+    bounds, fitting and model storage.
+Dependencies:
+    pytest
+"""
+
+import json
+
+import pytest
+
+from ai_token_counter.tokenizer_factory import get_tiktoken_encoder
+from ai_token_counter.tokenizers import estimator
+from ai_token_counter.tokenizers.estimator import (
+    FEATURES,
+    SAMPLE_THRESHOLD,
+    EstimatorModel,
+    calibrate,
+    corpus_samples,
+    estimate_tokens,
+    extract_features,
+    fit_model,
+    load_model,
+    prior_model,
+    relative_errors,
+    save_model,
+)
+
+SAMPLES = [
+    "Hello world",
+    "  indented\n\tcode = value * 2  # comment\r\n",
+    "numbers 1234567 and 3.14159, punctuation!!! ...",
+    "Ünïcödé текст 中文字符 emoji 🎉🎉 and it's",
+    "lone surrogate \ud800 here",
+    " " * 100,
+]
+
+CORPUS = [
+    "The quick brown fox jumps over the lazy dog. " * 400,
+    "def count(text):\n    return len(text.split())  # words\n" * 300,
+    "Съешь же ещё этих мягких французских булок, да выпей чаю. " * 300,
+    "这是一个用于测试的中文句子，包含标点符号。" * 500,
+]
+
+
+def _exact(text, encoding_name="cl100k_base"):
+    return len(get_tiktoken_encoder(encoding_name).encode_ordinary(text))
+
+
+def test_features():
+    """
+    Признаки считаются по классам байтов UTF-8.
+    """
+    features, sampled = extract_features("ab 12\n!  é中🎉")
+    assert not sampled
+    counts = dict(zip(FEATURES, features))
+    assert counts == {
+        "letters": 2,
+        "digits": 2,
+        "spaces": 3,
+        "breaks": 1,
+        "punctuation": 1,
+        "chars2": 1,
+        "chars3": 1,
+        "chars4": 1,
+        "words": 4,
+        "double_spaces": 1,
+    }
+
+
+def test_sampled_features_scale():
+    """
+    Длинный однородный текст измеряется по окнам с масштабированием.
+    """
+    text = "word " * (SAMPLE_THRESHOLD // 2)
+    features, sampled = extract_features(text)
+    assert sampled
+    counts = dict(zip(FEATURES, features))
+    assert counts["letters"] == pytest.approx(4 * len(text) / 5, rel=0.01)
+    assert counts["spaces"] == pytest.approx(len(text) / 5, rel=0.01)
+
+
+@pytest.mark.parametrize(
+    "text", SAMPLES + ["x" * (SAMPLE_THRESHOLD + 1)], ids=range(len(SAMPLES) + 1)
+)
+@pytest.mark.parametrize("encoding_name", ["cl100k_base", "o200k_base"])
+def test_hard_bound(text, encoding_name):
+    """
+    Жёсткая граница никогда не меньше точного числа токенов.
+    """
+    estimate = estimate_tokens(text, encoding_name, prior_model(encoding_name))
+    assert estimate.tokens <= estimate.upper_bound <= estimate.hard_bound
+    assert _exact(text, encoding_name) <= estimate.hard_bound
+
+
+def test_empty_and_type():
+    """
+    Пустой текст оценивается нулём, не-строка отклоняется.
+    """
+    estimate = estimate_tokens("", "cl100k_base")
+    assert (estimate.tokens, estimate.upper_bound, estimate.hard_bound) == (0, 0, 0)
+    with pytest.raises(TypeError):
+        estimate_tokens(b"bytes", "cl100k_base")
+
+
+def test_fit_bounds_every_sample():
+    """
+    Подобранная модель точна на корпусе и её граница покрывает все выборки.
+    """
+    samples = [(window, _exact(window)) for window in corpus_samples(CORPUS)]
+    model = fit_model("cl100k_base", samples)
+    assert model.samples == len(samples)
+    errors, violations = relative_errors(model, samples)
+    assert violations == 0
+    assert sum(abs(error) for error in errors) / len(errors) < 0.1
+    # Признаков, которых нет в корпусе, подгонка почти не касается
+    prior = prior_model("cl100k_base")
+    chars4 = FEATURES.index("chars4")
+    assert model.weights[chars4] == pytest.approx(prior.weights[chars4], rel=0.01)
+
+    big = CORPUS[0] * 10
+    estimate = estimate_tokens(big, "cl100k_base", model)
+    assert estimate.sampled
+    assert estimate.tokens == pytest.approx(_exact(big), rel=0.05)
+    assert estimate.upper_bound >= _exact(big)
+
+
+def test_fit_requires_samples():
+    """
+    Без непустых выборок подгонка невозможна.
+    """
+    with pytest.raises(ValueError):
+        fit_model("cl100k_base", [("", 0)])
+
+
+def test_store(tmp_path):
+    """
+    Модель сохраняется и загружается; без файла используется априорная.
+    """
+    assert load_model("cl100k_base", str(tmp_path)) == prior_model("cl100k_base")
+    results = calibrate(["cl100k_base"], CORPUS, tmp_path)
+    model, path, errors = results[0]
+    assert path == tmp_path / "cl100k_base.json"
+    assert load_model("cl100k_base", str(tmp_path)) == model
+    assert errors["max"] >= errors["p95"] >= errors["p50"]
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert EstimatorModel.from_dict(data) == model
+    data["features"] = ["letters"]
+    path.write_text(json.dumps(data), encoding="utf-8")
+    estimator.load_model.cache_clear()
+    with pytest.raises(ValueError):
+        load_model("cl100k_base", str(tmp_path))
+    estimator.load_model.cache_clear()
+    assert save_model(model, tmp_path) == path
@@ -0,0 +1,66 @@
+"""
+tests/tokenizers/test_openai.py
+
+Purpose:
+    Unit tests for ai_token_counter.tokenizers.openai, including the
+    count-only mode.
+Dependencies:
+    pytest
+"""
+
+import pytest
+
+from ai_token_counter.tokenizer_factory import get_tiktoken_encoder
+from ai_token_counter.tokenizers.openai import (
+    count_pieces,
+    count_tokens_tiktoken,
+)
+
+SAMPLES = [
+    "",
+    "Hello world",
+    "Hello   world\n\n\n  indented\tline  ",
+    "numbers 1234567 and 3.14159, punctuation!!! ...\r\n",
+    "Ünïcödé текст 中文字符 emoji 🎉🎉 and it's they're we'll",
+    "trailing whitespace   ",
+    "  \n \n",
+]
+
+
+@pytest.mark.parametrize("encoding_name", ["cl100k_base", "o200k_base"])
+@pytest.mark.parametrize("text", SAMPLES)
+def test_count_only_matches_encode(encoding_name, text):
+    """
+    Режим count-only должен совпадать с len(encode(text)).
+    """
+    encoder = get_tiktoken_encoder(encoding_name)
+    expected = len(encoder.encode(text))
+    assert count_pieces(encoder, text) == expected
+    assert count_tokens_tiktoken(text, encoding_name, count_only=True) == expected
+    assert count_tokens_tiktoken(text, encoding_name, count_only=False) == expected
+
+
+def test_count_only_large_input():
+    """
+    Большой вход считается в режиме count-only автоматически и совпадает с encode.
+    """
+    text = " ".join(SAMPLES) * 2000
+    encoder = get_tiktoken_encoder("cl100k_base")
+    assert count_tokens_tiktoken(text, "cl100k_base") == len(encoder.encode(text))
+
+
+def test_count_only_lone_surrogate():
+    """
+    Одиночные суррогаты обрабатываются так же, как в Encoding.encode.
+    """
+    text = "bad \ud800 surrogate"
+    encoder = get_tiktoken_encoder("cl100k_base")
+    assert count_pieces(encoder, text) == len(encoder.encode(text))
+
+
+def test_count_only_rejects_special_tokens():
+    """
+    Как и encode(), режим count-only отвергает специальные токены.
+    """
+    with pytest.raises(ValueError):
+        count_tokens_tiktoken("a <|endoftext|> b", "cl100k_base", count_only=True)